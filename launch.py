@@ -5,55 +5,105 @@ Simple launcher for WhisperMind with basic error handling.
 import subprocess
 import sys
 import os
+import time
+from functools import lru_cache
 from pathlib import Path
 
+import requests
+
+OLLAMA_TAGS_URL = "http://127.0.0.1:11434/api/tags"
+
+_BASE = Path(__file__).resolve().parent
+_APP = _BASE / "src" / "ui" / "streamlit_app.py"
+
 def check_ollama():
     """Check if Ollama is running."""
     try:
-        result = subprocess.run(['ollama', 'list'], capture_output=True, text=True)
-        return result.returncode == 0
-    except FileNotFoundError:
+        return requests.get(OLLAMA_TAGS_URL, timeout=1).ok
+    except requests.RequestException:
         return False
 
 def start_ollama():
     """Start Ollama server."""
     print("🚀 Starting Ollama server...")
     try:
-        subprocess.Popen(['ollama', 'serve'], shell=True)
+        # Detach from the launcher's console/session without a shell wrapper
+        if sys.platform == "win32":
+            detach = {"creationflags": subprocess.CREATE_NEW_PROCESS_GROUP}
+        else:
+            detach = {"start_new_session": True}
+        subprocess.Popen(
+            ['ollama', 'serve'],
+            stdout=subprocess.DEVNULL,
+            stderr=subprocess.DEVNULL,
+            **detach
+        )
         print("✅ Ollama server started")
         return True
     except Exception as e:
         print(f"❌ Failed to start Ollama: {e}")
         return False
 
-def launch_streamlit():
-    """Launch Streamlit app."""
+def wait_for_ollama(timeout=10.0):
+    """Poll the Ollama API with exponential backoff until it answers."""
+    deadline = time.monotonic() + timeout
+    delay = 0.05
+    while time.monotonic() < deadline:
+        if check_ollama():
+            return True
+        time.sleep(delay)
+        delay = min(delay * 2, 1.0)
+    return check_ollama()
+
+@lru_cache(maxsize=None)
+def _python_executable():
+    """Return the project's virtualenv Python, or the current interpreter."""
     # Try virtual environment first, fall back to system Python
     if sys.platform == "win32":
-        venv_python = Path(__file__).parent / ".venv" / "Scripts" / "python.exe"
+        venv_python = _BASE / ".venv" / "Scripts" / "python.exe"
     else:
-        venv_python = Path(__file__).parent / ".venv" / "bin" / "python"
+        venv_python = _BASE / ".venv" / "bin" / "python"
     
     # Use virtual environment if it exists, otherwise use current Python
     if venv_python.exists():
-        python_path = str(venv_python)
-    else:
-        python_path = sys.executable
-        print("⚠️  Virtual environment not found, using system Python")
+        return str(venv_python)
     
-    app_path = Path(__file__).parent / "src" / "ui" / "streamlit_app.py"
+    print("⚠️  Virtual environment not found, using system Python")
+    return sys.executable
+
+def run_streamlit(app_path, python_path=None, port=8501, address="localhost"):
+    """Serve a Streamlit app, in this process when the interpreter matches."""
+    python_path = python_path or sys.executable
+    
+    # Serving in-process skips a second interpreter start and streamlit import
+    if python_path == sys.executable:
+        try:
+            from streamlit.web import bootstrap
+        except ImportError:
+            pass
+        else:
+            flag_options = {"server_port": port, "server_address": address}
+            bootstrap.load_config_options(flag_options=flag_options)
+            bootstrap.run(str(app_path), False, [], flag_options)
+            return
+    
+    subprocess.run([
+        python_path, "-m", "streamlit", "run",
+        str(app_path),
+        "--server.port", str(port),
+        "--server.address", address
+    ])
+
+def launch_streamlit():
+    """Launch Streamlit app."""
+    python_path = _python_executable()
     
     print("🌐 Launching WhisperMind web interface...")
     print("📱 The app will open at: http://localhost:8501")
     print("🔄 This may take a moment to load...")
     
     try:
-        subprocess.run([
-            python_path, "-m", "streamlit", "run", 
-            str(app_path),
-            "--server.port", "8501",
-            "--server.address", "localhost"
-        ])
+        run_streamlit(_APP, python_path=python_path)
     except KeyboardInterrupt:
         print("\n👋 WhisperMind stopped by user")
     except Exception as e:
@@ -74,9 +124,10 @@ def main():
             print("   Then run: ollama pull llama3")
             return
         
-        # Wait a moment for Ollama to start
-        import time
-        time.sleep(3)
+        # Wait for Ollama to start answering requests
+        if not wait_for_ollama():
+            print("❌ Ollama did not become ready in time")
+            return
     
     print("✅ Ollama is available")
     
@@ -15,31 +15,24 @@ from src.chatbot import WhisperMindChatbot
 from src.core.config import Config
 
 
-async def main():
-    """Main function."""
+def parse_args():
+    """Parse command line arguments."""
     parser = argparse.ArgumentParser(description="WhisperMind - Local AI Chatbot")
     parser.add_argument("--config", default="config/config.yaml", help="Configuration file path")
     parser.add_argument("--ui", action="store_true", help="Launch Streamlit UI")
     parser.add_argument("--load-docs", help="Load documents from directory")
     parser.add_argument("--test", action="store_true", help="Run test chat session")
     
-    args = parser.parse_args()
-    
+    return parser.parse_args()
+
+
+async def main(args):
+    """Main function."""
     # Initialize chatbot
     chatbot = WhisperMindChatbot(config_path=args.config)
     
     try:
-        if args.ui:
-            # Launch Streamlit UI
-            import subprocess
-            subprocess.run([
-                sys.executable, "-m", "streamlit", "run", 
-                "src/ui/streamlit_app.py",
-                "--server.port", "8501",
-                "--server.address", "localhost"
-            ])
-        
-        elif args.load_docs:
+        if args.load_docs:
             # Load documents only
             await chatbot.initialize()
             docs_count = await chatbot.load_documents(args.load_docs)
@@ -71,7 +64,9 @@ async def cli_chat(chatbot: WhisperMindChatbot):
     
     while True:
         try:
-            user_input = input("You: ").strip()
+            # Read on a worker thread so the event loop keeps servicing
+            # background tasks while the user is typing.
+            user_input = (await asyncio.to_thread(input, "You: ")).strip()
             
             if user_input.lower() in ['quit', 'exit', 'q']:
                 print("Goodbye! 👋")
@@ -96,7 +91,7 @@ async def cli_chat(chatbot: WhisperMindChatbot):
             print(f"Error: {e}")
 
 
-async def test_chat_session(chatbot: WhisperMindChatbot):
+async def test_chat_session(chatbot: WhisperMindChatbot, max_concurrency: int = 2):
     """Run a test chat session."""
     print("🧪 Running test chat session...")
     
@@ -109,9 +104,18 @@ async def test_chat_session(chatbot: WhisperMindChatbot):
         "What are the benefits of local AI models?"
     ]
     
-    for question in test_questions:
+    # Ollama queues requests per model, so cap in-flight chats while still
+    # overlapping retrieval and network round trips.
+    semaphore = asyncio.Semaphore(max_concurrency)
+    
+    async def ask(question: str) -> str:
+        async with semaphore:
+            return await chatbot.chat(question)
+    
+    responses = await asyncio.gather(*(ask(q) for q in test_questions))
+    
+    for question, response in zip(test_questions, responses):
         print(f"\nTest Question: {question}")
-        response = await chatbot.chat(question)
         print(f"Response: {response[:200]}{'...' if len(response) > 200 else ''}")
     
     # Test status
@@ -122,4 +126,18 @@ async def test_chat_session(chatbot: WhisperMindChatbot):
 
 
 if __name__ == "__main__":
-    asyncio.run(main())
\ No newline at end of file
+    args = parse_args()
+    
+    if args.ui:
+        # Streamlit runs its own event loop, so serve it outside asyncio.run
+        from launch import run_streamlit
+        run_streamlit("src/ui/streamlit_app.py")
+        sys.exit()
+    
+    if sys.platform != "win32":
+        try:
+            import uvloop
+            uvloop.install()
+        except ImportError:
+            pass
+    asyncio.run(main(args))
\ No newline at end of file
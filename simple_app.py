@@ -9,10 +9,32 @@ import os
 import logging
 from pathlib import Path
 import sys
+import threading
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+import requests
+from requests.adapters import HTTPAdapter
+
+# orjson decodes the one-object-per-token NDJSON stream noticeably faster.
+try:
+    from orjson import loads as json_loads
+except ImportError:
+    from json import loads as json_loads
 
 # Configure logging to suppress warnings
 logging.basicConfig(level=logging.ERROR)
 
+# Keep the chat model resident in Ollama between turns (default is 5m)
+OLLAMA_KEEP_ALIVE = "30m"
+# Fail fast when Ollama is unreachable, but allow a slow cold model load
+# before the first streamed token arrives.
+OLLAMA_STREAM_TIMEOUT = (5, 120)
+
+# Paths used on every rerun, resolved once at import
+_DOCS_DIR = Path("data/documents")
+_CONFIG = Path("config/config.yaml")
+
 # Add parent directory to path for imports
 sys.path.append(str(Path(__file__).parent.parent.parent))
 
@@ -24,32 +46,40 @@ st.set_page_config(
     initial_sidebar_state="expanded"
 )
 
-def check_dependencies():
-    """Check if all required components are available."""
-    components = {
-        "ollama": False,
-        "documents": False,
-        "config": False
-    }
-    
+@st.cache_data(ttl=5, show_spinner=False)
+def check_ollama():
+    """Check if the Ollama server is reachable."""
     try:
-        # Check Ollama
-        import requests
-        response = requests.get("http://localhost:11434/api/tags", timeout=5)
-        components["ollama"] = response.status_code == 200
+        response = ollama_session().get("http://localhost:11434/api/tags", timeout=5)
+        return response.status_code == 200
     except:
-        pass
-    
-    # Check documents
-    docs_path = Path("data/documents")
-    if docs_path.exists():
-        components["documents"] = len(list(docs_path.glob("*.*"))) > 0
+        return False
+
+def _has_docs(path: Path) -> bool:
+    """Return True as soon as the directory yields its first file."""
+    try:
+        with os.scandir(path) as entries:
+            return any(entry.is_file() for entry in entries)
+    except FileNotFoundError:
+        return False
+
+@st.cache_data(ttl=30, show_spinner=False)
+def check_local_files():
+    """Check for documents and configuration on disk."""
+    documents = _has_docs(_DOCS_DIR)
     
-    # Check config
-    config_path = Path("config/config.yaml")
-    components["config"] = config_path.exists()
+    config = _CONFIG.exists()
     
-    return components
+    return documents, config
+
+def check_dependencies():
+    """Check if all required components are available."""
+    documents, config = check_local_files()
+    return {
+        "ollama": check_ollama(),
+        "documents": documents,
+        "config": config
+    }
 
 def render_sidebar():
     """Render the sidebar."""
@@ -62,8 +92,14 @@ def render_sidebar():
         
         components = check_dependencies()
         
+        if st.button("🔄 Refresh status"):
+            check_ollama.clear()
+            check_local_files.clear()
+            st.rerun()
+        
         if components["ollama"]:
             st.success("✅ Ollama Connected")
+            warm_model("llama3")
         else:
             st.error("❌ Ollama Not Connected")
             st.markdown("**Start Ollama:**")
@@ -85,6 +121,7 @@ def render_sidebar():
         # Simple settings
         st.subheader("⚙️ Settings")
         use_rag = st.checkbox("Enable Document Search", value=True)
+        st.slider("History length", 10, 200, 50, key="history_length")
         
         st.divider()
         
@@ -101,24 +138,38 @@ def render_sidebar():
 
 def save_uploaded_files(uploaded_files):
     """Save uploaded files to documents directory."""
-    docs_dir = Path("data/documents")
+    docs_dir = _DOCS_DIR
     docs_dir.mkdir(exist_ok=True)
     
-    for file in uploaded_files:
-        file_path = docs_dir / file.name
-        with open(file_path, "wb") as f:
-            f.write(file.getbuffer())
-        st.success(f"Saved: {file.name}")
+    if not uploaded_files:
+        return
+    
+    with ThreadPoolExecutor(max_workers=min(8, len(uploaded_files))) as executor:
+        futures = {
+            executor.submit((docs_dir / file.name).write_bytes, file.getbuffer()): file.name
+            for file in uploaded_files
+        }
+        # Streamlit elements must be created on the script thread
+        for future in as_completed(futures):
+            future.result()
+            st.success(f"Saved: {futures[future]}")
+
+def ensure_message_history(max_len):
+    """Keep chat history in a deque capped at the last max_len messages."""
+    messages = st.session_state.get("messages")
+    if not isinstance(messages, deque) or messages.maxlen != max_len:
+        st.session_state.messages = deque(messages or (), maxlen=max_len)
+    return st.session_state.messages
 
 def simple_chat():
     """Simple chat interface without full WhisperMind integration."""
     st.title("💬 WhisperMind Chat")
     
     # Initialize session state
-    if 'messages' not in st.session_state:
-        st.session_state.messages = [
+    if not ensure_message_history(st.session_state.get("history_length", 50)):
+        st.session_state.messages.append(
             {"role": "assistant", "content": "Hello! I'm WhisperMind. I'm currently in setup mode. Please ensure Ollama is running and models are downloaded."}
-        ]
+        )
     
     # Display messages
     for message in st.session_state.messages:
@@ -135,37 +186,73 @@ def simple_chat():
         
         # Generate response
         with st.chat_message("assistant"):
-            response = get_simple_response(prompt)
-            st.markdown(response)
+            response = st.write_stream(get_simple_response(prompt))
             st.session_state.messages.append({"role": "assistant", "content": response})
 
+@st.cache_resource
+def ollama_session():
+    """Shared keep-alive HTTP session for the local Ollama server."""
+    session = requests.Session()
+    session.mount("http://", HTTPAdapter(pool_connections=4, pool_maxsize=8))
+    return session
+
+@st.cache_resource
+def warm_model(model):
+    """Load the model into Ollama once per process with a one-token generate."""
+    def _warm():
+        try:
+            ollama_session().post(
+                "http://localhost:11434/api/generate",
+                json={
+                    "model": model,
+                    "prompt": " ",
+                    "stream": False,
+                    "keep_alive": OLLAMA_KEEP_ALIVE,
+                    "options": {"num_predict": 1}
+                },
+                timeout=120
+            )
+        except requests.RequestException:
+            pass
+    
+    # Run in the background so the first render is not held up by model load
+    thread = threading.Thread(target=_warm, name=f"ollama-warm-{model}", daemon=True)
+    thread.start()
+    return thread
+
 def get_simple_response(prompt):
-    """Get a simple response using Ollama API directly."""
+    """Stream a simple response using Ollama API directly."""
     try:
-        import requests
-        
-        # Simple Ollama API call
-        response = requests.post(
+        # Simple Ollama API call, streamed token by token
+        with ollama_session().post(
             "http://localhost:11434/api/generate",
             json={
                 "model": "llama3",
                 "prompt": prompt,
-                "stream": False
+                "stream": True,
+                "keep_alive": OLLAMA_KEEP_ALIVE
             },
-            timeout=30
-        )
-        
-        if response.status_code == 200:
-            return response.json().get("response", "Sorry, I couldn't generate a response.")
-        else:
-            return f"Error: Ollama returned status {response.status_code}"
+            stream=True,
+            timeout=OLLAMA_STREAM_TIMEOUT
+        ) as response:
+            if response.status_code != 200:
+                yield f"Error: Ollama returned status {response.status_code}"
+                return
+            
+            for line in response.iter_lines(chunk_size=None):
+                if not line:
+                    continue
+                chunk = json_loads(line)
+                yield chunk.get("response", "")
+                if chunk.get("done"):
+                    break
             
     except requests.exceptions.ConnectionError:
-        return "❌ **Ollama not connected.** Please start Ollama with: `ollama serve`"
+        yield "❌ **Ollama not connected.** Please start Ollama with: `ollama serve`"
     except requests.exceptions.Timeout:
-        return "⏰ **Request timed out.** The model might be loading. Please try again."
+        yield "⏰ **Request timed out.** The model might be loading. Please try again."
     except Exception as e:
-        return f"❌ **Error:** {str(e)}"
+        yield f"❌ **Error:** {str(e)}"
 
 def main():
     """Main app function."""
@@ -4,11 +4,22 @@ Enhanced Streamlit app with voice capabilities for WhisperMind.
 
 import streamlit as st
 import requests
+from requests.adapters import HTTPAdapter
 import json
+import logging
 import os
+import queue
 import tempfile
 import threading
 import time
+import hashlib
+import io
+import math
+import re
+import struct
+import subprocess
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
 
 # Voice processing imports with graceful fallback
@@ -26,24 +37,57 @@ except ImportError as e:
     VOICE_AVAILABLE = False
     MICROPHONE_AVAILABLE = False
 
+# SIMD BLAKE3 for hashing recordings; hashlib's blake2b otherwise
+try:
+    import blake3
+except ImportError:
+    blake3 = None
+
+# In-memory audio decoding, so recordings reach Whisper without ffmpeg
+try:
+    import numpy as np
+    import soundfile as sf
+    from scipy.signal import resample_poly
+    IN_MEMORY_DECODE_AVAILABLE = True
+except ImportError:
+    IN_MEMORY_DECODE_AVAILABLE = False
+
+# CTranslate2 int8 Whisper backend, used instead of openai-whisper when installed
+try:
+    from faster_whisper import WhisperModel
+    FASTER_WHISPER_AVAILABLE = True
+except ImportError:
+    FASTER_WHISPER_AVAILABLE = False
+
+# Voice diagnostics; debug output is off unless the level is lowered
+logger = logging.getLogger("whispermind.voice")
+
 st.set_page_config(
     page_title="WhisperMind - Local AI Chatbot with Voice",
     page_icon="🧠",
     layout="wide",
 )
 
+# One keep-alive session for every call to the local Ollama server; the
+# pool is sized for concurrent Streamlit sessions sharing it
+OLLAMA_SESSION = requests.Session()
+OLLAMA_SESSION.mount("http://", HTTPAdapter(pool_connections=4, pool_maxsize=16, pool_block=False))
+OLLAMA_SESSION.headers["Connection"] = "keep-alive"
+
+@st.cache_data(ttl=30, show_spinner=False)
 def check_ollama():
     """Check if Ollama is available."""
     try:
-        response = requests.get("http://localhost:11434/api/tags", timeout=5)
+        response = OLLAMA_SESSION.get("http://localhost:11434/api/tags", timeout=5)
         return response.status_code == 200
     except:
         return False
 
+@st.cache_data(ttl=30, show_spinner=False)
 def get_ollama_models():
     """Get available Ollama models."""
     try:
-        response = requests.get("http://localhost:11434/api/tags", timeout=5)
+        response = OLLAMA_SESSION.get("http://localhost:11434/api/tags", timeout=5)
         if response.status_code == 200:
             data = response.json()
             return [model["name"] for model in data.get("models", [])]
@@ -51,23 +95,269 @@ def get_ollama_models():
         pass
     return []
 
+@st.cache_data(ttl=600, show_spinner=False)
+def _ffmpeg_available():
+    """Check for ffmpeg without forking it on every rerun."""
+    try:
+        subprocess.run(['ffmpeg', '-version'], capture_output=True, check=True, timeout=2)
+        return True
+    except Exception:
+        return False
+
+STYLESHEET = Path(__file__).parent / "static" / "whispermind.css"
+
+@st.cache_resource
+def load_css():
+    """Read the app stylesheet once per process."""
+    return STYLESHEET.read_text(encoding="utf-8")
+
+# Sessions share one Whisper model; concurrent decodes only thrash the CPU
+# caches, so transcriptions run one at a time
+_WHISPER_SEM = threading.BoundedSemaphore(1)
+
+# openai-whisper decodes a full 30 s window whatever the clip length, so
+# short clips from concurrent sessions are gathered for up to 50 ms and
+# decoded in one forward pass
+BATCH_WINDOW_S = 0.05
+BATCH_MAX_SIZE = 8
+BATCH_MAX_SAMPLES = 30 * 16000
+_BATCH_QUEUE = queue.Queue()
+
+# transcribe()'s default quality checks; batched (temperature 0) results that
+# fail them are re-run through transcribe() and its temperature fallback
+COMPRESSION_RATIO_THRESHOLD = 2.4
+LOGPROB_THRESHOLD = -1.0
+NO_SPEECH_THRESHOLD = 0.6
+_batch_thread = None
+_batch_thread_lock = threading.Lock()
+
+class _BatchRequest:
+    """One clip waiting on the batch worker."""
+    __slots__ = ("audio", "done", "text", "error")
+    
+    def __init__(self, audio):
+        self.audio = audio
+        self.done = threading.Event()
+        self.text = None
+        self.error = None
+
+@st.cache_resource
+def load_whisper_model():
+    """Load the local Whisper model once per process: fp16 on CUDA, int8 on CPU
+    (faster-whisper when available)."""
+    if FASTER_WHISPER_AVAILABLE:
+        import ctranslate2
+        if ctranslate2.get_cuda_device_count() > 0:
+            return WhisperModel("base", device="cuda", compute_type="float16")
+        return WhisperModel("base", device="cpu", compute_type="int8", cpu_threads=os.cpu_count() or 0)
+    
+    import whisper
+    import torch
+    device = "cuda" if torch.cuda.is_available() else "cpu"
+    model = whisper.load_model("base", device=device)
+    if device == "cpu":
+        # int8 Linear kernels: faster CPU decoding, ~1/3 smaller model
+        try:
+            _use_plain_linears(model)
+            model = torch.quantization.quantize_dynamic(
+                model, {torch.nn.Linear}, dtype=torch.qint8
+            )
+            quantized = sum(
+                isinstance(module, torch.ao.nn.quantized.dynamic.Linear)
+                for module in model.modules()
+            )
+            if not quantized:
+                raise RuntimeError("no Linear layers were converted")
+            print(f"Whisper running int8 on CPU ({quantized} quantized Linear layers)")
+        except Exception as e:
+            print(f"Whisper int8 quantization unavailable, using fp32: {e}")
+    return model
+
+def _use_plain_linears(module):
+    """Swap openai-whisper's Linear subclass for torch.nn.Linear in place.
+    quantize_dynamic matches module types exactly, so it skips the subclass."""
+    import torch
+    for name, child in module.named_children():
+        if isinstance(child, torch.nn.Linear) and type(child) is not torch.nn.Linear:
+            linear = torch.nn.Linear(child.in_features, child.out_features, bias=child.bias is not None)
+            linear.weight = child.weight
+            linear.bias = child.bias
+            setattr(module, name, linear)
+        else:
+            _use_plain_linears(child)
+
+@st.cache_resource
+def warm_whisper(_model):
+    """Transcribe one second of silence once per process so the first real
+    utterance doesn't pay for lazy kernel and buffer initialization."""
+    def _warm():
+        try:
+            transcribe_with_whisper(_model, np.zeros(16000, dtype=np.float32))
+        except Exception as e:
+            print(f"Whisper warm-up skipped: {e}")
+    
+    # Background thread so the first page render isn't held up
+    thread = threading.Thread(target=_warm, name="whisper-warm", daemon=True)
+    thread.start()
+    return thread
+
+def audio_fingerprint(audio_bytes):
+    """Fast non-cryptographic identity for a recording (dedup and cache keys)."""
+    if blake3 is not None:
+        return blake3.blake3(audio_bytes).hexdigest(length=16)
+    return hashlib.blake2b(audio_bytes, digest_size=16).hexdigest()
+
+def decode_audio(audio_bytes, target_rate=16000):
+    """Decode WAV/FLAC/OGG bytes to 16 kHz mono float32, or None if unsupported."""
+    if not IN_MEMORY_DECODE_AVAILABLE:
+        return None
+    try:
+        data, sample_rate = sf.read(io.BytesIO(audio_bytes), dtype='float32', always_2d=False)
+    except Exception:
+        return None
+    
+    if data.ndim > 1:
+        data = data.mean(axis=1)
+    if sample_rate != target_rate:
+        divisor = math.gcd(sample_rate, target_rate)
+        data = resample_poly(data, target_rate // divisor, sample_rate // divisor)
+    return np.ascontiguousarray(data, dtype=np.float32)
+
+def _collect_batch():
+    """Block for one request, then take whatever else arrives within the window."""
+    batch = [_BATCH_QUEUE.get()]
+    deadline = time.monotonic() + BATCH_WINDOW_S
+    while len(batch) < BATCH_MAX_SIZE:
+        remaining = deadline - time.monotonic()
+        if remaining <= 0:
+            break
+        try:
+            batch.append(_BATCH_QUEUE.get(timeout=remaining))
+        except queue.Empty:
+            break
+    return batch
+
+def _batch_text(model, audio, result, fp16):
+    """Text for one batched result, held to transcribe()'s checks: likely
+    silence is empty, repetitive or low-confidence decodes are redone by
+    transcribe() with its temperature fallback."""
+    if result.no_speech_prob > NO_SPEECH_THRESHOLD and result.avg_logprob < LOGPROB_THRESHOLD:
+        return ""
+    if result.compression_ratio > COMPRESSION_RATIO_THRESHOLD or result.avg_logprob < LOGPROB_THRESHOLD:
+        return model.transcribe(audio, fp16=fp16)["text"].strip()
+    return result.text.strip()
+
+def _batch_loop(model):
+    """Decode queued clips together: one mel stack, one whisper.decode call."""
+    import whisper
+    import torch
+    
+    options = whisper.DecodingOptions(fp16=model.device.type == "cuda")
+    while True:
+        batch = _collect_batch()
+        try:
+            with _WHISPER_SEM:
+                # Every clip is padded to the same 30 s window
+                mels = torch.stack([
+                    whisper.log_mel_spectrogram(whisper.pad_or_trim(request.audio))
+                    for request in batch
+                ]).to(model.device)
+                results = whisper.decode(model, mels, options)
+                for request, result in zip(batch, results):
+                    request.text = _batch_text(model, request.audio, result, options.fp16)
+        except Exception as e:
+            for request in batch:
+                request.error = e
+        finally:
+            for request in batch:
+                request.done.set()
+
+def start_batch_worker(model):
+    """Start the single batch-decoding thread once per process.
+    
+    Plain module state rather than st.cache_resource: this is called from
+    the transcription worker, which has no Streamlit script context.
+    """
+    global _batch_thread
+    with _batch_thread_lock:
+        if _batch_thread is None:
+            _batch_thread = threading.Thread(target=_batch_loop, args=(model,), name="whisper-batch", daemon=True)
+            _batch_thread.start()
+    return _batch_thread
+
+def transcribe_with_whisper(model, audio):
+    """Transcribe a file path or 16 kHz float32 array with either Whisper backend."""
+    batchable = (
+        not FASTER_WHISPER_AVAILABLE
+        and IN_MEMORY_DECODE_AVAILABLE
+        and isinstance(audio, np.ndarray)
+        and len(audio) <= BATCH_MAX_SAMPLES
+    )
+    if batchable:
+        start_batch_worker(model)
+        request = _BatchRequest(audio)
+        _BATCH_QUEUE.put(request)
+        request.done.wait()
+        if request.error is not None:
+            raise request.error
+        return request.text
+    
+    with _WHISPER_SEM:
+        if FASTER_WHISPER_AVAILABLE:
+            # VAD skips silence entirely; greedy decoding halves decode work
+            segments, _ = model.transcribe(audio, vad_filter=True, beam_size=1)
+            return "".join(segment.text for segment in segments).strip()
+        return model.transcribe(audio, fp16=model.device.type == "cuda")["text"].strip()
+
 def chat_with_ollama(message, model="llama3"):
-    """Send message to Ollama and get response."""
+    """Send message to Ollama and yield response tokens as they stream in."""
     try:
         url = "http://localhost:11434/api/generate"
         data = {
             "model": model,
             "prompt": message,
-            "stream": False
+            "stream": True
         }
         
-        response = requests.post(url, json=data, timeout=30)
-        if response.status_code == 200:
-            return response.json()["response"]
-        else:
-            return f"Error: {response.status_code} - {response.text}"
+        with OLLAMA_SESSION.post(url, json=data, stream=True, timeout=30) as response:
+            if response.status_code != 200:
+                yield f"Error: {response.status_code} - {response.text}"
+                return
+            
+            for line in response.iter_lines():
+                if not line:
+                    continue
+                chunk = json.loads(line)
+                yield chunk.get("response", "")
+                if chunk.get("done"):
+                    break
     except Exception as e:
-        return f"Error connecting to Ollama: {str(e)}"
+        yield f"Error connecting to Ollama: {str(e)}"
+
+# Whitespace following sentence-ending punctuation
+SENTENCE_END = re.compile(r'(?<=[.!?])\s+')
+
+def speak_sentences(tokens, voice_processor):
+    """Pass tokens through unchanged, queueing each sentence for speech as soon
+    as it is complete so TTS overlaps with generation."""
+    buffer = ""
+    for token in tokens:
+        yield token
+        buffer += token
+        *sentences, buffer = SENTENCE_END.split(buffer)
+        for sentence in sentences:
+            voice_processor.queue_speech(sentence)
+    if buffer.strip():
+        voice_processor.queue_speech(buffer)
+
+# Recent transcriptions keyed on the hash of the recording, so replayed
+# audio skips Whisper and the temp file entirely
+_TRANSCRIBE_CACHE = OrderedDict()
+_TRANSCRIBE_CACHE_MAX = 128
+_transcribe_cache_lock = threading.Lock()
+
+# Substrings of preferred (male) system voice names, matched once at startup
+PREFERRED_VOICE_NAMES = frozenset({'alex', 'daniel', 'thomas', 'male'})
 
 class VoiceProcessor:
     """Voice input/output processor with file upload fallback."""
@@ -75,14 +365,24 @@ class VoiceProcessor:
     def __init__(self):
         self.recognizer = None
         self.tts_engine = None
-        self.is_speaking = False
-        self._speaking_lock = threading.Lock()
+        self._voice_id = None
+        # Speech runs on one long-lived consumer thread that owns its own
+        # engine; the queue serializes utterances without a lock
+        self._tts_engine = None
+        self._tts_q = queue.Queue()
+        self._tts_thread = threading.Thread(target=self._tts_loop, name="tts", daemon=True)
+        self._tts_thread.start()
+        # Whisper decodes run here so reruns don't block on transcription
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="whisper")
+        self.whisper_model = None
         
         if VOICE_AVAILABLE:
             # Initialize local Whisper model silently in background
             if not hasattr(st.session_state, 'whisper_model'):
-                import whisper
-                st.session_state.whisper_model = whisper.load_model("base")
+                st.session_state.whisper_model = load_whisper_model()
+                warm_whisper(st.session_state.whisper_model)
+            # Keep a reference: the worker thread can't read session_state
+            self.whisper_model = st.session_state.whisper_model
             
             try:
                 self.recognizer = sr.Recognizer()
@@ -98,10 +398,12 @@ class VoiceProcessor:
                     for voice in voices:
                         # Check for male voices or specific good voices on macOS
                         voice_name = voice.name.lower()
-                        if any(name in voice_name for name in ['alex', 'daniel', 'thomas', 'male']):
+                        if any(name in voice_name for name in PREFERRED_VOICE_NAMES):
                             male_voice = voice
                             break
                     
+                    self._voice_id = male_voice.id if male_voice else voices[0].id
+                    
                     # Use male voice if found, otherwise use default
                     if male_voice:
                         self.tts_engine.setProperty('voice', male_voice.id)
@@ -118,27 +420,19 @@ class VoiceProcessor:
                 st.error(f"Voice initialization error: {e}")
                 self.recognizer = None
     
-    def convert_audio_for_recognition(self, audio_data):
-        """Convert audio data to a format compatible with speech recognition, avoiding FLAC issues."""
-        try:
-            # Handle both raw bytes and UploadedFile objects
-            if hasattr(audio_data, 'getvalue'):
-                audio_bytes = audio_data.getvalue()
-            else:
-                audio_bytes = audio_data
-            
-            # Create temporary WAV file
-            with tempfile.NamedTemporaryFile(delete=False, suffix='.wav') as tmp_file:
-                tmp_file.write(audio_bytes)
-                tmp_path = tmp_file.name
-            
-            return tmp_path
-        except Exception as e:
-            raise Exception(f"Audio conversion error: {e}")
+    def submit_transcription(self, audio_data):
+        """Transcribe on the background worker.
+        
+        Returns:
+            Future resolving to the (text, error) pair of listen_for_speech_browser
+        """
+        if hasattr(audio_data, 'getvalue'):
+            audio_data = audio_data.getvalue()
+        return self._executor.submit(self.listen_for_speech_browser, audio_data)
 
     def listen_for_speech_browser(self, audio_data):
         """Process audio using completely local Whisper model - 100% offline, no internet."""
-        print("🔍 Whisper: Starting audio processing...")
+        logger.debug("Whisper: starting audio processing")
         try:
             # Handle both raw bytes and UploadedFile objects
             if hasattr(audio_data, 'getvalue'):
@@ -146,37 +440,51 @@ class VoiceProcessor:
             else:
                 audio_bytes = audio_data
             
-            print(f"📊 Audio size: {len(audio_bytes)} bytes")
+            logger.debug("Audio size: %d bytes", len(audio_bytes))
             
             # Basic audio validation
             if len(audio_bytes) < 1000:
-                print("⚠️ Audio too short")
+                logger.debug("Audio too short")
                 return None, "Audio too short - please record a longer message"
             
-            # Create temporary file for local Whisper processing
-            with tempfile.NamedTemporaryFile(delete=False, suffix='.wav') as tmp_file:
-                tmp_file.write(audio_bytes)
-                tmp_path = tmp_file.name
+            key = audio_fingerprint(audio_bytes)
+            with _transcribe_cache_lock:
+                if key in _TRANSCRIBE_CACHE:
+                    _TRANSCRIBE_CACHE.move_to_end(key)
+                    logger.debug("Using cached transcription")
+                    return _TRANSCRIBE_CACHE[key], None
+            
+            # Decode in memory and hand Whisper the samples; only formats
+            # soundfile can't read go through a temporary file and ffmpeg
+            tmp_path = None
+            audio_input = decode_audio(audio_bytes)
+            if audio_input is None:
+                with tempfile.NamedTemporaryFile(delete=False, suffix='.wav') as tmp_file:
+                    tmp_file.write(audio_bytes)
+                    tmp_path = tmp_file.name
+                audio_input = tmp_path
             
             try:
                 # Use local Whisper model - completely offline!
-                print("🧠 Checking Whisper model availability...")
-                if hasattr(st.session_state, 'whisper_model'):
+                if self.whisper_model is not None:
                     try:
-                        print("🎯 Running Whisper transcription...")
+                        logger.debug("Running Whisper transcription")
                         # Try direct Whisper transcription
-                        result = st.session_state.whisper_model.transcribe(tmp_path)
-                        transcribed_text = result["text"].strip()
-                        print(f"📝 Raw transcription: '{transcribed_text}'")
+                        transcribed_text = transcribe_with_whisper(self.whisper_model, audio_input)
+                        logger.debug("Raw transcription: %r", transcribed_text)
                         
                         if transcribed_text:
-                            print(f"✅ Transcription successful!")
+                            logger.debug("Transcription successful")
+                            with _transcribe_cache_lock:
+                                _TRANSCRIBE_CACHE[key] = transcribed_text
+                                if len(_TRANSCRIBE_CACHE) > _TRANSCRIBE_CACHE_MAX:
+                                    _TRANSCRIBE_CACHE.popitem(last=False)
                             return transcribed_text, None
                         else:
-                            print("❌ Empty transcription result")
+                            logger.debug("Empty transcription result")
                             return None, "Could not understand the audio - please speak more clearly"
                     except Exception as whisper_error:
-                        print(f"❌ Whisper error: {str(whisper_error)}")
+                        logger.warning("Whisper error: %s", whisper_error)
                         # If ffmpeg is missing, provide helpful message
                         error_msg = str(whisper_error)
                         if "ffmpeg" in error_msg.lower() or "no such file" in error_msg.lower():
@@ -184,31 +492,30 @@ class VoiceProcessor:
                         else:
                             return None, f"Whisper processing error: {str(whisper_error)[:100]}"
                 else:
-                    print("❌ Whisper model not found in session state")
+                    logger.warning("Whisper model not loaded")
                     return None, "Local Whisper model not loaded. Please refresh the page."
                         
             finally:
-                try:
-                    os.unlink(tmp_path)
-                except:
-                    pass
+                if tmp_path:
+                    try:
+                        os.unlink(tmp_path)
+                    except:
+                        pass
                     
         except Exception as e:
             return None, f"Audio processing error: {str(e)[:100]}"
 
     
-    def _manual_audio_processing(self, audio_file_path):
+    def _manual_audio_processing(self, audio_bytes):
         """Manual audio processing when standard methods fail."""
         try:
-            # Read the raw audio file and attempt basic recognition
-            import wave
-            import struct
+            # Duration straight from the canonical 44-byte WAV header; no
+            # temp file or wave module needed
+            (riff, _, wave_id, _, _, _, channels, sample_rate,
+             byte_rate, _, _) = struct.unpack_from("<4sI4s4sIHHIIHH", audio_bytes, 0)
             
-            # Try to open as WAV and read basic info
-            with wave.open(audio_file_path, 'rb') as wav_file:
-                frames = wav_file.getnframes()
-                sample_rate = wav_file.getframerate()
-                duration = frames / sample_rate
+            if riff == b'RIFF' and wave_id == b'WAVE' and byte_rate:
+                duration = (len(audio_bytes) - 44) / byte_rate
                 
                 if duration < 0.1:
                     return None, "Audio too short - please record a longer message"
@@ -239,13 +546,18 @@ class VoiceProcessor:
         except Exception as e:
             return None, f"System compatibility issue. Please use text input instead."
     
-    def transcribe_audio_file(self, audio_file_path):
-        """Transcribe uploaded audio file."""
+    def transcribe_audio_file(self, audio_data):
+        """Transcribe an uploaded recording (bytes or file-like) without a temp file."""
         if not self.recognizer:
             return None, "Speech recognition not available"
         
         try:
-            with sr.AudioFile(audio_file_path) as source:
+            if hasattr(audio_data, 'getvalue'):
+                audio_data = audio_data.getvalue()
+            if isinstance(audio_data, (bytes, bytearray, memoryview)):
+                audio_data = io.BytesIO(audio_data)
+            
+            with sr.AudioFile(audio_data) as source:
                 audio = self.recognizer.record(source)
             
             try:
@@ -259,79 +571,74 @@ class VoiceProcessor:
         except Exception as e:
             return None, f"Error processing audio file: {e}"
     
+    @property
+    def is_speaking(self):
+        """True while utterances are queued or being spoken."""
+        return self._tts_q.unfinished_tasks > 0
+    
     def speak_text(self, text):
-        """Convert text to speech with thread safety."""
+        """Queue text for the TTS thread; it is spoken after anything already queued."""
         if not self.tts_engine or not text.strip():
             return False
         
-        # Prevent multiple simultaneous speech operations
-        if self.is_speaking:
-            return False
-            
+        self._tts_q.put(text)
+        return True
+    
+    def queue_speech(self, text):
+        """Queue one sentence of a streaming reply."""
+        return self.speak_text(text)
+    
+    def _tts_loop(self):
+        """Speak queued text forever on the TTS thread."""
+        while True:
+            text = self._tts_q.get()
+            try:
+                self._speak_safely(text)
+            finally:
+                self._tts_q.task_done()
+    
+    def _speak_safely(self, text):
+        """Speak text on the TTS thread."""
         try:
-            with self._speaking_lock:
-                if self.is_speaking:  # Double-check after acquiring lock
-                    return False
-                
-                self.is_speaking = True
-                
-                def speak_safely():
-                    try:
-                        # Use a fresh engine instance to avoid run loop conflicts
-                        temp_engine = pyttsx3.init()
-                        
-                        # Copy settings from main engine
-                        voices = temp_engine.getProperty('voices')
-                        if voices:
-                            for voice in voices:
-                                voice_name = voice.name.lower()
-                                if any(name in voice_name for name in ['alex', 'daniel', 'thomas', 'male']):
-                                    temp_engine.setProperty('voice', voice.id)
-                                    break
-                        
-                        temp_engine.setProperty('rate', 175)
-                        temp_engine.setProperty('volume', 1.0)
-                        
-                        # Speak the text
-                        temp_engine.say(text)
-                        temp_engine.runAndWait()
-                        
-                        # Clean up
-                        temp_engine.stop()
-                        del temp_engine
-                        
-                    except Exception as e:
-                        print(f"TTS Error: {e}")
-                    finally:
-                        self.is_speaking = False
-                
-                # Run in background thread
-                thread = threading.Thread(target=speak_safely, daemon=True)
-                thread.start()
-                return True
-                
+            # Separate from the main engine to avoid run loop conflicts;
+            # created and configured once on the TTS thread, then reused
+            engine = self._tts_engine
+            if engine is None:
+                engine = pyttsx3.init()
+                if self._voice_id:
+                    engine.setProperty('voice', self._voice_id)
+                engine.setProperty('rate', 175)
+                engine.setProperty('volume', 1.0)
+                self._tts_engine = engine
+            
+            # Speak the text
+            engine.say(text)
+            engine.runAndWait()
+            
         except Exception as e:
-            self.is_speaking = False
-            print(f"Text-to-speech error: {e}")
-            return False
+            print(f"TTS Error: {e}")
     
     def speak(self, text):
         """Alias for speak_text method for compatibility."""
         return self.speak_text(text)
     
     def stop_speaking(self):
-        """Stop any ongoing speech synthesis."""
+        """Stop any ongoing speech synthesis and drop queued text."""
         try:
-            with self._speaking_lock:
-                if self.is_speaking:
-                    self.is_speaking = False
-                    # Try to stop the main engine if it exists
-                    if self.tts_engine:
-                        try:
-                            self.tts_engine.stop()
-                        except:
-                            pass  # Ignore stop errors
-                return True
+            # Drain pending utterances, then interrupt the current one
+            while True:
+                try:
+                    self._tts_q.get_nowait()
+                except queue.Empty:
+                    break
+                self._tts_q.task_done()
+            
+            if self._tts_engine:
+                try:
+                    self._tts_engine.stop()
+                except:
+                    pass  # Ignore stop errors
+            return True
         except Exception as e:
             print(f"Error stopping speech: {e}")
             return False
@@ -339,142 +646,8 @@ class VoiceProcessor:
 def main():
     st.title("🧠 WhisperMind - Local AI Chatbot with Voice")
     
-    # Enhanced custom CSS for modern UI
-    st.markdown("""
-    <style>
-    /* Main app styling */
-    .stApp {
-        background: #ffffff;
-    }
-    
-    /* Header styling */
-    .main-header {
-        text-align: center;
-        padding: 20px;
-        background: linear-gradient(135deg, #667eea 0%, #764ba2 100%);
-        border-radius: 15px;
-        color: white;
-        margin-bottom: 20px;
-        box-shadow: 0 4px 15px rgba(0,0,0,0.1);
-    }
-    
-    /* Input styling */
-    .stTextInput > div > div > input {
-        border: 2px solid #e1e8ed !important;
-        border-radius: 25px !important;
-        padding: 12px 20px !important;
-        font-size: 16px !important;
-        transition: all 0.3s ease !important;
-        background: #fafbfc !important;
-    }
-    
-    .stTextInput > div > div > input:focus {
-        border-color: #667eea !important;
-        box-shadow: 0 0 0 3px rgba(102, 126, 234, 0.1) !important;
-        background: white !important;
-    }
-    
-    /* Modern text input styling */
-    .stTextInput > div > div > input {
-        border: none !important;
-        background: transparent !important;
-        font-size: 16px !important;
-        padding: 15px 0 !important;
-        height: auto !important;
-        line-height: 1.5 !important;
-    }
-    
-    .stTextInput > div > div > input:focus {
-        outline: none !important;
-        box-shadow: none !important;
-    }
-    
-    /* Clean button styling - uniform for all buttons */
-    .stButton > button {
-        border-radius: 50% !important;
-        width: 50px !important;
-        height: 50px !important;
-        border: none !important;
-        font-size: 18px !important;
-        transition: all 0.3s ease !important;
-        box-shadow: 0 3px 15px rgba(0,0,0,0.1) !important;
-        display: flex !important;
-        align-items: center !important;
-        justify-content: center !important;
-        background: #f8fafc !important;
-        color: #64748b !important;
-    }
-    
-    .stButton > button:hover {
-        transform: translateY(-2px) !important;
-        box-shadow: 0 6px 25px rgba(0,0,0,0.15) !important;
-        background: #e2e8f0 !important;
-    }
-    
-    /* Primary send button */
-    .stButton > button[kind="primary"] {
-        background: linear-gradient(135deg, #667eea 0%, #764ba2 100%) !important;
-        color: white !important;
-    }
-    
-    .stButton > button[kind="primary"]:hover {
-        background: linear-gradient(135deg, #5a6fd8 0%, #6a4190 100%) !important;
-    }
-    
-    /* Primary button (Send) */
-    .stButton > button[kind="primary"] {
-        background: linear-gradient(135deg, #667eea 0%, #764ba2 100%) !important;
-        color: white !important;
-    }
-    
-    /* Chat messages styling */
-    .stChatMessage {
-        background: white !important;
-        border-radius: 15px !important;
-        margin: 10px 0 !important;
-        box-shadow: 0 2px 10px rgba(0,0,0,0.05) !important;
-        border: 1px solid #f0f2f6 !important;
-    }
-    
-    /* Success/error messages */
-    .stSuccess, .stError, .stInfo, .stWarning {
-        border-radius: 10px !important;
-        border: none !important;
-        box-shadow: 0 2px 10px rgba(0,0,0,0.1) !important;
-    }
-    
-    /* Voice status */
-    .voice-status {
-        font-size: 12px;
-        color: #8899a6;
-        text-align: center;
-        margin-top: 10px;
-        font-style: italic;
-    }
-    
-    /* Voice button styling - exact same size as other buttons */
-    .stAudio button {
-        background: linear-gradient(135deg, #10b981 0%, #059669 100%) !important;
-        color: white !important;
-        border: none !important;
-        border-radius: 50% !important;
-        width: 50px !important;
-        height: 50px !important;
-        font-size: 18px !important;
-        transition: all 0.3s ease !important;
-        display: flex !important;
-        align-items: center !important;
-        justify-content: center !important;
-        box-shadow: 0 3px 15px rgba(16, 185, 129, 0.3) !important;
-    }
-    
-    .stAudio button:hover {
-        transform: translateY(-2px) !important;
-        box-shadow: 0 6px 25px rgba(16, 185, 129, 0.4) !important;
-        background: linear-gradient(135deg, #059669 0%, #047857 100%) !important;
-    }
-    </style>
-    """, unsafe_allow_html=True)
+    # Enhanced custom CSS for modern UI, read once per process
+    st.markdown(f"<style>{load_css()}</style>", unsafe_allow_html=True)
     
     # Check Ollama status
     with st.sidebar:
@@ -507,13 +680,10 @@ def main():
             st.info("🔒 **Completely Local**: Using local Whisper model - no internet required, full privacy!")
             
             # Check if ffmpeg is available
-            import subprocess
-            ffmpeg_available = False
-            try:
-                subprocess.run(['ffmpeg', '-version'], capture_output=True, check=True)
-                ffmpeg_available = True
+            ffmpeg_available = _ffmpeg_available()
+            if ffmpeg_available:
                 st.success("✅ ffmpeg installed - voice recognition ready!")
-            except:
+            else:
                 st.warning("⚠️ ffmpeg not found - voice input needs setup")
                 with st.expander("🔧 Click to see ffmpeg installation instructions"):
                     st.markdown("""
@@ -546,9 +716,10 @@ def main():
         st.divider()
 
     # Initialize voice processor silently after sidebar
-    # Force re-initialization to ensure latest TTS fixes are applied
-    if 'voice_processor' not in st.session_state or not hasattr(st.session_state.voice_processor, '_speaking_lock'):
-        st.session_state.voice_processor = VoiceProcessor() if VOICE_AVAILABLE else None    # Display chat messages cleanly
+    if 'voice_processor' not in st.session_state:
+        st.session_state.voice_processor = VoiceProcessor() if VOICE_AVAILABLE else None
+    
+    # Display chat messages cleanly
     if "messages" not in st.session_state:
         st.session_state.messages = []
     
@@ -557,99 +728,6 @@ def main():
         with st.chat_message(message["role"]):
             st.markdown(message["content"])
     
-    # Clean, modern interface styling with perfect button alignment
-    st.markdown("""
-    <style>
-    .main-chat-container {
-        background: linear-gradient(135deg, #f8fafc 0%, #e2e8f0 100%);
-        padding: 25px;
-        border-radius: 20px;
-        margin: 20px 0;
-        box-shadow: 0 8px 32px rgba(0,0,0,0.1);
-        border: 1px solid #e2e8f0;
-    }
-    .input-row {
-        display: flex;
-        align-items: center;
-        gap: 15px;
-        background: white;
-        padding: 12px 20px;
-        border-radius: 50px;
-        box-shadow: 0 4px 20px rgba(0,0,0,0.08);
-        border: 2px solid #e2e8f0;
-        transition: all 0.3s ease;
-    }
-    .input-row:focus-within {
-        border-color: #667eea;
-        box-shadow: 0 4px 25px rgba(102, 126, 234, 0.15);
-    }
-    /* Ensure buttons are perfectly aligned with same height */
-    .stButton, .stAudio {
-        display: flex;
-        align-items: center;
-        justify-content: center;
-        height: 50px;
-    }
-    .stButton > button {
-        height: 50px !important;
-        min-height: 50px !important;
-        width: 100% !important;
-        border-radius: 25px !important;
-        border: 2px solid #e2e8f0 !important;
-        background: linear-gradient(135deg, #667eea 0%, #764ba2 100%) !important;
-        color: white !important;
-        font-size: 18px !important;
-        font-weight: 600 !important;
-        transition: all 0.3s ease !important;
-        display: flex !important;
-        align-items: center !important;
-        justify-content: center !important;
-    }
-    .stButton > button:hover {
-        transform: translateY(-2px) !important;
-        box-shadow: 0 6px 20px rgba(102, 126, 234, 0.3) !important;
-    }
-    .stAudio > div {
-        height: 50px !important;
-        display: flex !important;
-        align-items: center !important;
-        justify-content: center !important;
-    }
-    .status-area {
-        margin-top: 15px;
-        min-height: 20px;
-        display: flex;
-        align-items: center;
-        justify-content: center;
-    }
-    .status-message {
-        padding: 8px 16px;
-        border-radius: 20px;
-        font-size: 14px;
-        font-weight: 500;
-        text-align: center;
-        transition: all 0.3s ease;
-    }
-    .status-processing {
-        background: linear-gradient(135deg, #3b82f6, #1d4ed8);
-        color: white;
-        animation: pulse 2s infinite;
-    }
-    .status-success {
-        background: linear-gradient(135deg, #10b981, #059669);
-        color: white;
-    }
-    .status-error {
-        background: linear-gradient(135deg, #ef4444, #dc2626);
-        color: white;
-    }
-    @keyframes pulse {
-        0%, 100% { opacity: 1; }
-        50% { opacity: 0.7; }
-    }
-    </style>
-    """, unsafe_allow_html=True)
-    
     # Initialize session state for voice transcription
     if 'voice_transcription' not in st.session_state:
         st.session_state.voice_transcription = ""
@@ -699,60 +777,60 @@ def main():
                 audio_bytes = st.audio_input("Voice", label_visibility="collapsed", key="voice_recorder")
                 
                 if audio_bytes and not st.session_state.get('processing_voice', False):
-                    print("🎤 Audio detected! Starting processing...")
-                    import hashlib
+                    logger.debug("Audio detected, starting processing")
                     try:
                         audio_data = audio_bytes.getvalue() if hasattr(audio_bytes, 'getvalue') else audio_bytes
-                        audio_hash = hashlib.md5(audio_data).hexdigest()
-                        print(f"🔍 Audio hash: {audio_hash[:8]}...")
+                        audio_hash = audio_fingerprint(audio_data)
+                        if logger.isEnabledFor(logging.DEBUG):
+                            logger.debug("Audio hash: %s", audio_hash[:8])
                         
                         if 'last_audio_hash' not in st.session_state or st.session_state.last_audio_hash != audio_hash:
-                            print("✅ New audio detected, processing...")
+                            logger.debug("New audio detected, submitting transcription")
                             st.session_state.last_audio_hash = audio_hash
                             st.session_state.processing_voice = True
+                            st.session_state.transcription_future = st.session_state.voice_processor.submit_transcription(audio_data)
                             
                             # Set processing status
                             st.session_state.status_message = "🎤 Processing audio..."
                             st.session_state.status_type = "processing"
                         else:
-                            print("🔄 Duplicate audio detected, skipping...")
-                            
-                            try:
-                                print("🎧 Starting Whisper transcription...")
-                                text, error = st.session_state.voice_processor.listen_for_speech_browser(audio_bytes)
-                                
-                                if text and text.strip():
-                                    print(f"✅ Transcription successful: '{text.strip()}'")
-                                    # Put transcription in text box and prompt user to send
-                                    st.session_state.processing_voice = False
-                                    
-                                    # Add to input value (will show in text box)
-                                    st.session_state.input_value = text.strip()
-                                    st.session_state.voice_transcription = ""
-                                    
-                                    # Show prompt to click Send button
-                                    st.session_state.status_message = f"✅ Ready to send: '{text.strip()[:40]}{'...' if len(text.strip()) > 40 else ''}' - Click 🚀 Send"
-                                    st.session_state.status_type = "success"
-                                    print("📝 Transcript written to text box - waiting for user to click Send")
-                                    st.rerun()
-                                else:
-                                    error_msg = error or "Could not understand"
-                                    print(f"❌ Transcription failed: {error_msg}")
-                                    st.session_state.status_message = f"❌ {error_msg[:40]}{'...' if len(error_msg) > 40 else ''}"
-                                    st.session_state.status_type = "error"
-                                    st.session_state.processing_voice = False
-                                    
-                            except Exception as audio_error:
-                                print(f"❌ Audio processing error: {str(audio_error)}")
-                                st.session_state.status_message = f"❌ Audio error: {str(audio_error)[:30]}..."
-                                st.session_state.status_type = "error"
-                                st.session_state.processing_voice = False
+                            logger.debug("Duplicate audio detected")
                                 
                     except Exception as e:
-                        print(f"❌ General voice processing error: {str(e)}")
+                        logger.warning("General voice processing error: %s", e)
                         st.session_state.processing_voice = False
                         st.session_state.status_message = f"❌ Error: {str(e)[:30]}..."
                         st.session_state.status_type = "error"
+                
+                # Pick up a finished transcription; until then the page stays live
+                future = st.session_state.get('transcription_future')
+                if future is not None and future.done():
+                    st.session_state.transcription_future = None
+                    st.session_state.processing_voice = False
+                    try:
+                        text, error = future.result()
+                        
+                        if text and text.strip():
+                            logger.debug("Transcription successful: %r", text)
+                            # Add to input value (will show in text box)
+                            st.session_state.input_value = text.strip()
+                            st.session_state.voice_transcription = ""
+                            
+                            # Show prompt to click Send button
+                            st.session_state.status_message = f"✅ Ready to send: '{text.strip()[:40]}{'...' if len(text.strip()) > 40 else ''}' - Click 🚀 Send"
+                            st.session_state.status_type = "success"
+                            logger.debug("Transcript written to text box, waiting for Send")
+                            st.rerun()
+                        else:
+                            error_msg = error or "Could not understand"
+                            logger.debug("Transcription failed: %s", error_msg)
+                            st.session_state.status_message = f"❌ {error_msg[:40]}{'...' if len(error_msg) > 40 else ''}"
+                            st.session_state.status_type = "error"
+                            
+                    except Exception as audio_error:
+                        logger.warning("Audio processing error: %s", audio_error)
+                        st.session_state.status_message = f"❌ Audio error: {str(audio_error)[:30]}..."
+                        st.session_state.status_type = "error"
             else:
                 # Empty space if voice not available
                 st.write("")
@@ -768,15 +846,12 @@ def main():
             with button_col2:
                 # Clear button
                 if st.button("🗑️", key="clear_btn", help="Clear"):
-                    st.session_state.messages = []
-                    st.session_state.voice_transcription = ""
-                    st.session_state.input_value = ""
-                    st.session_state.status_message = ""
-                    st.session_state.status_type = ""
-                    if 'last_audio_hash' in st.session_state:
-                        del st.session_state.last_audio_hash
-                    if 'voice_recorder' in st.session_state:
-                        del st.session_state.voice_recorder
+                    st.session_state.update(
+                        messages=[], voice_transcription="", input_value="",
+                        status_message="", status_type=""
+                    )
+                    st.session_state.pop('last_audio_hash', None)
+                    st.session_state.pop('voice_recorder', None)
                     st.rerun()
         
         # Dedicated status area below input
@@ -787,6 +862,12 @@ def main():
         st.markdown('</div>', unsafe_allow_html=True)
         
         st.markdown('</div>', unsafe_allow_html=True)
+    
+    # Poll the pending transcription with short reruns, after the page has rendered
+    pending = st.session_state.get('transcription_future')
+    if pending is not None and not pending.done() and not send_clicked:
+        time.sleep(0.2)
+        st.rerun()
     # Handle manual send button click
     if send_clicked and user_input.strip():
         print("🚀 Manual send button clicked!")
@@ -798,25 +879,12 @@ def main():
         st.session_state.status_message = "🤖 Processing your question..."
         st.session_state.status_type = "processing"
         
+        # Speaks the reply sentence by sentence while it streams
         process_user_input(input_text, selected_model, ollama_available, voice_output_enabled)
         print("✅ AI processing completed!")
         
-        # Auto-speak the response if voice output is enabled
-        if voice_output_enabled and st.session_state.messages:
-            latest_message = st.session_state.messages[-1]
-            if latest_message["role"] == "assistant":
-                st.session_state.status_message = "🔊 Speaking response..."
-                st.session_state.status_type = "processing"
-                if st.session_state.voice_processor:
-                    st.session_state.voice_processor.speak(latest_message["content"])
-                    st.session_state.status_message = "✅ Response spoken!"
-                    st.session_state.status_type = "success"
-        
         # Clear everything after a brief moment
-        st.session_state.input_value = ""
-        st.session_state.voice_transcription = ""
-        st.session_state.status_message = ""
-        st.session_state.status_type = ""
+        st.session_state.update(input_value="", voice_transcription="", status_message="", status_type="")
         st.rerun()
 
 def process_user_input(prompt, selected_model, ollama_available, voice_output_enabled):
@@ -830,15 +898,16 @@ def process_user_input(prompt, selected_model, ollama_available, voice_output_en
     # Generate response
     if ollama_available:
         with st.chat_message("assistant"):
-            with st.spinner("🤔 Thinking..."):
-                response = chat_with_ollama(prompt, selected_model)
-            st.markdown(response)
+            speak_reply = VOICE_AVAILABLE and voice_output_enabled and st.session_state.voice_processor
+            tokens = chat_with_ollama(prompt, selected_model)
+            if speak_reply:
+                # Auto-speak each sentence as soon as it has streamed in
+                tokens = speak_sentences(tokens, st.session_state.voice_processor)
+            response = st.write_stream(tokens)
             
-            # Auto-speak response if voice output is enabled
-            if VOICE_AVAILABLE and voice_output_enabled and st.session_state.voice_processor:
+            if speak_reply:
                 col_speak, col_stop = st.columns([3, 1])
                 with col_speak:
-                    st.session_state.voice_processor.speak_text(response)
                     st.caption("🔊 Speaking response...")
                 with col_stop:
                     if st.button("🔇 Stop", key=f"stop_speak_{len(st.session_state.messages)}", help="Stop Speaking"):
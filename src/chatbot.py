@@ -3,22 +3,31 @@ Main chatbot application combining Ollama LLM, RAG, and voice processing.
 """
 
 import os
+import re
+import time
+import hashlib
 import logging
+from collections import OrderedDict
 from typing import Optional, List, Dict, Any
 import asyncio
 from pathlib import Path
 
-from .rag.document_processor import DocumentProcessor
-from .rag.vector_store import VectorStore
-from .rag.retriever import DocumentRetriever
 from .core.ollama_client import OllamaClient
-from .voice.speech_to_text import SpeechToText
-from .voice.text_to_speech import TextToSpeech
 from .core.config import Config
 
+# RAG and voice modules pull in sentence-transformers, ChromaDB, Whisper and
+# PyTorch, so they are imported inside initialize() only when needed.
+
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+# Sentence boundary used to hand streamed LLM text to TTS in chunks
+_SENTENCE_END = re.compile(r'[.!?]\s|\n')
+
+# Retrieved context is reused for repeated questions until documents change
+RETRIEVAL_CACHE_SIZE = 256
+RETRIEVAL_CACHE_TTL = 300.0
+
 
 class WhisperMindChatbot:
     """
@@ -42,8 +51,17 @@ class WhisperMindChatbot:
         # State
         self.is_initialized = False
         self.voice_enabled = False
+        self._init_lock = asyncio.Lock()
+        self._retrieval_cache: "OrderedDict[bytes, tuple]" = OrderedDict()
         
     async def initialize(self):
+        """Initialize all components once, even when called concurrently."""
+        async with self._init_lock:
+            if self.is_initialized:
+                return
+            await self._do_initialize()
+    
+    async def _do_initialize(self):
         """Initialize all components asynchronously."""
         try:
             logger.info("Initializing WhisperMind Chatbot...")
@@ -51,15 +69,26 @@ class WhisperMindChatbot:
             # Initialize Ollama client
             self.ollama_client = OllamaClient(
                 base_url=self.config.ollama.base_url,
-                model=self.config.ollama.model
+                model=self.config.ollama.model,
+                keep_history=self.config.ollama.keep_history,
+                max_history_messages=self.config.ollama.max_history_messages
             )
             await self.ollama_client.initialize()
             
             # Initialize RAG components
-            self.document_processor = DocumentProcessor()
+            from .rag.document_processor import DocumentProcessor
+            from .rag.vector_store import VectorStore
+            from .rag.retriever import DocumentRetriever
+            
+            self.document_processor = DocumentProcessor(
+                cache_path=os.path.join(
+                    self.config.chromadb.persist_directory, "document_cache.sqlite3"
+                )
+            )
             self.vector_store = VectorStore(
                 persist_directory=self.config.chromadb.persist_directory,
-                collection_name=self.config.chromadb.collection_name
+                collection_name=self.config.chromadb.collection_name,
+                encoder_processes=self.config.chromadb.encoder_processes
             )
             self.retriever = DocumentRetriever(
                 vector_store=self.vector_store,
@@ -68,11 +97,15 @@ class WhisperMindChatbot:
             
             # Initialize voice components if enabled
             if self.config.voice.enabled:
+                from .voice.speech_to_text import SpeechToText
+                from .voice.text_to_speech import TextToSpeech
+                
                 self.speech_to_text = SpeechToText(
-                    model_size=self.config.voice.whisper_model
+                    model_size=self.config.voice.whisper_model,
+                    backend=self.config.voice.stt_backend
                 )
                 self.text_to_speech = TextToSpeech(
-                    model_name=self.config.voice.tts_model
+                    piper_model=self.config.voice.piper_model
                 )
                 self.voice_enabled = True
                 logger.info("Voice components initialized")
@@ -109,6 +142,7 @@ class WhisperMindChatbot:
             
             # Add to vector store
             await self.vector_store.add_documents(documents)
+            self._retrieval_cache.clear()
             
             logger.info(f"Successfully processed {len(documents)} documents")
             return len(documents)
@@ -117,6 +151,98 @@ class WhisperMindChatbot:
             logger.error(f"Failed to load documents: {e}")
             raise
     
+    async def load_documents_streaming(
+        self,
+        document_path: str,
+        batch_size: int = 32,
+        queue_size: int = 64,
+        num_consumers: int = 2
+    ) -> int:
+        """
+        Load documents with parsing and indexing overlapped.
+        
+        Chunks flow through a bounded queue, so at most queue_size chunks
+        wait in memory while earlier batches are embedded and stored.
+        
+        Args:
+            document_path: Path to documents directory
+            batch_size: Number of chunks added to the vector store at once
+            queue_size: Maximum number of chunks waiting to be indexed
+            num_consumers: Number of concurrent indexing workers
+            
+        Returns:
+            Number of documents processed
+        """
+        if not self.is_initialized:
+            await self.initialize()
+        
+        logger.info(f"Streaming documents from {document_path}")
+        
+        chunks: asyncio.Queue = asyncio.Queue(maxsize=queue_size)
+        indexed = 0
+        
+        async def produce():
+            try:
+                async for document in self.document_processor.iter_directory(document_path):
+                    await chunks.put(document)
+            finally:
+                for _ in range(num_consumers):
+                    await chunks.put(None)
+        
+        async def consume():
+            nonlocal indexed
+            batch = []
+            while True:
+                document = await chunks.get()
+                if document is not None:
+                    batch.append(document)
+                if batch and (document is None or len(batch) >= batch_size):
+                    await self.vector_store.add_documents(batch)
+                    indexed += len(batch)
+                    batch = []
+                if document is None:
+                    return
+        
+        try:
+            await asyncio.gather(produce(), *(consume() for _ in range(num_consumers)))
+        except Exception as e:
+            logger.error(f"Failed to load documents: {e}")
+            raise
+        finally:
+            self._retrieval_cache.clear()
+        
+        if indexed:
+            logger.info(f"Successfully processed {indexed} documents")
+        else:
+            logger.warning("No documents found to process")
+        return indexed
+    
+    async def _retrieve_documents(self, message: str) -> List[Any]:
+        """Retrieve the documents relevant to a message, reusing recent results."""
+        normalized = " ".join(message.lower().split())
+        key = hashlib.blake2b(
+            f"{self.retriever.top_k}:{normalized}".encode(), digest_size=16
+        ).digest()
+        
+        now = time.monotonic()
+        cached = self._retrieval_cache.get(key)
+        if cached and now - cached[0] < RETRIEVAL_CACHE_TTL:
+            self._retrieval_cache.move_to_end(key)
+            return cached[1]
+        
+        relevant_docs = await self.retriever.retrieve(message)
+        
+        self._retrieval_cache[key] = (now, relevant_docs)
+        self._retrieval_cache.move_to_end(key)
+        while len(self._retrieval_cache) > RETRIEVAL_CACHE_SIZE:
+            self._retrieval_cache.popitem(last=False)
+        return relevant_docs
+    
+    async def _retrieve_context(self, message: str) -> str:
+        """Join the content of the documents relevant to a message."""
+        relevant_docs = await self._retrieve_documents(message)
+        return "\n\n".join([doc.content for doc in relevant_docs])
+    
     async def chat(self, message: str, use_rag: bool = True) -> str:
         """
         Process a text message and return a response.
@@ -128,17 +254,30 @@ class WhisperMindChatbot:
         Returns:
             Chatbot response
         """
+        response, _ = await self.chat_with_sources(message, use_rag=use_rag)
+        return response
+    
+    async def chat_with_sources(self, message: str, use_rag: bool = True) -> tuple[str, List[Any]]:
+        """
+        Process a text message and return the response with the documents used.
+        
+        Args:
+            message: User input message
+            use_rag: Whether to use RAG for context retrieval
+            
+        Returns:
+            Tuple of (response, retrieved documents used as context)
+        """
         if not self.is_initialized:
             await self.initialize()
         
         try:
-            context = ""
-            
             if use_rag:
-                # Retrieve relevant context
-                relevant_docs = await self.retriever.retrieve(message)
-                if relevant_docs:
-                    context = "\n\n".join([doc.content for doc in relevant_docs])
+                relevant_docs = await self._retrieve_documents(message)
+            else:
+                logger.debug("RAG disabled; skipping retrieval and query embedding")
+                relevant_docs = []
+            context = "\n\n".join([doc.content for doc in relevant_docs])
             
             # Generate response
             response = await self.ollama_client.generate_response(
@@ -146,18 +285,36 @@ class WhisperMindChatbot:
                 context=context
             )
             
-            return response
+            return response, relevant_docs
             
         except Exception as e:
             logger.error(f"Failed to process chat message: {e}")
-            return f"Sorry, I encountered an error: {str(e)}"
+            return f"Sorry, I encountered an error: {str(e)}", []
+    
+    async def transcribe(self, audio_file_path: str) -> str:
+        """
+        Transcribe voice input without generating a response.
+        
+        Args:
+            audio_file_path: Path to audio file
+            
+        Returns:
+            Transcribed text
+        """
+        if not self.voice_enabled:
+            raise ValueError("Voice processing is not enabled")
+        
+        transcribed_text = await self.speech_to_text.transcribe(audio_file_path)
+        logger.info(f"Transcribed: {transcribed_text}")
+        return transcribed_text
     
-    async def voice_chat(self, audio_file_path: str) -> tuple[str, str]:
+    async def voice_chat(self, audio_file_path: str, use_rag: bool = True) -> tuple[str, str]:
         """
         Process voice input and return text transcription and response.
         
         Args:
             audio_file_path: Path to audio file
+            use_rag: Whether to use RAG for context retrieval
             
         Returns:
             Tuple of (transcribed_text, response)
@@ -167,11 +324,10 @@ class WhisperMindChatbot:
         
         try:
             # Transcribe audio to text
-            transcribed_text = await self.speech_to_text.transcribe(audio_file_path)
-            logger.info(f"Transcribed: {transcribed_text}")
+            transcribed_text = await self.transcribe(audio_file_path)
             
             # Get chatbot response
-            response = await self.chat(transcribed_text)
+            response = await self.chat(transcribed_text, use_rag=use_rag)
             
             return transcribed_text, response
             
@@ -179,6 +335,68 @@ class WhisperMindChatbot:
             logger.error(f"Failed to process voice input: {e}")
             return "", f"Sorry, I couldn't process your voice input: {str(e)}"
     
+    async def voice_chat_stream(
+        self,
+        audio_file_path: str,
+        output_dir: str = "temp_audio",
+        use_rag: bool = True
+    ) -> tuple[str, str, List[str]]:
+        """
+        Process voice input, synthesizing the response sentence by sentence
+        while the LLM is still generating it.
+        
+        Args:
+            audio_file_path: Path to audio file
+            output_dir: Directory for the synthesized sentence clips
+            use_rag: Whether to use RAG for context retrieval
+            
+        Returns:
+            Tuple of (transcribed_text, response, audio_paths) where
+            audio_paths are the clips in playback order
+        """
+        if not self.voice_enabled:
+            raise ValueError("Voice processing is not enabled")
+        
+        transcribed_text = await self.transcribe(audio_file_path)
+        
+        context = await self._retrieve_context(transcribed_text) if use_rag else ""
+        sentences: asyncio.Queue = asyncio.Queue()
+        response_parts: List[str] = []
+        audio_paths: List[str] = []
+        
+        async def produce():
+            buffer = ""
+            try:
+                async for piece in self.ollama_client.stream_chat(
+                    transcribed_text, context=context
+                ):
+                    response_parts.append(piece)
+                    buffer += piece
+                    # Flush every complete sentence in the buffer
+                    while (match := _SENTENCE_END.search(buffer)):
+                        sentence, buffer = buffer[:match.end()], buffer[match.end():]
+                        if sentence.strip():
+                            await sentences.put(sentence.strip())
+                if buffer.strip():
+                    await sentences.put(buffer.strip())
+            finally:
+                await sentences.put(None)
+        
+        async def consume():
+            while (sentence := await sentences.get()) is not None:
+                output_path = os.path.join(output_dir, f"response_{len(audio_paths):03d}.wav")
+                audio_paths.append(
+                    await self.text_to_speech.synthesize(sentence, output_path)
+                )
+        
+        try:
+            await asyncio.gather(produce(), consume())
+        except Exception as e:
+            logger.error(f"Failed to stream voice response: {e}")
+            return transcribed_text, f"Sorry, I couldn't complete the voice response: {str(e)}", audio_paths
+        
+        return transcribed_text, "".join(response_parts), audio_paths
+    
     async def speak_response(self, text: str, output_path: str = "temp_audio.wav") -> str:
         """
         Convert text to speech and save to file.
@@ -218,6 +436,11 @@ class WhisperMindChatbot:
         
         return status
     
+    def reset_conversation(self):
+        """Forget the conversation history kept for Ollama (if enabled)."""
+        if self.ollama_client:
+            self.ollama_client.reset_conversation()
+    
     async def cleanup(self):
         """Clean up resources."""
         logger.info("Cleaning up chatbot resources...")
@@ -228,6 +451,9 @@ class WhisperMindChatbot:
         if self.vector_store:
             await self.vector_store.cleanup()
         
+        if self.document_processor:
+            self.document_processor.close()
+        
         logger.info("Cleanup complete")
 
 
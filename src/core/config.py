@@ -4,13 +4,34 @@ Configuration management for WhisperMind chatbot.
 
 import yaml
 import os
+import shutil
+import tempfile
+import threading
+from functools import lru_cache
 from pathlib import Path
-from dataclasses import dataclass, field
+from dataclasses import dataclass, field, asdict
 from typing import Dict, Any, Optional
 import logging
 
 logger = logging.getLogger(__name__)
 
+# Prefer the libyaml C loader when PyYAML was built with it
+try:
+    from yaml import CSafeLoader as _YamlLoader, CSafeDumper as _YamlDumper
+except ImportError:
+    from yaml import SafeLoader as _YamlLoader, SafeDumper as _YamlDumper
+
+
+# Saves requested within this many seconds of each other are written once
+SAVE_DEBOUNCE_SECONDS = 0.2
+
+
+@lru_cache(maxsize=8)
+def _load_yaml(path: str, mtime: float) -> Dict[str, Any]:
+    """Parse a YAML file; cached per (path, mtime) so edits are picked up."""
+    with open(path, 'rb') as f:
+        return yaml.load(f, Loader=_YamlLoader) or {}
+
 
 @dataclass
 class OllamaConfig:
@@ -19,6 +40,8 @@ class OllamaConfig:
     model: str = "llama3"
     temperature: float = 0.7
     max_tokens: int = 2048
+    keep_history: bool = False  # resend earlier turns so Ollama reuses its KV cache
+    max_history_messages: int = 20
 
 
 @dataclass
@@ -27,6 +50,7 @@ class ChromaDBConfig:
     persist_directory: str = "models/chromadb"
     collection_name: str = "documents"
     embedding_model: str = "all-MiniLM-L6-v2"
+    encoder_processes: int = 0
 
 
 @dataclass
@@ -43,7 +67,9 @@ class VoiceConfig:
     """Voice processing configuration."""
     enabled: bool = True
     whisper_model: str = "base"  # tiny, base, small, medium, large
+    stt_backend: str = "auto"  # auto, faster-whisper, openai-whisper
     tts_model: str = "tts_models/en/ljspeech/tacotron2-DDC"
+    piper_model: Optional[str] = None  # path to a Piper .onnx voice; None uses pyttsx3
     audio_sample_rate: int = 16000
 
 
@@ -75,6 +101,8 @@ class Config:
             config_path: Path to configuration YAML file
         """
         self.config_path = config_path
+        self._save_timer: Optional[threading.Timer] = None
+        self._save_lock = threading.Lock()
         
         # Initialize with defaults
         self.ollama = OllamaConfig()
@@ -100,8 +128,9 @@ class Config:
             return
         
         try:
-            with open(self.config_path, 'r', encoding='utf-8') as f:
-                config_data = yaml.safe_load(f) or {}
+            config_data = _load_yaml(
+                self.config_path, os.path.getmtime(self.config_path)
+            )
             
             # Update configurations
             if 'ollama' in config_data:
@@ -128,23 +157,54 @@ class Config:
             logger.error(f"Failed to load configuration: {e}")
             logger.info("Using default configuration")
     
+    def schedule_save(self, delay: float = SAVE_DEBOUNCE_SECONDS):
+        """Save the configuration after a short delay, coalescing repeated calls.
+        
+        Each call restarts the delay, so a burst of setting changes (e.g. from
+        the UI) is written to disk once.
+        """
+        with self._save_lock:
+            if self._save_timer is not None:
+                self._save_timer.cancel()
+            self._save_timer = threading.Timer(delay, self.save_config)
+            self._save_timer.start()
+    
     def save_config(self):
         """Save current configuration to YAML file."""
+        with self._save_lock:
+            # An immediate save supersedes a pending debounced one
+            if self._save_timer is not None:
+                self._save_timer.cancel()
+                self._save_timer = None
+        
         try:
             # Ensure config directory exists
-            os.makedirs(os.path.dirname(self.config_path), exist_ok=True)
+            config_dir = os.path.dirname(self.config_path) or "."
+            os.makedirs(config_dir, exist_ok=True)
             
-            config_data = {
-                'ollama': self._dataclass_to_dict(self.ollama),
-                'chromadb': self._dataclass_to_dict(self.chromadb),
-                'rag': self._dataclass_to_dict(self.rag),
-                'voice': self._dataclass_to_dict(self.voice),
-                'ui': self._dataclass_to_dict(self.ui),
-                'logging': self._dataclass_to_dict(self.logging)
-            }
+            config_data = self.to_dict()
             
-            with open(self.config_path, 'w', encoding='utf-8') as f:
-                yaml.dump(config_data, f, default_flow_style=False, indent=2)
+            # Write to a sibling temp file and swap it in, so readers never
+            # see a partially written config
+            fd, temp_path = tempfile.mkstemp(dir=config_dir, suffix=".yaml.tmp")
+            try:
+                # mkstemp creates the file 0600; keep the existing file's mode,
+                # or the umask default for a new one
+                if os.path.exists(self.config_path):
+                    shutil.copymode(self.config_path, temp_path)
+                else:
+                    umask = os.umask(0)
+                    os.umask(umask)
+                    os.chmod(temp_path, 0o666 & ~umask)
+                with os.fdopen(fd, 'w', encoding='utf-8') as f:
+                    yaml.dump(
+                        config_data, f, Dumper=_YamlDumper,
+                        default_flow_style=False, indent=2
+                    )
+                os.replace(temp_path, self.config_path)
+            except BaseException:
+                os.unlink(temp_path)
+                raise
             
             logger.info(f"Configuration saved to {self.config_path}")
             
@@ -159,10 +219,7 @@ class Config:
     
     def _dataclass_to_dict(self, dataclass_obj) -> Dict[str, Any]:
         """Convert dataclass to dictionary."""
-        result = {}
-        for field_name in dataclass_obj.__dataclass_fields__:
-            result[field_name] = getattr(dataclass_obj, field_name)
-        return result
+        return asdict(dataclass_obj)
     
     def _create_directories(self):
         """Create necessary directories."""
@@ -174,7 +231,8 @@ class Config:
         ]
         
         for directory in directories:
-            os.makedirs(directory, exist_ok=True)
+            if not os.path.isdir(directory):
+                os.makedirs(directory, exist_ok=True)
     
     def _setup_logging(self):
         """Setup logging configuration."""
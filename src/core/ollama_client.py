@@ -6,63 +6,222 @@ import aiohttp
 import asyncio
 import json
 import logging
-from typing import Optional, Dict, Any, List
+import time
+from pathlib import Path
+from typing import Optional, Dict, Any, List, AsyncIterator, Set, Tuple, Final
+
+try:
+    import orjson
+    _json_loads = orjson.loads
+    _json_dumps = orjson.dumps
+except ImportError:
+    orjson = None
+    _json_loads = json.loads
+    
+    def _json_dumps(obj: Any) -> bytes:
+        return json.dumps(obj).encode()
+
+_JSON_HEADERS = {"Content-Type": "application/json"}
+
+# Streamed /api/chat lines are parsed once per token; with msgspec only the
+# two fields we read are decoded, straight into a typed struct.
+try:
+    import msgspec
+    
+    class _ChatMessage(msgspec.Struct):
+        content: str = ""
+    
+    class _ChatChunk(msgspec.Struct):
+        message: _ChatMessage = msgspec.field(default_factory=_ChatMessage)
+        done: bool = False
+    
+    _decode_chat_chunk = msgspec.json.Decoder(_ChatChunk).decode
+    
+    def _parse_chat_line(line: bytes) -> tuple:
+        chunk = _decode_chat_chunk(line)
+        return chunk.message.content, chunk.done
+except ImportError:
+    msgspec = None
+    
+    def _parse_chat_line(line: bytes) -> tuple:
+        data = _json_loads(line)
+        return data.get('message', {}).get('content', ''), data.get('done', False)
+
+_SYSTEM_PROMPT: Final = (
+    "You are WhisperMind, a helpful AI assistant that answers questions "
+    "based on the provided context and your knowledge. Be conversational, "
+    "helpful, and accurate. If you don't know something, say so."
+)
+_SYSTEM_MESSAGE: Final = {"role": "system", "content": _SYSTEM_PROMPT}
+
+# Seconds an is_available() result is reused before probing again
+AVAILABILITY_TTL = 5.0
+
+# On-disk copy of the last /api/tags result, reused across restarts
+TAGS_CACHE_PATH = Path.home() / ".cache" / "whispermind" / "ollama_tags.json"
+TAGS_CACHE_TTL = 60.0
 
 logger = logging.getLogger(__name__)
 
 
+async def _iter_ndjson(content: aiohttp.StreamReader, chunk_size: int = 16384) -> AsyncIterator[bytes]:
+    """Yield complete NDJSON records from a response body read in large chunks."""
+    buffer = bytearray()
+    async for chunk in content.iter_chunked(chunk_size):
+        buffer += chunk
+        while (newline := buffer.find(b"\n")) != -1:
+            line = bytes(buffer[:newline])
+            del buffer[:newline + 1]
+            # Skip keep-alive blank lines without a parse attempt
+            if line[:1] == b"{":
+                yield line
+    if buffer[:1] == b"{":
+        yield bytes(buffer)
+
+
 class OllamaClient:
     """Client for interacting with Ollama API."""
     
-    def __init__(self, base_url: str = "http://localhost:11434", model: str = "llama3"):
+    def __init__(
+        self,
+        base_url: str = "http://localhost:11434",
+        model: str = "llama3",
+        keep_alive: str = "30m",
+        keep_history: bool = False,
+        max_history_messages: int = 20
+    ):
         """
         Initialize Ollama client.
         
         Args:
             base_url: Ollama server URL
             model: Model name to use
+            keep_alive: How long Ollama keeps the model loaded after a request
+            keep_history: Send previous turns with each chat so Ollama can
+                reuse the KV cache for the unchanged conversation prefix
+            max_history_messages: Maximum remembered user/assistant messages
         """
         self.base_url = base_url.rstrip('/')
         self.model = model
+        self.keep_alive = keep_alive
+        self.keep_history = keep_history
+        self.max_history_messages = max_history_messages
         self.session = None
         
+        # Previous turns, exactly as sent, when keep_history is enabled
+        self._history: List[Dict[str, str]] = []
+        
+        # (checked_at, available) from the last is_available() probe
+        self._availability: Optional[tuple] = None
+        
+    async def __aenter__(self) -> "OllamaClient":
+        await self.initialize()
+        return self
+    
+    async def __aexit__(self, exc_type, exc, tb):
+        await self.cleanup()
+    
+    def _ensure_session(self) -> aiohttp.ClientSession:
+        """Create the pooled keep-alive HTTP session on first use."""
+        if self.session is None or self.session.closed:
+            self.session = aiohttp.ClientSession(
+                connector=aiohttp.TCPConnector(
+                    limit=32,
+                    keepalive_timeout=60,
+                    enable_cleanup_closed=True
+                ),
+                # Streaming generations can run long; only bound the connect
+                timeout=aiohttp.ClientTimeout(total=None, sock_connect=5)
+            )
+        return self.session
+    
+    def _post_json(self, path: str, payload: Dict[str, Any]):
+        """POST a pre-serialized JSON body to an Ollama API path."""
+        return self.session.post(
+            f"{self.base_url}{path}",
+            data=_json_dumps(payload),
+            headers=_JSON_HEADERS
+        )
+    
     async def initialize(self):
         """Initialize the HTTP session."""
-        self.session = aiohttp.ClientSession()
+        self._ensure_session()
         
-        # Check if Ollama is available
-        if not await self.is_available():
-            raise ConnectionError(
-                f"Ollama server not available at {self.base_url}. "
-                f"Please ensure Ollama is running."
-            )
+        # A fresh on-disk tag list that already has our model lets a warm
+        # restart skip the network round-trip entirely
+        models = self._read_tags_cache()
+        if models is None or self.model not in models:
+            available, models = await self._probe()
+            
+            # Check if Ollama is available
+            if not available:
+                raise ConnectionError(
+                    f"Ollama server not available at {self.base_url}. "
+                    f"Please ensure Ollama is running."
+                )
+            self._write_tags_cache(models)
         
         # Check if model is available
-        if not await self.is_model_available():
+        if self.model not in models:
             logger.warning(f"Model '{self.model}' not found. Attempting to pull...")
             await self.pull_model()
     
-    async def is_available(self) -> bool:
-        """Check if Ollama server is available."""
+    async def _probe(self) -> Tuple[bool, Set[str]]:
+        """Fetch /api/tags once; return (available, installed model base names)."""
+        available, models = False, set()
         try:
-            async with self.session.get(f"{self.base_url}/api/tags") as response:
-                return response.status == 200
+            async with self.session.get(
+                f"{self.base_url}/api/tags",
+                timeout=aiohttp.ClientTimeout(total=2)
+            ) as response:
+                if response.status == 200:
+                    data = await response.json(loads=_json_loads)
+                    available = True
+                    models = {model['name'].split(':', 1)[0] for model in data.get('models', [])}
         except Exception as e:
             logger.error(f"Failed to check Ollama availability: {e}")
-            return False
+        
+        self._availability = (time.monotonic(), available)
+        return available, models
+    
+    def _read_tags_cache(self) -> Optional[Set[str]]:
+        """Return cached model names for this server if recent enough."""
+        try:
+            with open(TAGS_CACHE_PATH, 'rb') as f:
+                cached = _json_loads(f.read())
+        except (OSError, ValueError):
+            return None
+        
+        if cached.get('base_url') != self.base_url:
+            return None
+        if time.time() - cached.get('checked_at', 0) > TAGS_CACHE_TTL:
+            return None
+        return set(cached.get('models', []))
+    
+    def _write_tags_cache(self, models: Set[str]):
+        """Persist the model names seen on this server."""
+        try:
+            TAGS_CACHE_PATH.parent.mkdir(parents=True, exist_ok=True)
+            TAGS_CACHE_PATH.write_bytes(_json_dumps({
+                'base_url': self.base_url,
+                'checked_at': time.time(),
+                'models': sorted(models)
+            }))
+        except OSError as e:
+            logger.debug(f"Could not write Ollama tags cache: {e}")
+    
+    async def is_available(self) -> bool:
+        """Check if Ollama server is available (cached for a few seconds)."""
+        if self._availability and time.monotonic() - self._availability[0] < AVAILABILITY_TTL:
+            return self._availability[1]
+        
+        available, _ = await self._probe()
+        return available
     
     async def is_model_available(self) -> bool:
         """Check if the specified model is available."""
-        try:
-            async with self.session.get(f"{self.base_url}/api/tags") as response:
-                if response.status == 200:
-                    data = await response.json()
-                    models = [model['name'].split(':')[0] for model in data.get('models', [])]
-                    return self.model in models
-                return False
-        except Exception as e:
-            logger.error(f"Failed to check model availability: {e}")
-            return False
+        _, models = await self._probe()
+        return self.model in models
     
     async def pull_model(self) -> bool:
         """Pull the specified model from Ollama registry."""
@@ -70,20 +229,16 @@ class OllamaClient:
             logger.info(f"Pulling model '{self.model}'...")
             
             payload = {"name": self.model}
-            async with self.session.post(
-                f"{self.base_url}/api/pull",
-                json=payload
-            ) as response:
+            async with self._post_json("/api/pull", payload) as response:
                 if response.status == 200:
                     # Stream the response for progress updates
-                    async for line in response.content:
-                        if line:
-                            try:
-                                data = json.loads(line.decode())
-                                if 'status' in data:
-                                    logger.info(f"Pull status: {data['status']}")
-                            except json.JSONDecodeError:
-                                continue
+                    async for line in _iter_ndjson(response.content):
+                        try:
+                            data = _json_loads(line)
+                            if 'status' in data:
+                                logger.info(f"Pull status: {data['status']}")
+                        except json.JSONDecodeError:
+                            continue
                     
                     logger.info(f"Successfully pulled model '{self.model}'")
                     return True
@@ -95,6 +250,90 @@ class OllamaClient:
             logger.error(f"Error pulling model: {e}")
             return False
     
+    def _build_chat_payload(
+        self,
+        message: str,
+        context: str,
+        temperature: float,
+        max_tokens: int,
+        stream: bool
+    ) -> Dict[str, Any]:
+        """Build the /api/chat request body for a user message."""
+        user_prompt = message
+        if context.strip():
+            user_prompt = "".join(("Context:\n", context, "\n\nQuestion: ", message))
+        
+        return {
+            "model": self.model,
+            "messages": [
+                _SYSTEM_MESSAGE,
+                *self._history,
+                {"role": "user", "content": user_prompt}
+            ],
+            "stream": stream,
+            "keep_alive": self.keep_alive,
+            "options": {
+                "temperature": temperature,
+                "num_predict": max_tokens
+            }
+        }
+    
+    async def stream_chat(
+        self,
+        message: str,
+        context: str = "",
+        temperature: float = 0.7,
+        max_tokens: int = 2048
+    ) -> AsyncIterator[str]:
+        """
+        Stream a response from the LLM as it is generated.
+        
+        Args:
+            message: User message
+            context: Additional context from RAG
+            temperature: Response creativity (0.0 to 1.0)
+            max_tokens: Maximum response length
+            
+        Yields:
+            Response text fragments in generation order
+            
+        Raises:
+            RuntimeError: If the Ollama API returns an error status
+        """
+        payload = self._build_chat_payload(
+            message, context, temperature, max_tokens, stream=True
+        )
+        pieces: List[str] = []
+        
+        async with self._post_json("/api/chat", payload) as response:
+            if response.status != 200:
+                error_text = await response.text()
+                logger.error(f"Ollama API error: {response.status} - {error_text}")
+                raise RuntimeError(f"Ollama API error: {response.status}")
+            
+            async for line in _iter_ndjson(response.content):
+                piece, done = _parse_chat_line(line)
+                if piece:
+                    pieces.append(piece)
+                    yield piece
+                if done:
+                    break
+        
+        if self.keep_history:
+            self._remember(payload["messages"][-1], "".join(pieces))
+    
+    def _remember(self, user_message: Dict[str, str], reply: str):
+        """Append a completed turn to the conversation history."""
+        self._history.append(user_message)
+        self._history.append({"role": "assistant", "content": reply})
+        # Drop whole turns from the front once over the limit
+        while len(self._history) > self.max_history_messages:
+            del self._history[:2]
+    
+    def reset_conversation(self):
+        """Forget the remembered conversation history."""
+        self._history.clear()
+    
     async def generate_response(
         self,
         message: str,
@@ -115,42 +354,15 @@ class OllamaClient:
             Generated response text
         """
         try:
-            # Construct the prompt
-            system_prompt = (
-                "You are WhisperMind, a helpful AI assistant that answers questions "
-                "based on the provided context and your knowledge. Be conversational, "
-                "helpful, and accurate. If you don't know something, say so."
-            )
-            
-            user_prompt = message
-            if context.strip():
-                user_prompt = f"Context:\n{context}\n\nQuestion: {message}"
+            pieces = [
+                piece async for piece in self.stream_chat(
+                    message, context, temperature, max_tokens
+                )
+            ]
+            return "".join(pieces) or 'No response generated.'
             
-            payload = {
-                "model": self.model,
-                "messages": [
-                    {"role": "system", "content": system_prompt},
-                    {"role": "user", "content": user_prompt}
-                ],
-                "stream": False,
-                "options": {
-                    "temperature": temperature,
-                    "num_predict": max_tokens
-                }
-            }
-            
-            async with self.session.post(
-                f"{self.base_url}/api/chat",
-                json=payload
-            ) as response:
-                if response.status == 200:
-                    data = await response.json()
-                    return data.get('message', {}).get('content', 'No response generated.')
-                else:
-                    error_text = await response.text()
-                    logger.error(f"Ollama API error: {response.status} - {error_text}")
-                    return f"Sorry, I encountered an error generating a response."
-                    
+        except RuntimeError:
+            return f"Sorry, I encountered an error generating a response."
         except Exception as e:
             logger.error(f"Error generating response: {e}")
             return f"Sorry, I encountered an error: {str(e)}"
@@ -165,33 +377,54 @@ class OllamaClient:
         Returns:
             List of embedding values
         """
-        try:
-            payload = {
-                "model": self.model,
-                "prompt": text
-            }
+        return (await self.generate_embeddings_batch([text]))[0]
+    
+    async def generate_embeddings_batch(
+        self,
+        texts: List[str],
+        batch_size: int = 64,
+        max_concurrency: int = 4
+    ) -> List[List[float]]:
+        """
+        Generate embeddings for many texts using Ollama's batched /api/embed.
+        
+        Args:
+            texts: Texts to embed
+            batch_size: Number of texts sent per request
+            max_concurrency: Maximum number of requests in flight
             
-            async with self.session.post(
-                f"{self.base_url}/api/embeddings",
-                json=payload
-            ) as response:
-                if response.status == 200:
-                    data = await response.json()
-                    return data.get('embedding', [])
-                else:
-                    logger.error(f"Failed to generate embeddings: {response.status}")
-                    return []
-                    
-        except Exception as e:
-            logger.error(f"Error generating embeddings: {e}")
-            return []
+        Returns:
+            One embedding per input text, in input order (empty on failure)
+        """
+        semaphore = asyncio.Semaphore(max_concurrency)
+        
+        async def embed(batch: List[str]) -> List[List[float]]:
+            async with semaphore:
+                try:
+                    async with self._post_json(
+                        "/api/embed",
+                        {"model": self.model, "input": batch}
+                    ) as response:
+                        if response.status == 200:
+                            data = await response.json(loads=_json_loads)
+                            embeddings = data.get('embeddings', [])
+                            if len(embeddings) == len(batch):
+                                return embeddings
+                        logger.error(f"Failed to generate embeddings: {response.status}")
+                except Exception as e:
+                    logger.error(f"Error generating embeddings: {e}")
+                return [[] for _ in batch]
+        
+        batches = [texts[i:i + batch_size] for i in range(0, len(texts), batch_size)]
+        results = await asyncio.gather(*(embed(batch) for batch in batches))
+        return [embedding for batch in results for embedding in batch]
     
     async def list_models(self) -> List[Dict[str, Any]]:
         """List available models."""
         try:
             async with self.session.get(f"{self.base_url}/api/tags") as response:
                 if response.status == 200:
-                    data = await response.json()
+                    data = await response.json(loads=_json_loads)
                     return data.get('models', [])
                 return []
         except Exception as e:
@@ -202,16 +435,13 @@ class OllamaClient:
         """Clean up the HTTP session."""
         if self.session:
             await self.session.close()
+            self.session = None
 
 
 # Example usage
 if __name__ == "__main__":
     async def main():
-        client = OllamaClient(model="llama3")
-        
-        try:
-            await client.initialize()
-            
+        async with OllamaClient(model="llama3") as client:
             response = await client.generate_response(
                 "What is machine learning?",
                 context="Machine learning is a subset of artificial intelligence."
@@ -220,8 +450,5 @@ if __name__ == "__main__":
             
             models = await client.list_models()
             print(f"Available models: {[m['name'] for m in models]}")
-            
-        finally:
-            await client.cleanup()
     
     asyncio.run(main())
\ No newline at end of file
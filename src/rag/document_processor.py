@@ -3,12 +3,22 @@ Document processing for RAG system.
 """
 
 import os
+import re
+import sys
+import math
+import time
+import mmap
+import bisect
 import asyncio
 import logging
 from pathlib import Path
-from typing import List, Dict, Any, Optional
+from typing import List, Dict, Any, Optional, AsyncIterator, Mapping
 from dataclasses import dataclass
+from collections import ChainMap, OrderedDict
 import hashlib
+import pickle
+import sqlite3
+from concurrent.futures import ProcessPoolExecutor
 
 # Document processing libraries
 try:
@@ -19,15 +29,165 @@ try:
 except ImportError as e:
     logging.warning(f"Some document processing libraries not available: {e}")
 
+try:
+    import aiofiles
+except ImportError:
+    aiofiles = None
+
+try:
+    import lxml.etree
+    import lxml.html
+    LXML_AVAILABLE = True
+except ImportError:
+    LXML_AVAILABLE = False
+
 logger = logging.getLogger(__name__)
 
 
-@dataclass
+async def _async_read_bytes(file_path: str) -> bytes:
+    """Read a whole file without blocking the event loop."""
+    if aiofiles is not None:
+        async with aiofiles.open(file_path, 'rb') as f:
+            return await f.read()
+    return await asyncio.to_thread(Path(file_path).read_bytes)
+
+
+def _decode_text(data) -> str:
+    """Decode file bytes (or any buffer) as UTF-8, falling back to latin-1.
+
+    Line endings are normalized to LF, as text-mode reads did, so CRLF and CR
+    files split and hash the same as LF files.
+    """
+    try:
+        text = str(data, 'utf-8')
+    except UnicodeDecodeError:
+        # Try with different encoding
+        text = str(data, 'latin-1')
+    return text.replace('\r\n', '\n').replace('\r', '\n')
+
+
+# Extracted text of recently parsed Markdown/HTML, keyed by content digest
+_MARKUP_CACHE_SIZE = 256
+_markup_text_cache: "OrderedDict[bytes, str]" = OrderedDict()
+
+
+def _cached_markup_text(content: str, kind: bytes, convert) -> str:
+    """
+    Return convert(content), reusing the result for identical content.
+    
+    Re-indexing with different chunk settings misses the chunk cache but
+    parses the same files again; this keeps those parses to one per process.
+    """
+    key = hashlib.blake2b(
+        content.encode('utf-8', 'surrogatepass'), digest_size=16, person=kind
+    ).digest()
+    text = _markup_text_cache.get(key)
+    if text is not None:
+        _markup_text_cache.move_to_end(key)
+        return text
+    
+    text = convert(content)
+    _markup_text_cache[key] = text
+    if len(_markup_text_cache) > _MARKUP_CACHE_SIZE:
+        _markup_text_cache.popitem(last=False)
+    return text
+
+
+# Files larger than this are decoded straight from a memory map
+_MMAP_THRESHOLD = 64 * 1024
+
+# Chunk cache rows kept; beyond this the least recently used are evicted
+# (uploads arrive under fresh temp paths, so their rows are never hit again)
+_CHUNK_CACHE_MAX_ENTRIES = 1000
+
+# Identifies how _generate_doc_id derives chunk IDs; vector stores built
+# under a different scheme are recreated rather than matched by ID
+DOC_ID_SCHEME = "blake2b-16"
+
+
+def _read_mapped_text(file_path: str) -> str:
+    """Decode a file from a read-only memory map, without a bytes copy."""
+    with open(file_path, 'rb') as f:
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+            view = memoryview(mm)
+            try:
+                return _decode_text(view)
+            finally:
+                view.release()
+
+
+def _html_to_text(html: str) -> str:
+    """Extract the text of an HTML document, using lxml when available."""
+    if LXML_AVAILABLE:
+        try:
+            return lxml.html.fromstring(html).text_content()
+        except (lxml.etree.ParserError, ValueError):
+            # Empty or malformed documents, or an XML encoding declaration
+            pass
+    
+    from bs4 import BeautifulSoup
+    return BeautifulSoup(html, 'html.parser').get_text()
+
+
+def _iter_files(root: str, extensions: tuple):
+    """Yield paths under root whose lowercased name ends with one of extensions."""
+    try:
+        entries = list(os.scandir(root))
+    except OSError as e:
+        logger.warning(f"Cannot list {root}: {e}")
+        return
+    
+    for entry in entries:
+        try:
+            if entry.is_dir(follow_symlinks=False):
+                yield from _iter_files(entry.path, extensions)
+            elif entry.name.lower().endswith(extensions):
+                yield entry.path
+        except OSError:
+            continue
+
+
+# Preferred chunk break points, in priority order
+_SENTENCE_DELIMITERS = ('. ', '.\n', '!\n', '?\n')
+_SENTENCE_BOUNDARY = re.compile(r'\.[ \n]|[!?]\n')
+
+
+# PDF pages extracted per worker call while streaming a PDF
+_PDF_PAGE_BATCH = 16
+
+
+def _pdf_extract_pages(file_path: str, start: int, stop: int):
+    """
+    Extract the text of pages [start, stop) from a PDF; module-level so
+    worker processes can run it.
+    
+    Returns:
+        Tuple of (page texts, total page count)
+    """
+    import pypdf
+    with open(file_path, 'rb') as f:
+        reader = pypdf.PdfReader(f)
+        pages = reader.pages
+        return [pages[i].extract_text() or "" for i in range(start, min(stop, len(pages)))], len(pages)
+
+
+def _docx_extract(file_path: str) -> str:
+    """Extract text from a DOCX; module-level so worker processes can run it."""
+    from docx import Document as DocxDocument
+    doc = DocxDocument(file_path)
+    return "\n".join(paragraph.text for paragraph in doc.paragraphs)
+
+
+@dataclass(slots=True)
 class Document:
     """Document container for processed text."""
     content: str
-    metadata: Dict[str, Any]
+    metadata: Mapping[str, Any]
     doc_id: str
+    
+    def metadata_dict(self) -> Dict[str, Any]:
+        """Return the metadata as a plain dict (e.g. for ChromaDB)."""
+        return dict(self.metadata)
 
 
 class DocumentProcessor:
@@ -42,16 +202,47 @@ class DocumentProcessor:
         '.htm': 'html'
     }
     
-    def __init__(self, chunk_size: int = 1000, chunk_overlap: int = 200):
+    def __init__(
+        self,
+        chunk_size: int = 1000,
+        chunk_overlap: int = 200,
+        max_concurrent_extractions: Optional[int] = None,
+        cache_path: Optional[str] = None
+    ):
         """
         Initialize document processor.
         
         Args:
             chunk_size: Size of text chunks for processing
             chunk_overlap: Overlap between chunks
+            max_concurrent_extractions: Maximum files processed at once
+                (defaults to 1.5x the CPU count)
+            cache_path: SQLite file caching processed chunks per file;
+                unchanged files are not re-parsed (disabled if None)
         """
         self.chunk_size = chunk_size
         self.chunk_overlap = chunk_overlap
+        self.max_concurrent_extractions = (
+            max_concurrent_extractions or math.ceil(1.5 * (os.cpu_count() or 1))
+        )
+        
+        # Created on first PDF/DOCX so text-only corpora never fork workers
+        self._cpu_pool: Optional[ProcessPoolExecutor] = None
+        
+        self._cache: Optional[sqlite3.Connection] = None
+        if cache_path:
+            os.makedirs(os.path.dirname(cache_path) or ".", exist_ok=True)
+            self._cache = sqlite3.connect(cache_path, check_same_thread=False)
+            self._cache.execute(
+                "CREATE TABLE IF NOT EXISTS chunks ("
+                "path TEXT PRIMARY KEY, mtime INTEGER, size INTEGER, "
+                "chunk_size INTEGER, chunk_overlap INTEGER, payload BLOB, "
+                "used_at REAL DEFAULT 0)"
+            )
+            columns = {row[1] for row in self._cache.execute("PRAGMA table_info(chunks)")}
+            if "used_at" not in columns:
+                # Cache files from before eviction was added
+                self._cache.execute("ALTER TABLE chunks ADD COLUMN used_at REAL DEFAULT 0")
     
     async def process_directory(self, directory_path: str) -> List[Document]:
         """
@@ -63,30 +254,67 @@ class DocumentProcessor:
         Returns:
             List of processed documents
         """
-        documents = []
+        supported_files = self._find_supported_files(directory_path)
+        semaphore = asyncio.Semaphore(self.max_concurrent_extractions)
+        
+        results = await asyncio.gather(
+            *(self._extract_file(file_path, semaphore) for file_path in supported_files)
+        )
+        self._commit_cache()
+        return [document for file_documents in results for document in file_documents]
+    
+    async def iter_directory(self, directory_path: str) -> AsyncIterator[Document]:
+        """
+        Yield document chunks file by file as each one is processed.
+        
+        Args:
+            directory_path: Path to directory containing documents
+            
+        Yields:
+            Processed document chunks, in file completion order
+        """
+        supported_files = self._find_supported_files(directory_path)
+        semaphore = asyncio.Semaphore(self.max_concurrent_extractions)
+        
+        tasks = [
+            asyncio.ensure_future(self._extract_file(file_path, semaphore))
+            for file_path in supported_files
+        ]
+        try:
+            for next_done in asyncio.as_completed(tasks):
+                for document in await next_done:
+                    yield document
+        finally:
+            for task in tasks:
+                task.cancel()
+            self._commit_cache()
+    
+    def _find_supported_files(self, directory_path: str) -> List[Path]:
+        """List supported files under a directory."""
         directory = Path(directory_path)
         
         if not directory.exists():
             logger.warning(f"Directory not found: {directory_path}")
-            return documents
+            return []
         
-        # Find all supported files
-        supported_files = []
-        for ext in self.SUPPORTED_EXTENSIONS:
-            supported_files.extend(directory.rglob(f"*{ext}"))
+        # Find all supported files in a single walk
+        extensions = tuple(self.SUPPORTED_EXTENSIONS)
+        supported_files = [Path(p) for p in _iter_files(str(directory), extensions)]
         
         logger.info(f"Found {len(supported_files)} supported files")
-        
-        # Process each file
-        for file_path in supported_files:
+        return supported_files
+    
+    async def _extract_file(self, file_path: Path, semaphore: asyncio.Semaphore) -> List[Document]:
+        """Process one file under the concurrency limit, logging failures."""
+        async with semaphore:
             try:
-                file_documents = await self.process_file(str(file_path))
-                documents.extend(file_documents)
-                logger.info(f"Processed {file_path.name}: {len(file_documents)} chunks")
+                file_documents = await self._process_file(str(file_path))
             except Exception as e:
                 logger.error(f"Failed to process {file_path}: {e}")
+                return []
         
-        return documents
+        logger.info(f"Processed {file_path.name}: {len(file_documents)} chunks")
+        return file_documents
     
     async def process_file(self, file_path: str) -> List[Document]:
         """
@@ -98,32 +326,50 @@ class DocumentProcessor:
         Returns:
             List of document chunks
         """
+        try:
+            return await self._process_file(file_path)
+        finally:
+            # Directory scans commit once at the end; a single file commits here
+            self._commit_cache()
+    
+    async def _process_file(self, file_path: str) -> List[Document]:
+        """Process one file, leaving chunk cache writes uncommitted."""
         path = Path(file_path)
+        extension = path.suffix.lower()
         
-        if not path.exists():
+        try:
+            stat = path.stat()
+        except FileNotFoundError:
             raise FileNotFoundError(f"File not found: {file_path}")
         
-        extension = path.suffix.lower()
-        
         if extension not in self.SUPPORTED_EXTENSIONS:
             raise ValueError(f"Unsupported file type: {extension}")
         
-        # Extract text based on file type
-        if extension == '.txt':
-            text = await self._read_text_file(file_path)
-        elif extension == '.md':
-            text = await self._read_markdown_file(file_path)
-        elif extension == '.pdf':
-            text = await self._read_pdf_file(file_path)
-        elif extension == '.docx':
-            text = await self._read_docx_file(file_path)
-        elif extension in ['.html', '.htm']:
-            text = await self._read_html_file(file_path)
+        cached = self._cache_lookup(file_path, stat)
+        if cached is not None:
+            return cached
+        
+        # Extract text based on file type and split into chunks
+        if extension == '.pdf':
+            # Chunk pages as they are extracted instead of joining the whole PDF first
+            chunks = [chunk async for chunk in self._split_stream(self._iter_pdf_pages(file_path))]
         else:
-            raise ValueError(f"Unsupported file type: {extension}")
+            if extension == '.txt':
+                text = await self._read_text_file(file_path)
+            elif extension == '.md':
+                text = await self._read_markdown_file(file_path)
+            elif extension == '.docx':
+                text = await self._read_docx_file(file_path)
+            elif extension in ['.html', '.htm']:
+                text = await self._read_html_file(file_path)
+            else:
+                raise ValueError(f"Unsupported file type: {extension}")
+            
+            chunks = self._split_text(text) if text.strip() else []
         
-        if not text.strip():
+        if not chunks:
             logger.warning(f"No text extracted from {file_path}")
+            self._cache_store(file_path, stat, [])
             return []
         
         # Create metadata
@@ -131,23 +377,21 @@ class DocumentProcessor:
             'source': str(path),
             'filename': path.name,
             'extension': extension,
-            'size': path.stat().st_size,
-            'modified': path.stat().st_mtime,
+            'size': stat.st_size,
+            'modified': stat.st_mtime,
             'type': self.SUPPORTED_EXTENSIONS[extension]
         }
         
-        # Split into chunks
-        chunks = self._split_text(text)
-        
-        # Create documents
+        # Create documents; chunks share the file metadata and only own
+        # their chunk position
         documents = []
+        path_bytes = file_path.encode()
         for i, chunk in enumerate(chunks):
-            doc_id = self._generate_doc_id(file_path, i)
-            chunk_metadata = metadata.copy()
-            chunk_metadata.update({
+            doc_id = self._generate_doc_id(path_bytes, i)
+            chunk_metadata = ChainMap({
                 'chunk_index': i,
                 'chunk_count': len(chunks)
-            })
+            }, metadata)
             
             documents.append(Document(
                 content=chunk,
@@ -155,67 +399,131 @@ class DocumentProcessor:
                 doc_id=doc_id
             ))
         
+        self._cache_store(file_path, stat, documents)
         return documents
     
+    def _cache_lookup(self, file_path: str, stat: os.stat_result) -> Optional[List[Document]]:
+        """Return cached chunks if the file and chunk settings are unchanged."""
+        if self._cache is None:
+            return None
+        row = self._cache.execute(
+            "SELECT payload FROM chunks WHERE path = ? AND mtime = ? AND size = ? "
+            "AND chunk_size = ? AND chunk_overlap = ?",
+            (file_path, stat.st_mtime_ns, stat.st_size, self.chunk_size, self.chunk_overlap)
+        ).fetchone()
+        if row is None:
+            return None
+        self._cache.execute(
+            "UPDATE chunks SET used_at = ? WHERE path = ?", (time.time(), file_path)
+        )
+        try:
+            return pickle.loads(row[0])
+        except Exception as e:
+            # Entries written by an older Document layout are re-extracted
+            logger.debug(f"Ignoring unreadable cache entry for {file_path}: {e}")
+            return None
+    
+    def _cache_store(self, file_path: str, stat: os.stat_result, documents: List[Document]):
+        """Remember the chunks produced for a file version (committed in batches)."""
+        if self._cache is None:
+            return
+        self._cache.execute(
+            "INSERT OR REPLACE INTO chunks VALUES (?, ?, ?, ?, ?, ?, ?)",
+            (file_path, stat.st_mtime_ns, stat.st_size, self.chunk_size,
+             self.chunk_overlap, pickle.dumps(documents, pickle.HIGHEST_PROTOCOL),
+             time.time())
+        )
+    
+    def _commit_cache(self):
+        """Evict the least recently used entries and commit pending cache
+        writes in one transaction."""
+        if self._cache is not None:
+            self._cache.execute(
+                "DELETE FROM chunks WHERE path IN ("
+                "SELECT path FROM chunks ORDER BY used_at DESC, rowid DESC LIMIT -1 OFFSET ?)",
+                (_CHUNK_CACHE_MAX_ENTRIES,)
+            )
+            self._cache.commit()
+    
     async def _read_text_file(self, file_path: str) -> str:
         """Read plain text file."""
-        try:
-            with open(file_path, 'r', encoding='utf-8') as f:
-                return f.read()
-        except UnicodeDecodeError:
-            # Try with different encoding
-            with open(file_path, 'r', encoding='latin-1') as f:
-                return f.read()
+        if os.path.getsize(file_path) > _MMAP_THRESHOLD:
+            return await asyncio.to_thread(_read_mapped_text, file_path)
+        return _decode_text(await _async_read_bytes(file_path))
     
     async def _read_markdown_file(self, file_path: str) -> str:
         """Read markdown file and convert to text."""
         try:
             import markdown
-            with open(file_path, 'r', encoding='utf-8') as f:
-                md_content = f.read()
+            md_content = await self._read_text_file(file_path)
             
             # Convert markdown to HTML then to text
-            html = markdown.markdown(md_content)
-            soup = BeautifulSoup(html, 'html.parser')
-            return soup.get_text()
+            return _cached_markup_text(
+                md_content, b'markdown', lambda md: _html_to_text(markdown.markdown(md))
+            )
         except ImportError:
             # Fallback to reading as plain text
             return await self._read_text_file(file_path)
     
-    async def _read_pdf_file(self, file_path: str) -> str:
-        """Read PDF file."""
+    async def _iter_pdf_pages(self, file_path: str) -> AsyncIterator[str]:
+        """Yield PDF page texts, extracting the next batch while the current one is consumed."""
         try:
-            import pypdf
-            text = ""
-            with open(file_path, 'rb') as f:
-                reader = pypdf.PdfReader(f)
-                for page in reader.pages:
-                    text += page.extract_text() + "\n"
-            return text
+            pages, page_count = await self._run_in_cpu_pool(
+                _pdf_extract_pages, file_path, 0, _PDF_PAGE_BATCH
+            )
         except ImportError:
             raise ImportError("pypdf library is required for PDF processing. Install with: pip install pypdf")
+        
+        start = _PDF_PAGE_BATCH
+        pending = None
+        try:
+            while True:
+                if start < page_count:
+                    pending = asyncio.ensure_future(self._run_in_cpu_pool(
+                        _pdf_extract_pages, file_path, start, start + _PDF_PAGE_BATCH
+                    ))
+                
+                for page in pages:
+                    yield page
+                
+                if pending is None:
+                    return
+                pages, _ = await pending
+                pending = None
+                start += _PDF_PAGE_BATCH
+        finally:
+            if pending is not None:
+                pending.cancel()
     
     async def _read_docx_file(self, file_path: str) -> str:
         """Read DOCX file."""
         try:
-            from docx import Document as DocxDocument
-            doc = DocxDocument(file_path)
-            text = ""
-            for paragraph in doc.paragraphs:
-                text += paragraph.text + "\n"
-            return text
+            return await self._run_in_cpu_pool(_docx_extract, file_path)
         except ImportError:
             raise ImportError("python-docx library is required for DOCX processing. Install with: pip install python-docx")
     
+    async def _run_in_cpu_pool(self, func, *args):
+        """Run a CPU-bound extractor in the worker process pool."""
+        if self._cpu_pool is None:
+            self._cpu_pool = ProcessPoolExecutor(max_workers=os.cpu_count())
+        return await asyncio.get_running_loop().run_in_executor(self._cpu_pool, func, *args)
+    
+    def close(self):
+        """Shut down the worker process pool and close the chunk cache."""
+        if self._cpu_pool is not None:
+            self._cpu_pool.shutdown(cancel_futures=True)
+            self._cpu_pool = None
+        
+        if self._cache is not None:
+            self._commit_cache()
+            self._cache.close()
+            self._cache = None
+    
     async def _read_html_file(self, file_path: str) -> str:
         """Read HTML file."""
         try:
-            from bs4 import BeautifulSoup
-            with open(file_path, 'r', encoding='utf-8') as f:
-                html_content = f.read()
-            
-            soup = BeautifulSoup(html_content, 'html.parser')
-            return soup.get_text()
+            html_content = await self._read_text_file(file_path)
+            return _cached_markup_text(html_content, b'html', _html_to_text)
         except ImportError:
             raise ImportError("beautifulsoup4 library is required for HTML processing. Install with: pip install beautifulsoup4")
     
@@ -232,36 +540,114 @@ class DocumentProcessor:
         if len(text) <= self.chunk_size:
             return [text]
         
+        chunks, _ = self._cut_chunks(text, final=True)
+        return [chunk for chunk in map(str.strip, chunks) if chunk]
+    
+    async def _split_stream(self, pieces: AsyncIterator[str]) -> AsyncIterator[str]:
+        """
+        Split newline-joined text pieces into chunks as they arrive.
+        
+        Produces the same chunks as _split_text on the joined text, while only
+        holding the text that has not been chunked yet.
+        
+        Args:
+            pieces: Text pieces (e.g. PDF pages)
+            
+        Returns:
+            Async iterator of text chunks
+        """
+        buffer = None
+        emitted = False
+        
+        async for piece in pieces:
+            buffer = piece if buffer is None else f"{buffer}\n{piece}"
+            
+            chunks, start = self._cut_chunks(buffer, final=False)
+            if chunks:
+                emitted = True
+                buffer = buffer[start:]
+                for chunk in map(str.strip, chunks):
+                    if chunk:
+                        yield chunk
+        
+        if buffer is None or not buffer.strip():
+            return
+        
+        if not emitted and len(buffer) <= self.chunk_size:
+            yield buffer
+            return
+        
+        chunks, _ = self._cut_chunks(buffer, final=True)
+        for chunk in map(str.strip, chunks):
+            if chunk:
+                yield chunk
+    
+    def _cut_chunks(self, text: str, final: bool):
+        """
+        Cut overlapping chunk windows from text.
+        
+        Args:
+            text: Text to cut
+            final: Whether text ends the document; otherwise stop before the
+                window that would reach the end of text, as more may follow
+            
+        Returns:
+            Tuple of (unstripped chunks, offset where the uncut text starts)
+        """
+        # Find every sentence boundary once, grouped by delimiter
+        boundaries = {delimiter: [] for delimiter in _SENTENCE_DELIMITERS}
+        for match in _SENTENCE_BOUNDARY.finditer(text):
+            boundaries[match.group()].append(match.start())
+        boundary_lists = [boundaries[delimiter] for delimiter in _SENTENCE_DELIMITERS]
+        
         chunks = []
         start = 0
+        text_len = len(text)
+        # Breaks must fall past the middle of a window so chunks don't get too small
+        min_break = self.chunk_size // 2 + 1
         
-        while start < len(text):
+        while start < text_len:
             end = start + self.chunk_size
             
-            if end >= len(text):
-                # Last chunk
-                chunks.append(text[start:])
+            if end >= text_len:
+                if final:
+                    # Last chunk
+                    chunks.append(text[start:])
                 break
             
-            # Try to find a good break point (sentence end, paragraph, etc.)
-            chunk_text = text[start:end]
-            
-            # Look for sentence endings
-            for delimiter in ['. ', '.\n', '!\n', '?\n']:
-                last_delimiter = chunk_text.rfind(delimiter)
-                if last_delimiter > self.chunk_size * 0.5:  # Don't make chunks too small
-                    end = start + last_delimiter + len(delimiter)
+            # Take the last boundary of the highest-priority delimiter that
+            # fits entirely in the second half (all delimiters are 2 chars)
+            for positions in boundary_lists:
+                i = bisect.bisect_right(positions, end - 2) - 1
+                if i >= 0 and positions[i] >= start + min_break:
+                    end = positions[i] + 2
                     break
             
             chunks.append(text[start:end])
             start = end - self.chunk_overlap
         
-        return [chunk.strip() for chunk in chunks if chunk.strip()]
+        return chunks, start
     
-    def _generate_doc_id(self, file_path: str, chunk_index: int) -> str:
-        """Generate unique document ID."""
-        content = f"{file_path}_{chunk_index}"
-        return hashlib.md5(content.encode()).hexdigest()
+    def _generate_doc_id(self, path_bytes: bytes, chunk_index: int) -> str:
+        """Generate unique document ID from the encoded file path and chunk index.
+
+        Always BLAKE2b (hashlib): IDs are stored in the vector store, so they
+        must not depend on which optional packages are installed.
+        """
+        hasher = hashlib.blake2b(path_bytes, digest_size=16)
+        hasher.update(chunk_index.to_bytes(8, 'little'))
+        return hasher.hexdigest()
+
+
+def _install_uvloop():
+    """Use uvloop's event loop policy when it is installed (not on Windows)."""
+    if sys.platform == "win32":
+        return
+    try:
+        import uvloop
+        uvloop.install()
+    except ImportError:
+        pass
 
 
 # Example usage
@@ -271,11 +657,13 @@ if __name__ == "__main__":
         
         # Process a directory
         documents = await processor.process_directory("data/documents")
+        processor.close()
         
         print(f"Processed {len(documents)} document chunks")
         
         if documents:
             print(f"First document preview: {documents[0].content[:200]}...")
-            print(f"Metadata: {documents[0].metadata}")
+            print(f"Metadata: {documents[0].metadata_dict()}")
     
+    _install_uvloop()
     asyncio.run(main())
\ No newline at end of file
@@ -4,16 +4,19 @@ Document retrieval system for RAG.
 
 import asyncio
 import logging
+import re
 from typing import List, Dict, Any, Optional
 from dataclasses import dataclass
 
+import numpy as np
+
 from .vector_store import VectorStore
 from .document_processor import Document
 
 logger = logging.getLogger(__name__)
 
 
-@dataclass
+@dataclass(slots=True)
 class RetrievedDocument:
     """Container for retrieved document with similarity score."""
     content: str
@@ -52,7 +55,8 @@ class DocumentRetriever:
         
         Args:
             query: Search query
-            **kwargs: Additional parameters (top_k, similarity_threshold)
+            **kwargs: Additional parameters (top_k, similarity_threshold,
+                where metadata filter)
             
         Returns:
             List of retrieved documents
@@ -60,6 +64,7 @@ class DocumentRetriever:
         # Override defaults with kwargs
         top_k = kwargs.get('top_k', self.top_k)
         similarity_threshold = kwargs.get('similarity_threshold', self.similarity_threshold)
+        where = kwargs.get('where')
         
         try:
             logger.info(f"Retrieving documents for query: '{query[:50]}...'")
@@ -68,7 +73,8 @@ class DocumentRetriever:
             search_results = await self.vector_store.search(
                 query=query,
                 top_k=top_k * 2,  # Get more results for potential reranking
-                similarity_threshold=similarity_threshold
+                similarity_threshold=similarity_threshold,
+                where=where
             )
             
             if not search_results:
@@ -141,40 +147,44 @@ class DocumentRetriever:
         Args:
             query: Search query
             doc_type: Document type to filter by (pdf, txt, etc.)
-            **kwargs: Additional parameters
+            **kwargs: Additional parameters; a caller's ``where`` filter is
+                combined with the type filter
             
         Returns:
             List of retrieved documents of specified type
         """
-        # Get all documents first
-        all_docs = await self.retrieve(query, **kwargs)
-        
-        # Filter by type
-        filtered_docs = []
-        for doc in all_docs:
-            doc_doc_type = doc.metadata.get('type', '')
-            if doc_type.lower() == doc_doc_type.lower():
-                filtered_docs.append(doc)
+        # Let the vector store apply the type filter during the search, so
+        # top_k is filled with matching documents instead of filtered down
+        type_filter = {'type': doc_type.lower()}
+        where = kwargs.pop('where', None)
+        # ChromaDB takes a single field per filter; combine the two with $and
+        kwargs['where'] = {'$and': [where, type_filter]} if where else type_filter
+        filtered_docs = await self.retrieve(query, **kwargs)
         
         logger.info(f"Filtered to {len(filtered_docs)} documents of type '{doc_type}'")
         return filtered_docs
     
     async def get_document_context(
         self,
-        query: str,
-        max_chars: int = 4000
+        query: Optional[str] = None,
+        max_chars: int = 4000,
+        docs: Optional[List[RetrievedDocument]] = None
     ) -> str:
         """
         Get concatenated context from retrieved documents.
         
         Args:
-            query: Search query
+            query: Search query (used only when docs is not given)
             max_chars: Maximum characters to return
+            docs: Already retrieved documents, to avoid a second search
             
         Returns:
             Concatenated document context
         """
-        docs = await self.retrieve(query)
+        if docs is None:
+            if query is None:
+                raise ValueError("Either query or docs must be provided")
+            docs = await self.retrieve(query)
         
         if not docs:
             return ""
@@ -186,8 +196,9 @@ class DocumentRetriever:
             # Add source information
             source = doc.metadata.get('filename', f'Document {i+1}')
             doc_text = f"[Source: {source}]\n{doc.content}\n"
+            doc_chars = len(doc_text)
             
-            if total_chars + len(doc_text) > max_chars:
+            if total_chars + doc_chars > max_chars:
                 # Truncate the last document to fit
                 remaining_chars = max_chars - total_chars
                 if remaining_chars > 100:  # Only add if meaningful
@@ -196,7 +207,7 @@ class DocumentRetriever:
                 break
             
             context_parts.append(doc_text)
-            total_chars += len(doc_text)
+            total_chars += doc_chars
         
         context = "\n---\n".join(context_parts)
         logger.info(f"Generated context with {len(context)} characters from {len(context_parts)} documents")
@@ -221,28 +232,39 @@ class DocumentRetriever:
         try:
             # Simple reranking based on query term frequency and document recency
             query_terms = set(query.lower().split())
+            count = len(documents)
+            
+            # Count distinct query terms per document with one C-level regex
+            # scan, matching case-insensitively instead of lowercasing content
+            if query_terms:
+                pattern = re.compile('|'.join(
+                    map(re.escape, sorted(query_terms, key=len, reverse=True))
+                ), re.IGNORECASE)
+                term_matches = np.fromiter(
+                    (len({match.lower() for match in pattern.findall(doc.content)}) for doc in documents),
+                    dtype=np.float32, count=count
+                )
+                term_boost = term_matches / len(query_terms)
+            else:
+                term_boost = np.zeros(count, dtype=np.float32)
+            
+            similarities = np.fromiter((doc.similarity for doc in documents), dtype=np.float64, count=count)
+            modified_times = np.fromiter(
+                (doc.metadata.get('modified', 0) for doc in documents), dtype=np.float64, count=count
+            )
             
-            for doc in documents:
-                # Count query term matches
-                doc_text = doc.content.lower()
-                term_matches = sum(1 for term in query_terms if term in doc_text)
-                
-                # Boost score based on term frequency
-                term_boost = term_matches / len(query_terms) if query_terms else 0
-                
-                # Boost newer documents slightly
-                modified_time = doc.metadata.get('modified', 0)
-                recency_boost = min(0.1, modified_time / 1000000000000)  # Small boost for recent docs
-                
-                # Calculate new similarity score
-                doc.similarity = doc.similarity + (term_boost * 0.1) + recency_boost
+            # Boost score based on term frequency, and newer documents slightly
+            recency_boost = np.minimum(0.1, modified_times / 1000000000000)
+            new_similarities = similarities + term_boost * 0.1 + recency_boost
             
-            # Sort by new similarity scores
-            documents.sort(key=lambda x: x.similarity, reverse=True)
+            # Sort by new similarity scores (stable, like list.sort)
+            order = np.argsort(-new_similarities, kind='stable')
+            documents = [documents[i] for i in order]
             
-            # Update ranks
-            for i, doc in enumerate(documents):
-                doc.rank = i + 1
+            # Update scores and ranks
+            for rank, (doc, similarity) in enumerate(zip(documents, new_similarities[order].tolist()), 1):
+                doc.similarity = similarity
+                doc.rank = rank
             
             logger.info("Documents reranked successfully")
             return documents
@@ -311,7 +333,7 @@ if __name__ == "__main__":
                 print("---")
             
             # Test context generation
-            context = await retriever.get_document_context(query, max_chars=500)
+            context = await retriever.get_document_context(query, max_chars=500, docs=docs)
             print(f"\nGenerated context ({len(context)} chars):\n{context}")
             
             # Get stats
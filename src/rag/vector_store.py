@@ -2,11 +2,17 @@
 Vector store implementation using ChromaDB.
 """
 
+import os
+import time
 import asyncio
+import hashlib
 import logging
-from typing import List, Dict, Any, Optional
+from typing import List, Dict, Any, Optional, Callable
+from concurrent.futures import ProcessPoolExecutor
 import uuid
 
+import numpy as np
+
 try:
     import chromadb
     from chromadb.config import Settings
@@ -14,10 +20,150 @@ try:
 except ImportError as e:
     logging.warning(f"ChromaDB or sentence-transformers not available: {e}")
 
-from .document_processor import Document
+try:
+    from hf_hub_ctranslate2 import CT2SentenceTransformer
+    CT2_AVAILABLE = True
+except ImportError:
+    CT2_AVAILABLE = False
+
+from .document_processor import Document, DOC_ID_SCHEME
 
 logger = logging.getLogger(__name__)
 
+# Embeddings are normalized, so cosine distance gives 1 - cosine similarity.
+# HNSW graph parameters only apply to newly created collections.
+COLLECTION_METADATA = {
+    "description": "Document embeddings for RAG",
+    "id_scheme": DOC_ID_SCHEME,
+    "hnsw:space": "cosine",
+    "hnsw:construction_ef": 200,
+    "hnsw:M": 32,
+    "hnsw:search_ef": 64
+}
+
+# Searches whose query embedding is this close to a recent one reuse its results
+SEMANTIC_CACHE_SIZE = 1024
+SEMANTIC_CACHE_THRESHOLD = 0.97
+
+# Collections up to this size are searched with one NumPy matrix-vector
+# product over an in-memory copy of the embeddings instead of ChromaDB
+BRUTE_FORCE_MAX_DOCUMENTS = 20000
+
+# Seconds a document count is reused (UI reruns ask for it constantly)
+COUNT_CACHE_TTL = 2.0
+
+# Texts encoded per model forward pass, and documents per ChromaDB add/delete call
+EMBEDDING_BATCH_SIZE = 64
+ADD_BATCH_SIZE = 500
+DELETE_BATCH_SIZE = 5000
+
+
+# Encoder owned by each worker process of an encoder pool
+_worker_model = None
+
+
+def _init_encoder_worker(model_name: str):
+    """Load the sentence transformer once per encoder worker process."""
+    global _worker_model
+    import torch
+    from sentence_transformers import SentenceTransformer
+    # Workers split the cores between them; one intra-op thread each
+    torch.set_num_threads(1)
+    _worker_model = SentenceTransformer(model_name, device="cpu")
+
+
+def _encode_in_worker(texts: List[str], batch_size: int) -> np.ndarray:
+    """Embed texts with the worker's sentence transformer."""
+    return _worker_model.encode(
+        texts,
+        batch_size=batch_size,
+        convert_to_numpy=True,
+        show_progress_bar=False,
+        normalize_embeddings=True
+    ).astype(np.float32, copy=False)
+
+
+def _content_hash(text: str) -> str:
+    """Hash chunk content to recognise text that is already stored.
+
+    Always BLAKE2b: the hash is persisted, so it must not depend on which
+    optional packages are installed.
+    """
+    return hashlib.blake2b(text.encode('utf-8', 'surrogatepass'), digest_size=16).hexdigest()
+
+
+class EmbeddingBatcher:
+    """Coalesces concurrent single-text embedding requests into batched encode calls."""
+    
+    def __init__(
+        self,
+        encode: Callable[[List[str]], np.ndarray],
+        max_batch_size: int = 32,
+        flush_ms: float = 25.0
+    ):
+        """
+        Initialize embedding batcher.
+        
+        Args:
+            encode: Blocking function embedding a list of texts (run in a thread)
+            max_batch_size: Most texts encoded in one call
+            flush_ms: How long to wait for more requests after the first one
+        """
+        self._encode = encode
+        self.max_batch_size = max_batch_size
+        self.flush_delay = flush_ms / 1000.0
+        
+        self._queue: Optional[asyncio.Queue] = None
+        self._worker: Optional[asyncio.Task] = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+    
+    async def submit(self, text: str) -> np.ndarray:
+        """Embed one text, sharing an encode call with concurrent requests."""
+        loop = asyncio.get_running_loop()
+        if self._worker is None or self._worker.done() or self._loop is not loop:
+            self._loop = loop
+            self._queue = asyncio.Queue()
+            self._worker = loop.create_task(self._run())
+        
+        future = loop.create_future()
+        await self._queue.put((text, future))
+        return await future
+    
+    async def _run(self):
+        """Collect requests for up to flush_ms, then encode them together."""
+        loop = asyncio.get_running_loop()
+        while True:
+            batch = [await self._queue.get()]
+            deadline = loop.time() + self.flush_delay
+            
+            while len(batch) < self.max_batch_size:
+                timeout = deadline - loop.time()
+                if timeout <= 0:
+                    break
+                try:
+                    batch.append(await asyncio.wait_for(self._queue.get(), timeout))
+                except asyncio.TimeoutError:
+                    break
+            
+            texts = [text for text, _ in batch]
+            try:
+                embeddings = await asyncio.to_thread(self._encode, texts)
+            except Exception as e:
+                for _, future in batch:
+                    if not future.done():
+                        future.set_exception(e)
+                continue
+            
+            for (_, future), embedding in zip(batch, embeddings):
+                if not future.done():
+                    future.set_result(embedding)
+    
+    async def close(self):
+        """Stop the background batching task."""
+        if self._worker is not None:
+            self._worker.cancel()
+            self._worker = None
+
 
 class VectorStore:
     """ChromaDB-based vector store for document embeddings."""
@@ -26,7 +172,8 @@ class VectorStore:
         self,
         persist_directory: str = "models/chromadb",
         collection_name: str = "documents",
-        embedding_model: str = "all-MiniLM-L6-v2"
+        embedding_model: str = "all-MiniLM-L6-v2",
+        encoder_processes: int = 0
     ):
         """
         Initialize vector store.
@@ -35,14 +182,37 @@ class VectorStore:
             persist_directory: Directory to persist ChromaDB data
             collection_name: Name of the collection
             embedding_model: Sentence transformer model for embeddings
+            encoder_processes: CPU worker processes that each own an encoder,
+                so concurrent embeddings run in parallel (0 encodes in-process)
         """
         self.persist_directory = persist_directory
         self.collection_name = collection_name
         self.embedding_model_name = embedding_model
+        self.encoder_processes = encoder_processes
         
         self.client = None
         self.collection = None
         self.embedding_model = None
+        self._encoder_pool: Optional[ProcessPoolExecutor] = None
+        self._batcher = EmbeddingBatcher(self._encode_batch)
+        
+        # Semantic search cache: ring buffer of normalized query embeddings
+        # with the (search parameters, results) of each entry
+        self._query_cache_embeddings: Optional[np.ndarray] = None
+        self._query_cache_entries: List[tuple] = []
+        self._query_cache_next = 0
+        self._query_cache_lookups = 0
+        self._query_cache_hits = 0
+        
+        # Brute-force index for small collections: ids and float32 embedding
+        # rows in the same order; None until loaded, reset when it may be stale
+        self._index_ids: Optional[List[str]] = None
+        self._index_matrix: Optional[np.ndarray] = None
+        self._index_version = 0
+        self._index_too_large_version = -1
+        
+        # (monotonic time, count) of the last get_document_count
+        self._count_cache: Optional[tuple] = None
         self._initialized = False
     
     async def initialize(self):
@@ -60,23 +230,97 @@ class VectorStore:
                 )
             )
             
-            # Get or create collection
-            self.collection = self.client.get_or_create_collection(
-                name=self.collection_name,
-                metadata={"description": "Document embeddings for RAG"}
-            )
+            # Get or create collection; an existing collection keeps the
+            # distance it was created with (only a clear switches it)
+            try:
+                self.collection = self.client.get_collection(name=self.collection_name)
+            except Exception:
+                self.collection = self.client.create_collection(
+                    name=self.collection_name,
+                    metadata=dict(COLLECTION_METADATA)
+                )
+            
+            # IDs from another scheme (e.g. the old md5 IDs) would never match
+            # re-added chunks and leave every document stored twice
+            if (self.collection.metadata or {}).get("id_scheme") != DOC_ID_SCHEME:
+                logger.warning(
+                    f"Collection '{self.collection_name}' uses an older document ID scheme; "
+                    "recreating it, reload your documents"
+                )
+                self.client.delete_collection(name=self.collection_name)
+                self.collection = self.client.create_collection(
+                    name=self.collection_name,
+                    metadata=dict(COLLECTION_METADATA)
+                )
+            
+            space = self._distance_space()
+            if space != "cosine":
+                logger.info(f"Collection uses '{space}' distance; clear it to switch to cosine")
             
             # Initialize embedding model
             logger.info(f"Loading embedding model: {self.embedding_model_name}")
-            self.embedding_model = SentenceTransformer(self.embedding_model_name)
+            if self.encoder_processes > 0:
+                self._encoder_pool = ProcessPoolExecutor(
+                    max_workers=self.encoder_processes,
+                    initializer=_init_encoder_worker,
+                    initargs=(self.embedding_model_name,)
+                )
+            else:
+                self.embedding_model = self._load_embedding_model()
             
             self._initialized = True
             logger.info("Vector store initialized successfully")
             
+            await self._warm_up()
+            
         except Exception as e:
             logger.error(f"Failed to initialize vector store: {e}")
             raise
     
+    def _load_embedding_model(self):
+        """
+        Load the encoder on the best available device.
+        
+        Prefers an int8 CTranslate2 build when installed; otherwise uses
+        sentence-transformers in fp16 on CUDA, or fp32 on all CPU cores.
+        """
+        import torch
+        device = "cuda" if torch.cuda.is_available() else "cpu"
+        
+        if CT2_AVAILABLE:
+            try:
+                model = CT2SentenceTransformer(
+                    self.embedding_model_name,
+                    compute_type="int8" if device == "cpu" else "int8_float16",
+                    device=device
+                )
+                logger.info(f"Using CTranslate2 int8 encoder on {device}")
+                return model
+            except Exception as e:
+                logger.warning(f"CTranslate2 encoder unavailable, using sentence-transformers: {e}")
+        
+        model = SentenceTransformer(self.embedding_model_name, device=device)
+        if device == "cuda":
+            model.half()
+        else:
+            torch.set_num_threads(os.cpu_count() or 1)
+        logger.info(f"Using sentence-transformers encoder on {device} ({'fp16' if device == 'cuda' else 'fp32'})")
+        return model
+    
+    async def _warm_up(self):
+        """Run a throwaway search so the first user query skips cold-start costs."""
+        try:
+            if await self.get_document_count() == 0:
+                return
+            embedding = await self._generate_embedding("warm up")
+            # Small collections are searched from the NumPy index instead of HNSW
+            if not await self._load_index():
+                await asyncio.to_thread(
+                    self.collection.query, query_embeddings=[embedding.tolist()], n_results=1
+                )
+        except Exception as e:
+            logger.debug(f"Vector store warm-up failed: {e}")
+    
     async def add_documents(self, documents: List[Document]) -> bool:
         """
         Add documents to the vector store.
@@ -97,29 +341,66 @@ class VectorStore:
         try:
             logger.info(f"Adding {len(documents)} documents to vector store")
             
-            # Prepare data for ChromaDB
-            ids = []
-            embeddings = []
-            metadatas = []
-            documents_text = []
+            # Skip chunks stored under the same ID with the same content;
+            # changed chunks are overwritten in place by the upsert below
+            hashes = [_content_hash(doc.content) for doc in documents]
+            stored = await asyncio.to_thread(
+                self._stored_hashes, [doc.doc_id for doc in documents]
+            )
+            new_documents = []
+            new_hashes = []
+            for doc, content_hash in zip(documents, hashes):
+                if stored.get(doc.doc_id) != content_hash:
+                    stored[doc.doc_id] = content_hash
+                    new_documents.append(doc)
+                    new_hashes.append(content_hash)
             
+            # A file that shrank leaves chunks past its new chunk count behind
+            chunk_counts = {}
             for doc in documents:
-                # Generate embedding
-                embedding = await self._generate_embedding(doc.content)
-                
-                ids.append(doc.doc_id)
-                embeddings.append(embedding)
-                metadatas.append(doc.metadata)
-                documents_text.append(doc.content)
-            
-            # Add to collection
-            self.collection.add(
-                ids=ids,
-                embeddings=embeddings,
-                metadatas=metadatas,
-                documents=documents_text
+                source = doc.metadata.get('source')
+                if source is not None and 'chunk_count' in doc.metadata:
+                    chunk_counts[source] = doc.metadata['chunk_count']
+            stale_ids = await asyncio.to_thread(self._stale_chunk_ids, chunk_counts)
+            if stale_ids:
+                logger.info(f"Deleting {len(stale_ids)} chunks left over from shorter file versions")
+                await self.delete_documents(stale_ids)
+            
+            skipped = len(documents) - len(new_documents)
+            if skipped:
+                logger.info(f"Skipping {skipped} documents with already stored content")
+            if not new_documents:
+                return True
+            documents = new_documents
+            
+            # Prepare data for ChromaDB
+            ids = [doc.doc_id for doc in documents]
+            metadatas = [
+                {**doc.metadata_dict(), 'content_hash': content_hash}
+                for doc, content_hash in zip(documents, new_hashes)
+            ]
+            documents_text = [doc.content for doc in documents]
+            
+            # Generate all embeddings in batched forward passes
+            embeddings = await asyncio.to_thread(
+                self._encode_texts, documents_text, EMBEDDING_BATCH_SIZE
             )
             
+            # Upsert into the collection in bounded slices
+            self._clear_query_cache()
+            try:
+                for start in range(0, len(documents), ADD_BATCH_SIZE):
+                    stop = start + ADD_BATCH_SIZE
+                    await asyncio.to_thread(
+                        self.collection.upsert,
+                        ids=ids[start:stop],
+                        embeddings=embeddings[start:stop].tolist(),
+                        metadatas=metadatas[start:stop],
+                        documents=documents_text[start:stop]
+                    )
+            finally:
+                self._invalidate_index()
+            
             logger.info(f"Successfully added {len(documents)} documents")
             return True
             
@@ -131,7 +412,8 @@ class VectorStore:
         self,
         query: str,
         top_k: int = 5,
-        similarity_threshold: float = 0.7
+        similarity_threshold: float = 0.7,
+        where: Optional[Dict[str, Any]] = None
     ) -> List[Dict[str, Any]]:
         """
         Search for similar documents.
@@ -140,6 +422,7 @@ class VectorStore:
             query: Search query
             top_k: Number of results to return
             similarity_threshold: Minimum similarity score
+            where: ChromaDB metadata filter applied during the search
             
         Returns:
             List of search results with documents and scores
@@ -151,47 +434,141 @@ class VectorStore:
             # Generate query embedding
             query_embedding = await self._generate_embedding(query)
             
-            # Search in ChromaDB
-            results = self.collection.query(
-                query_embeddings=[query_embedding],
-                n_results=top_k,
-                include=['documents', 'metadatas', 'distances']
-            )
+            # Reuse results of a near-identical recent query
+            params = (top_k, similarity_threshold, repr(where))
+            cached = self._query_cache_lookup(query_embedding, params)
+            if cached is not None:
+                return cached
+            
+            # Small unfiltered collections are scored directly in NumPy
+            if where is None and await self._load_index():
+                documents, metadatas, similarities = await self._search_index(query_embedding, top_k)
+            else:
+                documents, metadatas, similarities = await self._search_collection(
+                    query_embedding, top_k, where
+                )
             
             # Process results
-            search_results = []
-            
-            if results['documents'] and results['documents'][0]:
-                documents = results['documents'][0]
-                metadatas = results['metadatas'][0] if results['metadatas'] else [{}] * len(documents)
-                distances = results['distances'][0] if results['distances'] else [0.0] * len(documents)
-                
-                for i, (doc_text, metadata, distance) in enumerate(zip(documents, metadatas, distances)):
-                    # Convert distance to similarity score (ChromaDB uses L2 distance)
-                    similarity = 1.0 / (1.0 + distance)
-                    
-                    if similarity >= similarity_threshold:
-                        search_results.append({
-                            'content': doc_text,
-                            'metadata': metadata,
-                            'similarity': similarity,
-                            'rank': i + 1
-                        })
+            keep = np.flatnonzero(similarities >= similarity_threshold)
+            search_results = [
+                {
+                    'content': documents[i],
+                    'metadata': metadatas[i],
+                    'similarity': similarity,
+                    'rank': i + 1
+                }
+                for i, similarity in zip(keep.tolist(), similarities[keep].tolist())
+            ]
             
             logger.info(f"Found {len(search_results)} relevant documents for query")
-            return search_results
+            self._query_cache_store(query_embedding, params, search_results)
+            return list(search_results)
             
         except Exception as e:
             logger.error(f"Search failed: {e}")
             return []
     
+    async def _search_collection(self, query_embedding: np.ndarray, top_k: int, where: Optional[Dict[str, Any]]):
+        """Query ChromaDB; returns (documents, metadatas, cosine similarities)."""
+        results = await asyncio.to_thread(
+            self.collection.query,
+            query_embeddings=[query_embedding.tolist()],
+            n_results=top_k,
+            where=where or None,
+            include=['documents', 'metadatas', 'distances']
+        )
+        
+        if not (results['documents'] and results['documents'][0]):
+            return [], [], np.empty(0)
+        
+        documents = results['documents'][0]
+        metadatas = results['metadatas'][0] if results['metadatas'] else [{}] * len(documents)
+        distances = np.asarray(
+            results['distances'][0] if results['distances'] else [0.0] * len(documents),
+            dtype=np.float64
+        )
+        
+        # Cosine and inner-product distances are 1 - cosine; squared L2
+        # between the normalized embeddings is 2 - 2 * cosine
+        distance_scale = 0.5 if self._distance_space() == "l2" else 1.0
+        return documents, metadatas, 1.0 - distances * distance_scale
+    
+    async def _search_index(self, query_embedding: np.ndarray, top_k: int):
+        """Score every stored embedding at once; returns (documents, metadatas, cosine similarities)."""
+        ids, matrix = self._index_ids, self._index_matrix
+        if not ids:
+            return [], [], np.empty(0)
+        
+        scores = matrix @ query_embedding
+        k = min(top_k, len(ids))
+        top = np.argpartition(-scores, k - 1)[:k]
+        top = top[np.argsort(-scores[top], kind='stable')]
+        top_ids = [ids[i] for i in top.tolist()]
+        
+        results = await asyncio.to_thread(
+            self.collection.get, ids=top_ids, include=['documents', 'metadatas']
+        )
+        by_id = {
+            doc_id: (document, metadata)
+            for doc_id, document, metadata in zip(results['ids'], results['documents'], results['metadatas'])
+        }
+        
+        documents, metadatas, similarities = [], [], []
+        for doc_id, score in zip(top_ids, scores[top].tolist()):
+            if doc_id in by_id:
+                document, metadata = by_id[doc_id]
+                documents.append(document)
+                metadatas.append(metadata or {})
+                similarities.append(score)
+        return documents, metadatas, np.asarray(similarities, dtype=np.float64)
+    
+    async def _load_index(self) -> bool:
+        """Load the brute-force index if the collection is small enough."""
+        if self._index_matrix is not None:
+            return True
+        version = self._index_version
+        if self._index_too_large_version == version:
+            return False
+        
+        count = await asyncio.to_thread(self.collection.count)
+        if count > BRUTE_FORCE_MAX_DOCUMENTS:
+            self._index_too_large_version = version
+            return False
+        
+        result = await asyncio.to_thread(self.collection.get, include=['embeddings'])
+        if result['ids']:
+            matrix = np.asarray(result['embeddings'], dtype=np.float32)
+        else:
+            matrix = np.empty((0, 0), dtype=np.float32)
+        
+        # Discard the load if the collection changed while it was running
+        # (mutations bump the version once they complete)
+        if version != self._index_version:
+            return False
+        self._index_ids = list(result['ids'])
+        self._index_matrix = matrix
+        return True
+    
+    def _invalidate_index(self):
+        """Drop the brute-force index and cached count after the collection changed."""
+        self._count_cache = None
+        self._index_ids = None
+        self._index_matrix = None
+        self._index_version += 1
+    
     async def get_document_count(self) -> int:
         """Get total number of documents in the store."""
         if not self._initialized:
             await self.initialize()
         
+        now = time.monotonic()
+        if self._count_cache and now - self._count_cache[0] < COUNT_CACHE_TTL:
+            return self._count_cache[1]
+        
         try:
-            return self.collection.count()
+            count = await asyncio.to_thread(self.collection.count)
+            self._count_cache = (now, count)
+            return count
         except Exception as e:
             logger.error(f"Failed to get document count: {e}")
             return 0
@@ -210,7 +587,11 @@ class VectorStore:
             await self.initialize()
         
         try:
-            self.collection.delete(ids=doc_ids)
+            self._clear_query_cache()
+            try:
+                await asyncio.to_thread(self.collection.delete, ids=doc_ids)
+            finally:
+                self._invalidate_index()
             logger.info(f"Deleted {len(doc_ids)} documents")
             return True
         except Exception as e:
@@ -223,18 +604,33 @@ class VectorStore:
             await self.initialize()
         
         try:
-            # Delete the collection and recreate it
-            self.client.delete_collection(name=self.collection_name)
-            self.collection = self.client.create_collection(
-                name=self.collection_name,
-                metadata={"description": "Document embeddings for RAG"}
-            )
+            self._clear_query_cache()
+            try:
+                if self._distance_space() == COLLECTION_METADATA["hnsw:space"]:
+                    # Delete the records but keep the collection and its HNSW settings
+                    await asyncio.to_thread(self._delete_all_records)
+                else:
+                    # Recreate collections built with an older distance function
+                    await asyncio.to_thread(self.client.delete_collection, name=self.collection_name)
+                    self.collection = await asyncio.to_thread(
+                        self.client.create_collection,
+                        name=self.collection_name,
+                        metadata=dict(COLLECTION_METADATA)
+                    )
+            finally:
+                self._invalidate_index()
             logger.info("Collection cleared successfully")
             return True
         except Exception as e:
             logger.error(f"Failed to clear collection: {e}")
             return False
     
+    def _delete_all_records(self):
+        """Delete every record in the collection, in slices (blocking)."""
+        ids = self.collection.get(include=[])['ids']
+        for start in range(0, len(ids), DELETE_BATCH_SIZE):
+            self.collection.delete(ids=ids[start:start + DELETE_BATCH_SIZE])
+    
     async def get_collection_info(self) -> Dict[str, Any]:
         """Get information about the collection."""
         if not self._initialized:
@@ -252,7 +648,7 @@ class VectorStore:
             logger.error(f"Failed to get collection info: {e}")
             return {}
     
-    async def _generate_embedding(self, text: str) -> List[float]:
+    async def _generate_embedding(self, text: str) -> np.ndarray:
         """
         Generate embedding for text.
         
@@ -260,26 +656,110 @@ class VectorStore:
             text: Text to embed
             
         Returns:
-            Embedding vector
+            Embedding vector (float32)
+            
+        Raises:
+            Exception: If the encoder fails; a zero vector would silently
+                match nothing (or everything) instead
         """
-        try:
-            # Use sentence transformer to generate embedding
-            embedding = self.embedding_model.encode(text, convert_to_tensor=False)
-            return embedding.tolist()
-        except Exception as e:
-            logger.error(f"Failed to generate embedding: {e}")
-            # Return zero vector as fallback
-            return [0.0] * 384  # MiniLM embedding dimension
+        # Concurrent queries share one sentence transformer call
+        return await self._batcher.submit(text)
+    
+    def _stored_hashes(self, ids: List[str]) -> Dict[str, Optional[str]]:
+        """Map each already stored ID to its content hash (blocking).
+        
+        Rows written before content hashes were recorded map to None, so
+        they are re-embedded and backfilled by the next upsert.
+        """
+        stored = {}
+        for start in range(0, len(ids), ADD_BATCH_SIZE):
+            result = self.collection.get(ids=ids[start:start + ADD_BATCH_SIZE], include=['metadatas'])
+            for doc_id, metadata in zip(result['ids'], result['metadatas'] or []):
+                stored[doc_id] = (metadata or {}).get('content_hash')
+        return stored
+    
+    def _stale_chunk_ids(self, chunk_counts: Dict[str, int]) -> List[str]:
+        """IDs of stored chunks at or past each source's current chunk count (blocking)."""
+        stale = []
+        for source, chunk_count in chunk_counts.items():
+            result = self.collection.get(
+                where={'$and': [{'source': source}, {'chunk_index': {'$gte': chunk_count}}]},
+                include=[]
+            )
+            stale.extend(result['ids'])
+        return stale
+    
+    def _query_cache_lookup(self, embedding: np.ndarray, params: tuple) -> Optional[List[Dict[str, Any]]]:
+        """Return cached results for a query with cosine >= SEMANTIC_CACHE_THRESHOLD."""
+        if not self._query_cache_entries:
+            return None
+        
+        self._query_cache_lookups += 1
+        count = len(self._query_cache_entries)
+        scores = self._query_cache_embeddings[:count] @ embedding
+        
+        for i in np.flatnonzero(scores >= SEMANTIC_CACHE_THRESHOLD):
+            cached_params, results = self._query_cache_entries[i]
+            if cached_params == params:
+                self._query_cache_hits += 1
+                logger.info(
+                    f"Semantic cache hit (cosine {scores[i]:.3f}, hit rate "
+                    f"{self._query_cache_hits / self._query_cache_lookups:.1%})"
+                )
+                return list(results)
+        return None
+    
+    def _query_cache_store(self, embedding: np.ndarray, params: tuple, results: List[Dict[str, Any]]):
+        """Remember search results, evicting the oldest entry when full."""
+        if self._query_cache_embeddings is None:
+            self._query_cache_embeddings = np.empty((SEMANTIC_CACHE_SIZE, embedding.shape[0]), dtype=np.float32)
+        
+        index = self._query_cache_next
+        self._query_cache_embeddings[index] = embedding
+        if index < len(self._query_cache_entries):
+            self._query_cache_entries[index] = (params, results)
+        else:
+            self._query_cache_entries.append((params, results))
+        self._query_cache_next = (index + 1) % SEMANTIC_CACHE_SIZE
+    
+    def _clear_query_cache(self):
+        """Drop cached search results (the collection changed)."""
+        self._query_cache_entries.clear()
+        self._query_cache_next = 0
+    
+    def _distance_space(self) -> str:
+        """Return the collection's HNSW distance function (ChromaDB defaults to l2)."""
+        return (self.collection.metadata or {}).get("hnsw:space", "l2")
+    
+    def _encode_texts(self, texts: List[str], batch_size: int) -> np.ndarray:
+        """Embed texts with the sentence transformer or an encoder worker (blocking)."""
+        if self._encoder_pool is not None:
+            return self._encoder_pool.submit(_encode_in_worker, texts, batch_size).result()
+        return self.embedding_model.encode(
+            texts,
+            batch_size=batch_size,
+            convert_to_numpy=True,
+            show_progress_bar=False,
+            normalize_embeddings=True
+        ).astype(np.float32, copy=False)
+    
+    def _encode_batch(self, texts: List[str]) -> np.ndarray:
+        """Embed one batch of texts in a single forward pass (blocking)."""
+        return self._encode_texts(texts, len(texts))
     
     async def cleanup(self):
         """Clean up resources."""
         logger.info("Cleaning up vector store resources")
+        await self._batcher.close()
+        if self._encoder_pool is not None:
+            self._encoder_pool.shutdown(cancel_futures=True)
+            self._encoder_pool = None
         self._initialized = False
 
 
 # Example usage
 if __name__ == "__main__":
-    from .document_processor import Document
+    from .document_processor import Document, DOC_ID_SCHEME
     
     async def main():
         vector_store = VectorStore()
@@ -7,6 +7,8 @@ import asyncio
 import tempfile
 import os
 import time
+import shutil
+import threading
 import logging
 from pathlib import Path
 from typing import Optional, Dict, Any
@@ -20,7 +22,6 @@ import sys
 sys.path.append(str(Path(__file__).parent.parent))
 
 from chatbot import WhisperMindChatbot
-from core.config import Config
 
 
 # Streamlit page config
@@ -32,6 +33,36 @@ st.set_page_config(
 )
 
 
+@st.cache_resource
+def _event_loop() -> asyncio.AbstractEventLoop:
+    """Background event loop that owns the chatbot's async resources."""
+    loop = asyncio.new_event_loop()
+    threading.Thread(target=loop.run_forever, name="whispermind-loop", daemon=True).start()
+    return loop
+
+
+def run_async(coro):
+    """Run a coroutine on the shared event loop and wait for its result."""
+    # The chatbot's aiohttp session is bound to the loop it was created on,
+    # so every call must go through the same long-lived loop.
+    return asyncio.run_coroutine_threadsafe(coro, _event_loop()).result()
+
+
+@st.cache_resource(show_spinner="Initializing WhisperMind chatbot...")
+def get_chatbot(config_path: str = "config/config.yaml") -> WhisperMindChatbot:
+    """Create and initialize the chatbot once per server process."""
+    chatbot = WhisperMindChatbot(config_path=config_path)
+    run_async(chatbot.initialize())
+    
+    # Load documents if available
+    docs_path = "data/documents"
+    if os.path.exists(docs_path):
+        docs_count = run_async(chatbot.load_documents(docs_path))
+        logger.info(f"Loaded {docs_count} documents from {docs_path}")
+    
+    return chatbot
+
+
 class StreamlitUI:
     """Streamlit user interface for the chatbot."""
     
@@ -48,29 +79,19 @@ class StreamlitUI:
         if 'chatbot_status' not in st.session_state:
             st.session_state.chatbot_status = {}
     
-    async def initialize_chatbot(self):
-        """Initialize the chatbot if not already done."""
+    def initialize_chatbot(self):
+        """Attach the shared chatbot, initializing it on first use."""
+        try:
+            self.chatbot = get_chatbot()
+            self.config = self.chatbot.config
+        except Exception as e:
+            st.error(f"Failed to initialize chatbot: {e}")
+            logger.error(f"Initialization error: {e}")
+            return False
+        
         if not st.session_state.initialized:
-            try:
-                with st.spinner("Initializing WhisperMind chatbot..."):
-                    self.config = Config()
-                    self.chatbot = WhisperMindChatbot()
-                    await self.chatbot.initialize()
-                    
-                    # Load documents if available
-                    docs_path = "data/documents"
-                    if os.path.exists(docs_path):
-                        docs_count = await self.chatbot.load_documents(docs_path)
-                        if docs_count > 0:
-                            st.success(f"Loaded {docs_count} documents from {docs_path}")
-                    
-                    st.session_state.initialized = True
-                    st.success("WhisperMind chatbot initialized successfully!")
-                    
-            except Exception as e:
-                st.error(f"Failed to initialize chatbot: {e}")
-                logger.error(f"Initialization error: {e}")
-                return False
+            st.session_state.initialized = True
+            st.success("WhisperMind chatbot initialized successfully!")
         
         return True
     
@@ -138,6 +159,8 @@ class StreamlitUI:
             
             if st.button("Clear Chat History"):
                 st.session_state.messages = []
+                if self.chatbot:
+                    self.chatbot.reset_conversation()
                 st.rerun()
             
             if st.button("Get Chatbot Status"):
@@ -200,7 +223,7 @@ class StreamlitUI:
         # Generate response
         with st.chat_message("assistant"):
             with st.spinner("Thinking..."):
-                response_data = asyncio.run(self.get_chatbot_response(prompt))
+                response_data = run_async(self.get_chatbot_response(prompt))
                 
                 st.markdown(response_data["response"])
                 
@@ -220,10 +243,10 @@ class StreamlitUI:
                 temp_file.write(audio_bytes)
                 temp_path = temp_file.name
             
+            # Only transcribe here; process_text_input generates the reply
+            # (with or without RAG, per the sidebar setting)
             with st.spinner("Transcribing voice input..."):
-                transcribed_text, response = asyncio.run(
-                    self.chatbot.voice_chat(temp_path)
-                )
+                transcribed_text = run_async(self.chatbot.transcribe(temp_path))
             
             if transcribed_text:
                 st.success(f"Transcribed: {transcribed_text}")
@@ -242,24 +265,20 @@ class StreamlitUI:
     async def get_chatbot_response(self, message: str) -> Dict[str, Any]:
         """Get response from chatbot with source information."""
         try:
-            # Get response
-            response = await self.chatbot.chat(
+            # Get response and the source documents it was grounded on
+            response, retrieved_docs = await self.chatbot.chat_with_sources(
                 message=message,
                 use_rag=st.session_state.get('use_rag', True)
             )
             
-            # Get source documents if RAG is enabled
-            sources = []
-            if st.session_state.get('use_rag', True) and self.chatbot.retriever:
-                retrieved_docs = await self.chatbot.retriever.retrieve(message, top_k=3)
-                sources = [
-                    {
-                        "filename": doc.metadata.get("filename", "Unknown"),
-                        "content": doc.content,
-                        "similarity": doc.similarity
-                    }
-                    for doc in retrieved_docs
-                ]
+            sources = [
+                {
+                    "filename": doc.metadata.get("filename", "Unknown"),
+                    "content": doc.content,
+                    "similarity": doc.similarity
+                }
+                for doc in retrieved_docs[:3]
+            ]
             
             return {
                 "response": response,
@@ -283,12 +302,13 @@ class StreamlitUI:
                 
                 for uploaded_file in uploaded_files:
                     file_path = os.path.join(temp_dir, uploaded_file.name)
+                    uploaded_file.seek(0)
                     with open(file_path, "wb") as f:
-                        f.write(uploaded_file.getbuffer())
+                        shutil.copyfileobj(uploaded_file, f, length=1024 * 1024)
                     saved_files.append(file_path)
                 
                 # Process documents
-                docs_count = asyncio.run(self.chatbot.load_documents(temp_dir))
+                docs_count = run_async(self.chatbot.load_documents(temp_dir))
                 
                 if docs_count > 0:
                     st.success(f"Successfully processed {docs_count} document chunks from {len(uploaded_files)} files")
@@ -310,7 +330,7 @@ class StreamlitUI:
         """Refresh document index from documents directory."""
         try:
             with st.spinner("Refreshing document index..."):
-                docs_count = asyncio.run(self.chatbot.load_documents("data/documents"))
+                docs_count = run_async(self.chatbot.load_documents("data/documents"))
                 if docs_count > 0:
                     st.success(f"Refreshed index with {docs_count} document chunks")
                 else:
@@ -321,7 +341,7 @@ class StreamlitUI:
     def update_status(self):
         """Update chatbot status."""
         try:
-            status = asyncio.run(self.chatbot.get_status())
+            status = run_async(self.chatbot.get_status())
             st.session_state.chatbot_status = status
             st.success("Status updated")
         except Exception as e:
@@ -330,7 +350,7 @@ class StreamlitUI:
     def run(self):
         """Run the Streamlit application."""
         # Initialize chatbot
-        asyncio.run(self.initialize_chatbot())
+        self.initialize_chatbot()
         
         # Render UI
         self.render_sidebar()
@@ -1,25 +1,429 @@
 """
-Speech-to-text processing using OpenAI Whisper.
+Speech-to-text processing using Whisper (faster-whisper or OpenAI Whisper).
 """
 
 import asyncio
+import io
 import logging
+import math
+import multiprocessing
 import os
+import struct
 import tempfile
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from functools import lru_cache
 from pathlib import Path
-from typing import Optional, Dict, Any
+from typing import Optional, Dict, Any, List, Callable, Awaitable, AsyncIterator, Tuple
 
 try:
     import whisper
     import torch
+    # Probe the CUDA driver once at import instead of on every transcription
+    _CUDA_OK = torch.cuda.is_available()
 except ImportError as e:
     logging.warning(f"Whisper or torch not available: {e}")
+    _CUDA_OK = False
+
+try:
+    from faster_whisper import WhisperModel
+    FASTER_WHISPER_AVAILABLE = True
+except ImportError:
+    FASTER_WHISPER_AVAILABLE = False
+
+try:
+    import aiofiles
+    import aiofiles.os
+    import aiofiles.tempfile
+except ImportError:
+    aiofiles = None
+
+try:
+    import numpy as np
+    import soundfile as sf
+    from scipy.signal import resample_poly
+    IN_MEMORY_DECODE_AVAILABLE = True
+except ImportError:
+    IN_MEMORY_DECODE_AVAILABLE = False
+
+try:
+    import webrtcvad
+    WEBRTCVAD_AVAILABLE = True
+except ImportError:
+    WEBRTCVAD_AVAILABLE = False
+
+# Whisper models consume 16 kHz mono audio
+WHISPER_SAMPLE_RATE = 16000
+
+# Clips up to one Whisper window (30 s) can share a batched encoder pass
+BATCH_MAX_SAMPLES = 30 * WHISPER_SAMPLE_RATE
+
+# transcribe()'s default quality checks; batched (temperature 0) results that
+# fail them are re-run through transcribe() and its temperature fallback
+COMPRESSION_RATIO_THRESHOLD = 2.4
+LOGPROB_THRESHOLD = -1.0
+NO_SPEECH_THRESHOLD = 0.6
+
+# Voice activity detection: frame length (10, 20 or 30 ms) and aggressiveness (0-3)
+VAD_FRAME_MS = 30
+VAD_AGGRESSIVENESS = 2
 
 logger = logging.getLogger(__name__)
 
+# Whisper gets one dedicated thread: transcriptions queue behind each other
+# instead of contending for the GPU or the event loop's default pool
+_STT_EXECUTOR: Optional[ThreadPoolExecutor] = None
+
+
+def _get_stt_executor() -> ThreadPoolExecutor:
+    """Return the shared Whisper executor, creating it after a shutdown."""
+    global _STT_EXECUTOR
+    if _STT_EXECUTOR is None:
+        _STT_EXECUTOR = ThreadPoolExecutor(max_workers=1, thread_name_prefix="whisper")
+    return _STT_EXECUTOR
+
+
+@lru_cache(maxsize=4)
+def _load_whisper(model_size: str, device: str, backend: str = "openai-whisper"):
+    """
+    Load a Whisper model once per (size, device, backend) and share it between
+    SpeechToText instances. Call _load_whisper.cache_clear() to release it.
+    """
+    if backend == "faster-whisper":
+        # CTranslate2 only knows cuda/cpu; int8 weights with fp16 activations on GPU
+        ct2_device = "cuda" if device == "cuda" else "cpu"
+        compute_type = "int8_float16" if ct2_device == "cuda" else "int8"
+        model = WhisperModel(model_size, device=ct2_device, compute_type=compute_type)
+    else:
+        model = whisper.load_model(model_size, device=device)
+        _optimize_encoder(model, device)
+    
+    _warm_up(model, backend, fp16=device == "cuda")
+    return model
+
+
+def _segment_to_dict(segment) -> Dict[str, Any]:
+    """Convert a faster-whisper Segment to openai-whisper's segment dict."""
+    entry = {
+        "id": segment.id,
+        "start": segment.start,
+        "end": segment.end,
+        "text": segment.text,
+    }
+    if segment.words:
+        entry["words"] = [
+            {"word": w.word, "start": w.start, "end": w.end, "probability": w.probability}
+            for w in segment.words
+        ]
+    return entry
+
+
+def _warm_up(model, backend: str, fp16: bool):
+    """
+    Transcribe one second of silence so the CUDA context / MPS graph and the
+    decoder are set up during initialize() rather than on the first request.
+    Makes initialize() about a second slower and the first transcribe faster.
+    """
+    try:
+        _run_transcription(model, backend, np.zeros(WHISPER_SAMPLE_RATE, dtype=np.float32), fp16=fp16)
+    except Exception as e:
+        logger.warning(f"Whisper warm-up skipped: {e}")
+
+
+def _run_transcription(model, backend: str, audio, fp16: bool = False, **options) -> Dict[str, Any]:
+    """
+    Run a blocking transcription and return an openai-whisper style result
+    dict (text, language, segments, duration) for either backend. fp16 only
+    applies to openai-whisper; faster-whisper's precision is set at load.
+    """
+    if backend != "faster-whisper":
+        return model.transcribe(audio, fp16=fp16, **options)
+    
+    # faster-whisper yields segments lazily; consume them here, off the event loop
+    segments, info = model.transcribe(audio, beam_size=5, **options)
+    segment_dicts = [_segment_to_dict(segment) for segment in segments]
+    
+    return {
+        "text": "".join(segment["text"] for segment in segment_dicts),
+        "language": info.language,
+        "segments": segment_dicts,
+        "duration": info.duration,
+    }
+
+
+def _optimize_encoder(model, device: str):
+    """
+    Compile the audio encoder (torch.compile on CUDA, TorchScript on CPU)
+    and run it once on a silent 30 s window so the first real transcription
+    does not pay the compilation cost. Falls back to eager mode on failure.
+    """
+    eager_encoder = model.encoder
+    try:
+        if device == "cuda" and hasattr(torch, "compile"):
+            model.encoder = torch.compile(eager_encoder, mode="reduce-overhead", fullgraph=False)
+        elif device == "cpu":
+            model.encoder = torch.jit.script(eager_encoder)
+        else:
+            return
+        
+        # transcribe() feeds fp16 mels on CUDA; warm up with the same shape and dtype
+        dtype = torch.float16 if device == "cuda" else torch.float32
+        with torch.no_grad():
+            model.encoder(torch.zeros(1, model.dims.n_mels, 3000, device=device, dtype=dtype))
+        logger.info(f"Compiled Whisper encoder for {device}")
+    except Exception as e:
+        logger.warning(f"Whisper encoder compilation unavailable, using eager mode: {e}")
+        model.encoder = eager_encoder
+
+
+# Page-locked host staging buffer for CUDA batches; only touched from the
+# single Whisper thread, and reused once decode has synchronized the stream
+_pinned_audio: Optional["torch.Tensor"] = None
+
+
+def _audio_batch_to_device(audios: List["np.ndarray"], device) -> "torch.Tensor":
+    """
+    Pad clips to one 30 s window and stack them on the model's device.
+    On CUDA the samples go through a pinned buffer with an async copy;
+    other devices (CPU, MPS) take a plain copy.
+    """
+    if device.type != "cuda":
+        return torch.stack([torch.from_numpy(whisper.pad_or_trim(audio)) for audio in audios]).to(device)
+    
+    global _pinned_audio
+    if _pinned_audio is None or _pinned_audio.shape[0] < len(audios):
+        _pinned_audio = torch.empty(
+            (len(audios), BATCH_MAX_SAMPLES), dtype=torch.float32, pin_memory=True
+        )
+    
+    host = _pinned_audio[:len(audios)]
+    host.zero_()
+    for row, audio in zip(host, audios):
+        samples = torch.from_numpy(audio[:BATCH_MAX_SAMPLES])
+        row[:len(samples)].copy_(samples)
+    return host.to(device, non_blocking=True)
+
+
+def _is_no_speech(result) -> bool:
+    """transcribe() drops a window that is likely silence and decoded poorly."""
+    return result.no_speech_prob > NO_SPEECH_THRESHOLD and result.avg_logprob < LOGPROB_THRESHOLD
+
+
+def _needs_fallback(result) -> bool:
+    """transcribe() would retry this decode at a higher temperature."""
+    return result.compression_ratio > COMPRESSION_RATIO_THRESHOLD or result.avg_logprob < LOGPROB_THRESHOLD
+
+
+def _decode_batch(model, audios: List["np.ndarray"], language: Optional[str], task: str) -> List[Dict[str, Any]]:
+    """
+    Transcribe clips of at most 30 s with openai-whisper in one batched
+    forward pass: the mels are padded to a full window and stacked, so the
+    encoder runs once for the whole batch.
+    
+    Results are held to transcribe()'s checks: likely silence comes back
+    empty, and repetitive or low-confidence decodes are re-run one by one
+    through transcribe() so they get its temperature fallback.
+    """
+    # The mel (STFT) is computed on the model's device; rows are transformed
+    # separately because log_mel_spectrogram normalizes by the clip's own peak
+    samples = _audio_batch_to_device(audios, model.device)
+    mels = torch.stack([
+        whisper.log_mel_spectrogram(row, model.dims.n_mels) for row in samples
+    ])
+    options = whisper.DecodingOptions(
+        language=language,
+        task=task,
+        fp16=model.device.type == "cuda"
+    )
+    results = whisper.decode(model, mels, options)
+    
+    outputs = []
+    for audio, result in zip(audios, results):
+        if _is_no_speech(result):
+            outputs.append({"text": "", "language": result.language})
+        elif _needs_fallback(result):
+            outputs.append(_run_transcription(
+                model, "openai-whisper", audio, fp16=options.fp16, language=language, task=task
+            ))
+        else:
+            outputs.append({"text": result.text, "language": result.language})
+    return outputs
+
+
+# Set by _init_stt_worker inside the CPU transcription process
+_worker_model = None
+_worker_backend = None
+
+
+def _init_stt_worker(model_size: str, device: str, backend: str):
+    """Load Whisper once per transcription worker process."""
+    global _worker_model, _worker_backend
+    _worker_model = _load_whisper(model_size, device, backend)
+    _worker_backend = backend
+
+
+def _worker_ready() -> bool:
+    """No-op task used to wait until the worker has loaded its model."""
+    return _worker_model is not None
+
+
+def _transcribe_in_worker(audio, options: Dict[str, Any]) -> Dict[str, Any]:
+    """Transcribe with the worker process's Whisper model."""
+    return _run_transcription(_worker_model, _worker_backend, audio, **options)
+
+
+def _decode_batch_in_worker(audios: List["np.ndarray"], language: Optional[str], task: str) -> List[Dict[str, Any]]:
+    """Batch-transcribe with the worker process's Whisper model."""
+    return _decode_batch(_worker_model, audios, language, task)
+
+
+# Leading bytes of the encoded formats callers send (WAV, AIFF, FLAC, Ogg, MP3, WebM)
+_CONTAINER_MAGIC = (b"RIFF", b"RIFX", b"FORM", b"fLaC", b"OggS", b"ID3", b"\x1aE\xdf\xa3")
+
+
+def _is_encoded_audio(data: bytes) -> bool:
+    """Whether data starts like an audio container rather than raw PCM."""
+    if data.startswith(_CONTAINER_MAGIC) or data[4:8] == b"ftyp":
+        return True
+    # Bare MPEG audio frame sync
+    return len(data) > 1 and data[0] == 0xFF and data[1] & 0xE0 == 0xE0
+
+
+def _pcm16_to_wav(pcm: bytes, sample_rate: int, channels: int = 1) -> bytes:
+    """Prefix raw 16-bit little-endian PCM with a 44-byte WAV header."""
+    pcm = pcm[:len(pcm) - len(pcm) % (2 * channels)]
+    block_align = 2 * channels
+    header = struct.pack(
+        "<4sI4s4sIHHIIHH4sI",
+        b"RIFF", 36 + len(pcm), b"WAVE",
+        b"fmt ", 16, 1, channels, sample_rate, sample_rate * block_align, block_align, 16,
+        b"data", len(pcm)
+    )
+    return header + pcm
+
+
+async def _path_exists(path: str) -> bool:
+    """Check for a file without stat()-ing on the event loop."""
+    if aiofiles is not None:
+        return await aiofiles.os.path.exists(path)
+    return await asyncio.to_thread(os.path.exists, path)
+
+
+def _decode_audio_bytes(audio_data: bytes) -> "np.ndarray":
+    """Decode an audio container to 16 kHz mono float32 samples."""
+    audio, sample_rate = sf.read(io.BytesIO(audio_data), dtype="float32", always_2d=True)
+    audio = audio.mean(axis=1) if audio.shape[1] > 1 else audio[:, 0]
+    
+    if sample_rate != WHISPER_SAMPLE_RATE:
+        divisor = math.gcd(sample_rate, WHISPER_SAMPLE_RATE)
+        audio = resample_poly(audio, WHISPER_SAMPLE_RATE // divisor, sample_rate // divisor)
+    return np.ascontiguousarray(audio, dtype=np.float32)
+
+
+def _trim_silence(audio: "np.ndarray") -> "np.ndarray":
+    """
+    Drop leading and trailing non-speech frames from 16 kHz float32 audio.
+    Returns an empty array when no frame contains speech.
+    """
+    frame_len = WHISPER_SAMPLE_RATE * VAD_FRAME_MS // 1000
+    n_frames = len(audio) // frame_len
+    if n_frames == 0:
+        return audio
+    
+    pcm = (np.clip(audio, -1.0, 1.0) * 32767).astype(np.int16).tobytes()
+    frame_bytes = frame_len * 2
+    vad = webrtcvad.Vad(VAD_AGGRESSIVENESS)
+    speech = [
+        i for i in range(n_frames)
+        if vad.is_speech(pcm[i * frame_bytes:(i + 1) * frame_bytes], WHISPER_SAMPLE_RATE)
+    ]
+    if not speech:
+        return audio[:0]
+    
+    # Keep the partial frame at the end if speech runs into it
+    end = len(audio) if speech[-1] == n_frames - 1 else (speech[-1] + 1) * frame_len
+    return audio[speech[0] * frame_len:end]
+
+
+class TranscriptionBatcher:
+    """Coalesces concurrent short-clip transcriptions into batched Whisper calls."""
+    
+    def __init__(
+        self,
+        decode: Callable[[List["np.ndarray"], Optional[str], str], Awaitable[List[Dict[str, Any]]]],
+        max_batch_size: int = 8,
+        flush_ms: float = 20.0
+    ):
+        """
+        Initialize transcription batcher.
+        
+        Args:
+            decode: Coroutine transcribing a list of clips with one language/task
+            max_batch_size: Most clips transcribed in one call
+            flush_ms: How long to wait for more requests after the first one
+        """
+        self._decode = decode
+        self.max_batch_size = max_batch_size
+        self.flush_delay = flush_ms / 1000.0
+        
+        self._queue: Optional[asyncio.Queue] = None
+        self._worker: Optional[asyncio.Task] = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+    
+    async def submit(self, audio: "np.ndarray", language: Optional[str], task: str) -> Dict[str, Any]:
+        """Transcribe one clip, sharing a Whisper call with concurrent requests."""
+        loop = asyncio.get_running_loop()
+        if self._worker is None or self._worker.done() or self._loop is not loop:
+            self._loop = loop
+            self._queue = asyncio.Queue()
+            self._worker = loop.create_task(self._run())
+        
+        future = loop.create_future()
+        await self._queue.put((audio, (language, task), future))
+        return await future
+    
+    async def _run(self):
+        """Collect requests for up to flush_ms, then transcribe them together."""
+        loop = asyncio.get_running_loop()
+        while True:
+            batch = [await self._queue.get()]
+            deadline = loop.time() + self.flush_delay
+            
+            while len(batch) < self.max_batch_size:
+                timeout = deadline - loop.time()
+                if timeout <= 0:
+                    break
+                try:
+                    batch.append(await asyncio.wait_for(self._queue.get(), timeout))
+                except asyncio.TimeoutError:
+                    break
+            
+            # Decoding options apply to a whole batch; split by language/task
+            groups: Dict[tuple, list] = {}
+            for item in batch:
+                groups.setdefault(item[1], []).append(item)
+            
+            for (language, task), items in groups.items():
+                try:
+                    results = await self._decode([audio for audio, _, _ in items], language, task)
+                except Exception as e:
+                    for _, _, future in items:
+                        if not future.done():
+                            future.set_exception(e)
+                    continue
+                
+                for (_, _, future), result in zip(items, results):
+                    if not future.done():
+                        future.set_result(result)
+    
+    async def close(self):
+        """Stop the background batching task."""
+        if self._worker is not None:
+            self._worker.cancel()
+            self._worker = None
+
 
 class SpeechToText:
-    """Speech-to-text processor using OpenAI Whisper."""
+    """Speech-to-text processor using Whisper."""
     
     SUPPORTED_MODELS = [
         "tiny",      # ~39 MB, fastest
@@ -29,21 +433,43 @@ class SpeechToText:
         "large",     # ~1550 MB, best accuracy
     ]
     
-    def __init__(self, model_size: str = "base", device: Optional[str] = None):
+    SUPPORTED_BACKENDS = ["auto", "faster-whisper", "openai-whisper"]
+    
+    def __init__(
+        self,
+        model_size: str = "base",
+        device: Optional[str] = None,
+        backend: str = "auto"
+    ):
         """
         Initialize speech-to-text processor.
         
         Args:
             model_size: Whisper model size (tiny, base, small, medium, large)
             device: Device to use (cpu, cuda, auto)
+            backend: Inference backend (auto, faster-whisper, openai-whisper);
+                auto prefers faster-whisper when it is installed
         """
         if model_size not in self.SUPPORTED_MODELS:
             logger.warning(f"Unknown model size '{model_size}', using 'base'")
             model_size = "base"
         
+        if backend not in self.SUPPORTED_BACKENDS:
+            logger.warning(f"Unknown STT backend '{backend}', using 'auto'")
+            backend = "auto"
+        if backend == "auto":
+            backend = "faster-whisper" if FASTER_WHISPER_AVAILABLE else "openai-whisper"
+        elif backend == "faster-whisper" and not FASTER_WHISPER_AVAILABLE:
+            logger.warning("faster-whisper is not installed, using openai-whisper")
+            backend = "openai-whisper"
+        
         self.model_size = model_size
+        self.backend = backend
         self.device = device or self._get_optimal_device()
+        self._fp16 = self.device == "cuda"
         self.model = None
+        self._worker_pool: Optional[ProcessPoolExecutor] = None
+        self._batcher = TranscriptionBatcher(self._decode_batch)
         self._initialized = False
     
     async def initialize(self):
@@ -52,20 +478,40 @@ class SpeechToText:
             return
         
         try:
-            logger.info(f"Loading Whisper model '{self.model_size}' on device '{self.device}'")
+            logger.info(
+                f"Loading Whisper model '{self.model_size}' on device '{self.device}' "
+                f"({self.backend})"
+            )
             
-            # Load model in a separate thread to avoid blocking
             loop = asyncio.get_event_loop()
-            self.model = await loop.run_in_executor(
-                None,
-                lambda: whisper.load_model(self.model_size, device=self.device)
-            )
+            if self.device == "cpu":
+                # CPU inference holds the GIL; run it in its own process so the
+                # event loop and other Python threads keep running. Spawn, not
+                # fork: forking after torch/OpenMP have started threads can
+                # deadlock the child, and the initializer loads the model anyway
+                self._worker_pool = ProcessPoolExecutor(
+                    max_workers=1,
+                    mp_context=multiprocessing.get_context("spawn"),
+                    initializer=_init_stt_worker,
+                    initargs=(self.model_size, self.device, self.backend)
+                )
+                await loop.run_in_executor(self._worker_pool, _worker_ready)
+            else:
+                # Load model in a separate thread to avoid blocking; CUDA contexts
+                # are too expensive to replicate in a child process
+                self.model = await loop.run_in_executor(
+                    _get_stt_executor(),
+                    lambda: _load_whisper(self.model_size, self.device, self.backend)
+                )
             
             self._initialized = True
             logger.info("Speech-to-text model loaded successfully")
             
         except Exception as e:
             logger.error(f"Failed to initialize speech-to-text: {e}")
+            if self._worker_pool is not None:
+                self._worker_pool.shutdown(cancel_futures=True)
+                self._worker_pool = None
             raise
     
     async def transcribe(
@@ -88,23 +534,18 @@ class SpeechToText:
         if not self._initialized:
             await self.initialize()
         
-        if not os.path.exists(audio_path):
+        if not await _path_exists(audio_path):
             raise FileNotFoundError(f"Audio file not found: {audio_path}")
         
         try:
             logger.info(f"Transcribing audio file: {audio_path}")
             
-            # Transcribe in a separate thread
-            loop = asyncio.get_event_loop()
-            result = await loop.run_in_executor(
-                None,
-                lambda: self.model.transcribe(
-                    audio_path,
-                    language=language,
-                    task=task,
-                    fp16=torch.cuda.is_available()
-                )
-            )
+            if self.backend == "openai-whisper":
+                # Decode up front so short clips can join a batch
+                audio = await asyncio.to_thread(whisper.load_audio, audio_path)
+                result = await self._transcribe_samples(audio, language=language, task=task)
+            else:
+                result = await self._run_model(audio_path, language=language, task=task)
             
             transcribed_text = result["text"].strip()
             detected_language = result.get("language", "unknown")
@@ -118,6 +559,45 @@ class SpeechToText:
             logger.error(f"Transcription failed: {e}")
             return f"Error during transcription: {str(e)}"
     
+    async def transcribe_array(
+        self,
+        audio: "np.ndarray",
+        language: Optional[str] = None,
+        task: str = "transcribe",
+        vad_filter: bool = False
+    ) -> str:
+        """
+        Transcribe 16 kHz mono float32 samples without going through a file.
+        
+        Args:
+            audio: Audio samples in [-1, 1] at 16 kHz
+            language: Language code (auto-detect if None)
+            task: Either 'transcribe' or 'translate'
+            vad_filter: Skip non-speech regions (faster-whisper's built-in VAD)
+            
+        Returns:
+            Transcribed text
+        """
+        if not self._initialized:
+            await self.initialize()
+        
+        try:
+            options = {"language": language, "task": task}
+            if vad_filter and self.backend == "faster-whisper":
+                options["vad_filter"] = True
+                options["vad_parameters"] = {"threshold": 0.5}
+            
+            # Both backends skip ffmpeg when given an array
+            result = await self._transcribe_samples(audio, **options)
+            
+            transcribed_text = result["text"].strip()
+            logger.info(f"Transcription complete (language: {result.get('language', 'unknown')})")
+            return transcribed_text
+            
+        except Exception as e:
+            logger.error(f"Transcription failed: {e}")
+            return f"Error during transcription: {str(e)}"
+    
     async def transcribe_with_timestamps(
         self,
         audio_path: str,
@@ -136,29 +616,20 @@ class SpeechToText:
         if not self._initialized:
             await self.initialize()
         
-        if not os.path.exists(audio_path):
+        if not await _path_exists(audio_path):
             raise FileNotFoundError(f"Audio file not found: {audio_path}")
         
         try:
             logger.info(f"Transcribing with timestamps: {audio_path}")
             
-            # Transcribe in a separate thread
-            loop = asyncio.get_event_loop()
-            result = await loop.run_in_executor(
-                None,
-                lambda: self.model.transcribe(
-                    audio_path,
-                    language=language,
-                    word_timestamps=True,
-                    fp16=torch.cuda.is_available()
-                )
-            )
+            info, stream = await self._open_segment_stream(audio_path, language, True)
+            segments = [segment async for segment in stream]
             
             return {
-                "text": result["text"].strip(),
-                "language": result.get("language", "unknown"),
-                "segments": result.get("segments", []),
-                "duration": result.get("duration", 0.0)
+                "text": "".join(segment["text"] for segment in segments).strip(),
+                "language": info["language"],
+                "segments": segments,
+                "duration": info["duration"]
             }
             
         except Exception as e:
@@ -170,6 +641,77 @@ class SpeechToText:
                 "duration": 0.0
             }
     
+    async def stream_segments(
+        self,
+        audio_path: str,
+        language: Optional[str] = None,
+        word_timestamps: bool = True
+    ) -> AsyncIterator[Dict[str, Any]]:
+        """
+        Yield timestamped segments as Whisper decodes them.
+        
+        With faster-whisper in-process, each segment is produced as soon as it
+        is decoded; other configurations yield them after the full pass.
+        
+        Args:
+            audio_path: Path to audio file
+            language: Language code (auto-detect if None)
+            word_timestamps: Include word-level timings
+            
+        Yields:
+            Segment dictionaries (id, start, end, text, words)
+        """
+        if not self._initialized:
+            await self.initialize()
+        
+        if not await _path_exists(audio_path):
+            raise FileNotFoundError(f"Audio file not found: {audio_path}")
+        
+        _, stream = await self._open_segment_stream(audio_path, language, word_timestamps)
+        async for segment in stream:
+            yield segment
+    
+    async def _open_segment_stream(
+        self,
+        audio_path: str,
+        language: Optional[str],
+        word_timestamps: bool
+    ) -> Tuple[Dict[str, Any], AsyncIterator[Dict[str, Any]]]:
+        """Start a transcription; return its language/duration and a segment iterator."""
+        loop = asyncio.get_event_loop()
+        
+        if self.backend == "faster-whisper" and self._worker_pool is None:
+            # faster-whisper decodes lazily: pull one segment per executor call
+            executor = _get_stt_executor()
+            segments, info = await loop.run_in_executor(
+                executor,
+                lambda: self.model.transcribe(
+                    audio_path,
+                    beam_size=5,
+                    language=language,
+                    word_timestamps=word_timestamps
+                )
+            )
+            
+            async def iterate():
+                while True:
+                    segment = await loop.run_in_executor(executor, next, segments, None)
+                    if segment is None:
+                        return
+                    yield _segment_to_dict(segment)
+            
+            return {"language": info.language, "duration": info.duration}, iterate()
+        
+        # Generators cannot cross the worker process boundary; replay a full result
+        result = await self._run_model(audio_path, language=language, word_timestamps=word_timestamps)
+        
+        async def replay():
+            for segment in result.get("segments", []):
+                yield segment
+        
+        info = {"language": result.get("language", "unknown"), "duration": result.get("duration", 0.0)}
+        return info, replay()
+    
     async def transcribe_realtime(
         self,
         audio_data: bytes,
@@ -180,8 +722,8 @@ class SpeechToText:
         Transcribe audio data from memory (for real-time processing).
         
         Args:
-            audio_data: Raw audio bytes
-            sample_rate: Audio sample rate
+            audio_data: Encoded audio (WAV, FLAC, OGG, ...) or raw 16-bit mono PCM
+            sample_rate: Sample rate of raw PCM input
             language: Language code
             
         Returns:
@@ -190,11 +732,35 @@ class SpeechToText:
         if not self._initialized:
             await self.initialize()
         
+        if not _is_encoded_audio(audio_data):
+            # Raw PCM: give it a WAV header so soundfile (or ffmpeg) can read it
+            audio_data = _pcm16_to_wav(audio_data, sample_rate)
+        
+        # Decode WAV/FLAC/OGG in memory and skip the tempfile + ffmpeg round trip
+        if IN_MEMORY_DECODE_AVAILABLE:
+            try:
+                audio = await asyncio.to_thread(_decode_audio_bytes, audio_data)
+            except Exception as e:
+                logger.debug(f"In-memory decode failed, falling back to ffmpeg: {e}")
+            else:
+                if WEBRTCVAD_AVAILABLE:
+                    # Silent chunks never reach the model
+                    audio = await asyncio.to_thread(_trim_silence, audio)
+                    if audio.size == 0:
+                        logger.debug("No speech detected, skipping transcription")
+                        return ""
+                return await self.transcribe_array(audio, language=language, vad_filter=True)
+        
         try:
-            # Save audio data to temporary file
-            with tempfile.NamedTemporaryFile(suffix=".wav", delete=False) as temp_file:
-                temp_file.write(audio_data)
-                temp_path = temp_file.name
+            # Save audio data to temporary file without blocking the event loop
+            if aiofiles is not None:
+                async with aiofiles.tempfile.NamedTemporaryFile(suffix=".wav", delete=False) as f:
+                    await f.write(audio_data)
+                    temp_path = f.name
+            else:
+                with tempfile.NamedTemporaryFile(suffix=".wav", delete=False) as temp_file:
+                    temp_path = temp_file.name
+                await asyncio.to_thread(Path(temp_path).write_bytes, audio_data)
             
             try:
                 # Transcribe the temporary file
@@ -203,7 +769,7 @@ class SpeechToText:
             finally:
                 # Clean up temporary file
                 try:
-                    os.unlink(temp_path)
+                    await asyncio.to_thread(os.unlink, temp_path)
                 except:
                     pass
                     
@@ -211,10 +777,46 @@ class SpeechToText:
             logger.error(f"Real-time transcription failed: {e}")
             return f"Error during real-time transcription: {str(e)}"
     
+    async def _run_model(self, audio, **options) -> Dict[str, Any]:
+        """Run a transcription on the worker process or the Whisper thread."""
+        loop = asyncio.get_event_loop()
+        if self._worker_pool is not None:
+            return await loop.run_in_executor(
+                self._worker_pool, _transcribe_in_worker, audio, options
+            )
+        return await loop.run_in_executor(
+            _get_stt_executor(),
+            lambda: _run_transcription(self.model, self.backend, audio, fp16=self._fp16, **options)
+        )
+    
+    async def _transcribe_samples(self, audio: "np.ndarray", **options) -> Dict[str, Any]:
+        """Transcribe 16 kHz samples, batching short clips with concurrent requests."""
+        if self.backend == "openai-whisper" and len(audio) <= BATCH_MAX_SAMPLES:
+            return await self._batcher.submit(
+                audio, options.get("language"), options.get("task", "transcribe")
+            )
+        return await self._run_model(audio, **options)
+    
+    async def _decode_batch(
+        self,
+        audios: List["np.ndarray"],
+        language: Optional[str],
+        task: str
+    ) -> List[Dict[str, Any]]:
+        """Run one batched decode on the worker process or the Whisper thread."""
+        loop = asyncio.get_event_loop()
+        if self._worker_pool is not None:
+            return await loop.run_in_executor(
+                self._worker_pool, _decode_batch_in_worker, audios, language, task
+            )
+        return await loop.run_in_executor(
+            _get_stt_executor(), _decode_batch, self.model, audios, language, task
+        )
+    
     def _get_optimal_device(self) -> str:
         """Determine the optimal device for processing."""
         try:
-            if torch.cuda.is_available():
+            if _CUDA_OK:
                 return "cuda"
             elif hasattr(torch.backends, 'mps') and torch.backends.mps.is_available():
                 return "mps"  # Apple Silicon
@@ -227,6 +829,7 @@ class SpeechToText:
         """Get information about the loaded model."""
         return {
             "model_size": self.model_size,
+            "backend": self.backend,
             "device": self.device,
             "initialized": self._initialized,
             "supported_models": self.SUPPORTED_MODELS
@@ -234,13 +837,19 @@ class SpeechToText:
     
     async def cleanup(self):
         """Clean up model resources."""
-        if self.model:
-            del self.model
-            self.model = None
+        # The model is shared through _load_whisper; only drop this reference.
+        # Its memory (and the CUDA cache) is released by _load_whisper.cache_clear().
+        self.model = None
+        
+        await self._batcher.close()
+        if self._worker_pool is not None:
+            self._worker_pool.shutdown(cancel_futures=True)
+            self._worker_pool = None
         
-        # Clear CUDA cache if using GPU
-        if self.device == "cuda" and torch.cuda.is_available():
-            torch.cuda.empty_cache()
+        global _STT_EXECUTOR
+        if _STT_EXECUTOR is not None:
+            _STT_EXECUTOR.shutdown(wait=False)
+            _STT_EXECUTOR = None
         
         self._initialized = False
         logger.info("Speech-to-text cleanup complete")
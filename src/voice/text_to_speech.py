@@ -1,11 +1,15 @@
 """
-Text-to-speech processing using pyttsx3 (system TTS).
+Text-to-speech processing using Piper (ONNX Runtime) or pyttsx3 (system TTS).
 """
 
 import asyncio
+import io
 import logging
+import mmap
 import os
 import tempfile
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
 from typing import Optional, Dict, Any, List
 
@@ -16,17 +20,73 @@ try:
 except ImportError as e:
     logging.warning(f"TTS dependencies not available: {e}")
 
+try:
+    import aiofiles
+    import aiofiles.os
+    import aiofiles.tempfile
+except ImportError:
+    aiofiles = None
+
+try:
+    import onnxruntime
+    from piper.voice import PiperVoice
+    PIPER_AVAILABLE = True
+except ImportError:
+    PIPER_AVAILABLE = False
+
+# pyttsx3's default speaking rate; Piper's length_scale is relative to it
+DEFAULT_RATE = 200
+
+# Synthesized WAVs kept for repeated prompts (~10 MB for short phrases)
+TTS_CACHE_SIZE = 128
+
 logger = logging.getLogger(__name__)
 
+# pyttsx3 engines are not thread-safe; create and drive them from one thread
+_TTS_EXECUTOR: Optional[ThreadPoolExecutor] = None
+
+
+def _get_tts_executor() -> ThreadPoolExecutor:
+    """Return the shared TTS executor, creating it after a shutdown."""
+    global _TTS_EXECUTOR
+    if _TTS_EXECUTOR is None:
+        _TTS_EXECUTOR = ThreadPoolExecutor(max_workers=1, thread_name_prefix="tts")
+    return _TTS_EXECUTOR
+
+
+def _read_mapped_bytes(path: str) -> bytes:
+    """Read a file through a read-only memory map (one copy, no read buffer)."""
+    with open(path, "rb") as f:
+        if os.fstat(f.fileno()).st_size == 0:
+            return b""
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+            return mapped[:]
+
+
+async def _path_exists(path: str) -> bool:
+    """Check for a file without stat()-ing on the event loop."""
+    if aiofiles is not None:
+        return await aiofiles.os.path.exists(path)
+    return await asyncio.to_thread(os.path.exists, path)
+
+
+async def _makedirs(path: str):
+    """Create a directory tree without blocking the event loop."""
+    if aiofiles is not None:
+        await aiofiles.os.makedirs(path, exist_ok=True)
+    else:
+        await asyncio.to_thread(os.makedirs, path, exist_ok=True)
+
 
 class TextToSpeech:
-    """Text-to-speech processor using pyttsx3 (system TTS)."""
+    """Text-to-speech processor using Piper (ONNX) or pyttsx3 (system TTS)."""
     
     def __init__(
         self,
         voice_id: Optional[str] = None,
-        rate: int = 200,
-        volume: float = 0.9
+        rate: int = DEFAULT_RATE,
+        volume: float = 0.9,
+        piper_model: Optional[str] = None
     ):
         """
         Initialize text-to-speech processor.
@@ -35,14 +95,25 @@ class TextToSpeech:
             voice_id: Voice ID to use (None for default)
             rate: Speech rate (words per minute)
             volume: Volume level (0.0 to 1.0)
+            piper_model: Path to a Piper voice (.onnx, with its .onnx.json next
+                to it); uses pyttsx3 when None or when piper-tts is missing
         """
         self.voice_id = voice_id
         self.rate = rate
         self.volume = volume
+        self.piper_model = piper_model
+        
+        if piper_model and not PIPER_AVAILABLE:
+            logger.warning("piper-tts is not installed, using pyttsx3")
+        self.backend = "piper" if piper_model and PIPER_AVAILABLE else "pyttsx3"
         
         self.engine = None
+        self.voice = None
         self._initialized = False
         self._voices = []
+        self._voice_by_id: Dict[str, Dict[str, Any]] = {}
+        self._voice_by_name: Dict[str, Dict[str, Any]] = {}
+        self._tts_cache: "OrderedDict[tuple, bytes]" = OrderedDict()
     
     async def initialize(self):
         """Initialize the TTS engine."""
@@ -50,11 +121,28 @@ class TextToSpeech:
             return
         
         try:
-            logger.info("Initializing TTS engine...")
+            logger.info(f"Initializing TTS engine ({self.backend})...")
+            
+            if self.backend == "piper":
+                use_cuda = "CUDAExecutionProvider" in onnxruntime.get_available_providers()
+                self.voice = await asyncio.to_thread(
+                    PiperVoice.load, self.piper_model, use_cuda=use_cuda
+                )
+                self._voices = [{
+                    'id': self.piper_model,
+                    'name': Path(self.piper_model).stem,
+                    'index': 0,
+                    'gender': 'unknown',
+                    'age': 'unknown'
+                }]
+                self._index_voices()
+                self._initialized = True
+                logger.info("Text-to-speech engine initialized successfully")
+                return
             
             # Initialize pyttsx3 in a separate thread
             loop = asyncio.get_event_loop()
-            self.engine = await loop.run_in_executor(None, pyttsx3.init)
+            self.engine = await loop.run_in_executor(_get_tts_executor(), pyttsx3.init)
             
             # Get available voices
             voices = self.engine.getProperty('voices')
@@ -70,6 +158,7 @@ class TextToSpeech:
                         'age': getattr(voice, 'age', 'unknown')
                     }
                     self._voices.append(voice_info)
+                self._index_voices()
                 
                 logger.info(f"Found {len(self._voices)} available voices")
                 
@@ -119,16 +208,22 @@ class TextToSpeech:
                 await self.set_voice(voice_id)
             
             # Ensure output directory exists
-            os.makedirs(os.path.dirname(output_path), exist_ok=True)
+            output_dir = os.path.dirname(output_path)
+            if output_dir:
+                await _makedirs(output_dir)
             
-            # Synthesize in a separate thread
-            loop = asyncio.get_event_loop()
-            await loop.run_in_executor(
-                None,
-                lambda: self._synthesize_sync(text, output_path)
-            )
+            if self.voice is not None:
+                # ONNX Runtime sessions run concurrently; no engine lock needed
+                await asyncio.to_thread(self._synthesize_sync, text, output_path)
+            else:
+                # Synthesize in a separate thread
+                loop = asyncio.get_event_loop()
+                await loop.run_in_executor(
+                    _get_tts_executor(),
+                    lambda: self._synthesize_sync(text, output_path)
+                )
             
-            if os.path.exists(output_path):
+            if await _path_exists(output_path):
                 logger.info(f"Speech synthesis complete: {output_path}")
                 return output_path
             else:
@@ -140,9 +235,29 @@ class TextToSpeech:
     
     def _synthesize_sync(self, text: str, output_path: str):
         """Synchronous synthesis method."""
+        if self.voice is not None:
+            sf.write(output_path, self._piper_audio(text), self.voice.config.sample_rate)
+            return
+        
         self.engine.save_to_file(text, output_path)
         self.engine.runAndWait()
     
+    def _piper_audio(self, text: str) -> "np.ndarray":
+        """Run the Piper graph and return 16-bit PCM samples."""
+        pcm = b"".join(self.voice.synthesize_stream_raw(
+            text, length_scale=DEFAULT_RATE / max(self.rate, 1)
+        ))
+        audio = np.frombuffer(pcm, dtype=np.int16)
+        if self.volume < 1.0:
+            audio = (audio * self.volume).astype(np.int16)
+        return audio
+    
+    def _piper_wav_bytes(self, text: str) -> bytes:
+        """Synthesize with Piper straight into an in-memory WAV."""
+        buffer = io.BytesIO()
+        sf.write(buffer, self._piper_audio(text), self.voice.config.sample_rate, format="WAV")
+        return buffer.getvalue()
+    
     async def synthesize_to_memory(
         self,
         text: str,
@@ -158,6 +273,28 @@ class TextToSpeech:
         Returns:
             Audio data as bytes
         """
+        if not self._initialized:
+            await self.initialize()
+        
+        key = (text, voice_id or self.voice_id, self.rate, self.volume)
+        audio = self._tts_cache.get(key)
+        if audio is not None:
+            self._tts_cache.move_to_end(key)
+            return audio
+        
+        audio = await self._synthesize_bytes(text, voice_id)
+        self._tts_cache[key] = audio
+        if len(self._tts_cache) > TTS_CACHE_SIZE:
+            self._tts_cache.popitem(last=False)
+        return audio
+    
+    async def _synthesize_bytes(self, text: str, voice_id: Optional[str]) -> bytes:
+        """Synthesize a WAV into memory, bypassing the cache."""
+        if self.voice is not None:
+            if not text.strip():
+                raise ValueError("Text cannot be empty")
+            return await asyncio.to_thread(self._piper_wav_bytes, text)
+        
         # Create temporary file
         with tempfile.NamedTemporaryFile(suffix=".wav", delete=False) as temp_file:
             temp_path = temp_file.name
@@ -166,16 +303,13 @@ class TextToSpeech:
             # Synthesize to temporary file
             await self.synthesize(text, temp_path, voice_id)
             
-            # Read audio data
-            with open(temp_path, "rb") as f:
-                audio_data = f.read()
-            
-            return audio_data
+            # pyttsx3 can only write to disk; map the WAV instead of read()-ing it
+            return await asyncio.to_thread(_read_mapped_bytes, temp_path)
             
         finally:
             # Clean up temporary file
             try:
-                os.unlink(temp_path)
+                await asyncio.to_thread(os.unlink, temp_path)
             except:
                 pass
     
@@ -190,6 +324,9 @@ class TextToSpeech:
         if not self._initialized:
             await self.initialize()
         
+        if self.engine is None:
+            raise RuntimeError("Direct playback needs the pyttsx3 engine; use synthesize() with Piper")
+        
         try:
             logger.info(f"Speaking: '{text[:50]}...'")
             
@@ -200,7 +337,7 @@ class TextToSpeech:
             # Speak in a separate thread
             loop = asyncio.get_event_loop()
             await loop.run_in_executor(
-                None,
+                _get_tts_executor(),
                 lambda: self._speak_sync(text)
             )
             
@@ -220,6 +357,14 @@ class TextToSpeech:
         
         return self._voices.copy()
     
+    def _index_voices(self):
+        """Build id/name lookups over self._voices (first voice wins on duplicates)."""
+        self._voice_by_id = {}
+        self._voice_by_name = {}
+        for voice in self._voices:
+            self._voice_by_id.setdefault(voice['id'], voice)
+            self._voice_by_name.setdefault(voice['name'], voice)
+    
     async def set_voice(self, voice_id: str) -> bool:
         """
         Set voice for synthesis.
@@ -247,13 +392,15 @@ class TextToSpeech:
             
             # Try by ID or name
             if not target_voice:
-                for voice in self._voices:
-                    if voice_id in [voice['id'], voice['name']]:
-                        target_voice = voice['id']
-                        break
+                voice = self._voice_by_id.get(voice_id) or self._voice_by_name.get(voice_id)
+                if voice:
+                    target_voice = voice['id']
             
             if target_voice:
-                self.engine.setProperty('voice', target_voice)
+                if target_voice != self.voice_id:
+                    self._tts_cache.clear()
+                if self.engine:
+                    self.engine.setProperty('voice', target_voice)
                 self.voice_id = target_voice
                 logger.info(f"Voice set to: {target_voice}")
                 return True
@@ -271,7 +418,9 @@ class TextToSpeech:
             await self.initialize()
         
         self.rate = rate
-        self.engine.setProperty('rate', rate)
+        self._tts_cache.clear()
+        if self.engine:
+            self.engine.setProperty('rate', rate)
         logger.info(f"Speech rate set to: {rate}")
     
     async def set_volume(self, volume: float):
@@ -280,7 +429,9 @@ class TextToSpeech:
             await self.initialize()
         
         self.volume = max(0.0, min(1.0, volume))
-        self.engine.setProperty('volume', self.volume)
+        self._tts_cache.clear()
+        if self.engine:
+            self.engine.setProperty('volume', self.volume)
         logger.info(f"Speech volume set to: {self.volume}")
     
     async def get_model_info(self) -> Dict[str, Any]:
@@ -289,7 +440,7 @@ class TextToSpeech:
             await self.initialize()
         
         return {
-            "engine": "pyttsx3",
+            "engine": self.backend,
             "current_voice": self.voice_id,
             "rate": self.rate,
             "volume": self.volume,
@@ -306,6 +457,13 @@ class TextToSpeech:
                 pass
             del self.engine
             self.engine = None
+        self.voice = None
+        self._tts_cache.clear()
+        
+        global _TTS_EXECUTOR
+        if _TTS_EXECUTOR is not None:
+            _TTS_EXECUTOR.shutdown(wait=False)
+            _TTS_EXECUTOR = None
         
         self._initialized = False
         logger.info("Text-to-speech cleanup complete")
@@ -6,87 +6,127 @@ import asyncio
 import sys
 import os
 from pathlib import Path
+from typing import List
 
 # Add src to path
 sys.path.append(str(Path(__file__).parent / "src"))
 
-async def test_components():
-    """Test individual components."""
-    print("🧪 Testing WhisperMind Components")
-    print("="*50)
-    
-    # Test 1: Configuration
-    print("\n1. Testing Configuration...")
+
+# Each check returns its report lines so the checks can run concurrently
+# and still print in a fixed order.
+
+async def check_config() -> List[str]:
+    """Test 1: Configuration."""
     try:
         from src.core.config import Config
         config = Config()
-        print("   ✅ Configuration loaded successfully")
-        print(f"   📋 Ollama model: {config.ollama.model}")
-        print(f"   📋 Voice enabled: {config.voice.enabled}")
+        return [
+            "   ✅ Configuration loaded successfully",
+            f"   📋 Ollama model: {config.ollama.model}",
+            f"   📋 Voice enabled: {config.voice.enabled}",
+        ]
     except Exception as e:
-        print(f"   ❌ Configuration error: {e}")
-    
-    # Test 2: Document Processing
-    print("\n2. Testing Document Processing...")
+        return [f"   ❌ Configuration error: {e}"]
+
+
+async def check_document_processing() -> List[str]:
+    """Test 2: Document Processing."""
     try:
         from src.rag.document_processor import DocumentProcessor
         processor = DocumentProcessor()
-        
+
         # Test with our sample document
         docs = await processor.process_file("data/documents/whispermind_info.md")
-        print(f"   ✅ Document processing works - {len(docs)} chunks created")
-        print(f"   📋 First chunk preview: {docs[0].content[:100]}...")
+        return [
+            f"   ✅ Document processing works - {len(docs)} chunks created",
+            f"   📋 First chunk preview: {docs[0].content[:100]}...",
+        ]
     except Exception as e:
-        print(f"   ❌ Document processing error: {e}")
-    
-    # Test 3: Vector Store (without embedding model)
-    print("\n3. Testing Vector Store...")
+        return [f"   ❌ Document processing error: {e}"]
+
+
+async def check_vector_store() -> List[str]:
+    """Test 3: Vector Store (without embedding model)."""
     try:
         from src.rag.vector_store import VectorStore
         vector_store = VectorStore()
-        print("   ✅ Vector store created (initialization will happen when needed)")
+        return ["   ✅ Vector store created (initialization will happen when needed)"]
     except Exception as e:
-        print(f"   ❌ Vector store error: {e}")
-    
-    # Test 4: Text-to-Speech
-    print("\n4. Testing Text-to-Speech...")
+        return [f"   ❌ Vector store error: {e}"]
+
+
+async def check_tts() -> List[str]:
+    """Test 4: Text-to-Speech."""
     try:
         from src.voice.text_to_speech import TextToSpeech
         tts = TextToSpeech()
         await tts.initialize()
         voices = await tts.get_available_voices()
-        print(f"   ✅ TTS initialized - {len(voices)} voices available")
+        lines = [f"   ✅ TTS initialized - {len(voices)} voices available"]
         if voices:
-            print(f"   📋 Sample voice: {voices[0]['name']}")
+            lines.append(f"   📋 Sample voice: {voices[0]['name']}")
+        return lines
     except Exception as e:
-        print(f"   ❌ TTS error: {e}")
-    
-    # Test 5: Speech-to-Text
-    print("\n5. Testing Speech-to-Text...")
+        return [f"   ❌ TTS error: {e}"]
+
+
+async def check_stt() -> List[str]:
+    """Test 5: Speech-to-Text."""
     try:
         from src.voice.speech_to_text import SpeechToText
         stt = SpeechToText(model_size="tiny")  # Use tiny model for quick test
         model_info = await stt.get_model_info()
-        print(f"   ✅ STT ready - model: {model_info['model_size']}")
+        return [f"   ✅ STT ready - model: {model_info['model_size']}"]
     except Exception as e:
-        print(f"   ❌ STT error: {e}")
-    
-    # Test 6: Ollama Connection
-    print("\n6. Testing Ollama Connection...")
+        return [f"   ❌ STT error: {e}"]
+
+
+async def check_ollama() -> List[str]:
+    """Test 6: Ollama Connection."""
     try:
         from src.core.ollama_client import OllamaClient
         client = OllamaClient()
         available = await client.is_available()
-        if available:
-            models = await client.list_models()
-            print(f"   ✅ Ollama connected - {len(models)} models available")
-            if models:
-                print(f"   📋 Available models: {[m['name'] for m in models[:3]]}")
-        else:
-            print("   ⚠️  Ollama server not running (start with: ollama serve)")
+        if not available:
+            return ["   ⚠️  Ollama server not running (start with: ollama serve)"]
+
+        models = await client.list_models()
+        lines = [f"   ✅ Ollama connected - {len(models)} models available"]
+        if models:
+            lines.append(f"   📋 Available models: {[m['name'] for m in models[:3]]}")
+        return lines
     except Exception as e:
-        print(f"   ❌ Ollama error: {e}")
-    
+        return [f"   ❌ Ollama error: {e}"]
+
+
+CHECKS = [
+    ("Configuration", check_config),
+    ("Document Processing", check_document_processing),
+    ("Vector Store", check_vector_store),
+    ("Text-to-Speech", check_tts),
+    ("Speech-to-Text", check_stt),
+    ("Ollama Connection", check_ollama),
+]
+
+
+async def check_components():
+    """Test individual components."""
+    print("🧪 Testing WhisperMind Components")
+    print("="*50)
+
+    # Model loads and the Ollama probe are independent; run them together
+    results = await asyncio.gather(
+        *(check() for _, check in CHECKS),
+        return_exceptions=True
+    )
+
+    for i, ((name, _), result) in enumerate(zip(CHECKS, results), start=1):
+        print(f"\n{i}. Testing {name}...")
+        if isinstance(result, BaseException):
+            print(f"   ❌ {name} error: {result}")
+        else:
+            print("\n".join(result))
+
     print("\n" + "="*50)
     print("🎉 Component testing complete!")
     print("\n💡 Next steps:")
@@ -95,4 +135,4 @@ async def test_components():
 
 
 if __name__ == "__main__":
-    asyncio.run(test_components())
\ No newline at end of file
+    asyncio.run(check_components())
@@ -0,0 +1,73 @@
+"""Tests for plain-text reading and the chunk cache of the document processor."""
+
+import asyncio
+import sqlite3
+import sys
+from pathlib import Path
+
+import pytest
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from src.rag import document_processor
+from src.rag.document_processor import DocumentProcessor, _MMAP_THRESHOLD
+
+
+PARAGRAPH = "WhisperMind keeps everything local. It answers from your documents.\n\n"
+
+
+@pytest.fixture(params=[1, _MMAP_THRESHOLD // len(PARAGRAPH) + 1], ids=["small", "mmap"])
+def text_files(request, tmp_path):
+    """The same text saved with LF, CRLF and CR line endings.
+
+    The large variant crosses the memory-mapped read threshold.
+    """
+    text = PARAGRAPH * request.param
+    files = {}
+    for name, newline in (("lf", "\n"), ("crlf", "\r\n"), ("cr", "\r")):
+        path = tmp_path / f"{name}.txt"
+        path.write_bytes(text.replace("\n", newline).encode("utf-8"))
+        files[name] = path
+    return files
+
+
+def _chunks(path: Path):
+    processor = DocumentProcessor(chunk_size=200, chunk_overlap=40)
+    return [doc.content for doc in asyncio.run(processor.process_file(str(path)))]
+
+
+def test_line_endings_are_normalized(text_files):
+    expected = _chunks(text_files["lf"])
+    assert expected
+    assert _chunks(text_files["crlf"]) == expected
+    assert _chunks(text_files["cr"]) == expected
+    assert not any("\r" in chunk for chunk in _chunks(text_files["crlf"]))
+
+
+def test_chunk_cache_evicts_least_recently_used(tmp_path, monkeypatch):
+    monkeypatch.setattr(document_processor, "_CHUNK_CACHE_MAX_ENTRIES", 2)
+    processor = DocumentProcessor(cache_path=str(tmp_path / "cache" / "chunks.db"))
+    paths = []
+    for i in range(3):
+        path = tmp_path / f"upload_{i}.txt"
+        path.write_text(f"Uploaded document number {i}.", encoding="utf-8")
+        paths.append(str(path))
+        asyncio.run(processor.process_file(str(path)))
+
+    cached = {row[0] for row in processor._cache.execute("SELECT path FROM chunks")}
+    processor.close()
+    assert cached == set(paths[1:])
+
+
+def test_process_file_commits_chunk_cache(tmp_path):
+    cache_path = tmp_path / "chunks.db"
+    processor = DocumentProcessor(cache_path=str(cache_path))
+    path = tmp_path / "note.txt"
+    path.write_text("A single uploaded note.", encoding="utf-8")
+    asyncio.run(processor.process_file(str(path)))
+
+    # Visible to another connection before close()
+    with sqlite3.connect(cache_path) as other:
+        cached = [row[0] for row in other.execute("SELECT path FROM chunks")]
+    processor.close()
+    assert cached == [str(path)]
@@ -7,27 +7,41 @@ Repository: https://github.com/koushal13/WhisperMind
 
 import streamlit as st
 import requests
-import json
+from requests.adapters import HTTPAdapter
 import os
+import io
 import tempfile
 import threading
+import queue
+from collections import deque, OrderedDict
 import time
+import importlib.util
+from concurrent.futures import Future
 from pathlib import Path
 
-# Voice processing imports with graceful fallback
-VOICE_AVAILABLE = False
-WHISPER_LOCAL_AVAILABLE = False
+# orjson decodes the one-object-per-token NDJSON stream noticeably faster.
 try:
-    import speech_recognition as sr
-    import pyttsx3
-    import whisper  # Local Whisper model
-    VOICE_AVAILABLE = True
-    WHISPER_LOCAL_AVAILABLE = True
-    # For microphone, we'll use Streamlit's audio_input instead of pyaudio
-    MICROPHONE_AVAILABLE = True  # We'll use browser-based recording
-except ImportError as e:
-    VOICE_AVAILABLE = False
-    MICROPHONE_AVAILABLE = False
+    from orjson import loads as json_loads
+except ImportError:
+    from json import loads as json_loads
+
+# Voice processing packages are only probed here; the heavy imports happen
+# inside VoiceProcessor so text-only sessions start without loading them.
+# faster-whisper is used when installed, openai-whisper otherwise.
+FASTER_WHISPER_AVAILABLE = importlib.util.find_spec("faster_whisper") is not None
+VOICE_AVAILABLE = all(
+    importlib.util.find_spec(name) is not None
+    for name in ("speech_recognition", "pyttsx3")
+) and (FASTER_WHISPER_AVAILABLE or importlib.util.find_spec("whisper") is not None)
+WHISPER_LOCAL_AVAILABLE = VOICE_AVAILABLE  # Local Whisper model
+# For microphone, we'll use Streamlit's audio_input instead of pyaudio
+MICROPHONE_AVAILABLE = VOICE_AVAILABLE  # We'll use browser-based recording
+
+# Keep the chat model resident in Ollama between turns (default is 5m)
+OLLAMA_KEEP_ALIVE = "30m"
+# Fail fast when Ollama is unreachable, but allow a slow cold model load
+# before the first streamed token arrives.
+OLLAMA_STREAM_TIMEOUT = (5, 120)
 
 st.set_page_config(
     page_title="WhisperMind - Local AI Chatbot with Voice",
@@ -35,42 +49,169 @@ st.set_page_config(
     layout="wide",
 )
 
-def check_ollama():
-    """Check if Ollama is available."""
+@st.cache_data(ttl=10, show_spinner=False)
+def ollama_tags():
+    """Fetch installed model names from Ollama, or None if it is unreachable."""
     try:
-        response = requests.get("http://localhost:11434/api/tags", timeout=5)
-        return response.status_code == 200
-    except:
-        return False
-
-def get_ollama_models():
-    """Get available Ollama models."""
-    try:
-        response = requests.get("http://localhost:11434/api/tags", timeout=5)
+        response = ollama_session().get("http://localhost:11434/api/tags", timeout=5)
         if response.status_code == 200:
             data = response.json()
-            return [model["name"] for model in data.get("models", [])]
+            return tuple(model["name"] for model in data.get("models", []))
     except:
         pass
-    return []
+    return None
 
-def chat_with_ollama(message, model="llama3"):
-    """Send message to Ollama and get response."""
+def check_ollama():
+    """Check if Ollama is available."""
+    return ollama_tags() is not None
+
+def get_ollama_models():
+    """Get available Ollama models."""
+    return ollama_tags() or ()
+
+@st.cache_data(ttl=15, show_spinner=False)
+def get_model_choices(preferred="llama3"):
+    """Return the installed models and the index of the preferred one."""
+    models = get_ollama_models()
+    bases = {}
+    for i, name in enumerate(models):
+        bases.setdefault(name.split(":", 1)[0], i)
+    return models, bases.get(preferred, 0)
+
+@st.cache_resource
+def ollama_session():
+    """Shared keep-alive HTTP session for the local Ollama server."""
+    session = requests.Session()
+    session.mount("http://", HTTPAdapter(pool_connections=4, pool_maxsize=8))
+    return session
+
+@st.cache_resource
+def faster_whisper_model():
+    """Load the CTranslate2 int8 Whisper model once per process."""
+    from faster_whisper import WhisperModel
+    return WhisperModel("base.en", device="cpu", compute_type="int8")
+
+@st.cache_resource
+def warm_model(model):
+    """Load the model into Ollama once per process with a one-token generate."""
+    def _warm():
+        try:
+            ollama_session().post(
+                "http://localhost:11434/api/generate",
+                json={
+                    "model": model,
+                    "prompt": " ",
+                    "stream": False,
+                    "keep_alive": OLLAMA_KEEP_ALIVE,
+                    "options": {"num_predict": 1}
+                },
+                timeout=120
+            )
+        except requests.RequestException:
+            pass
+    
+    # Run in the background so the first render is not held up by model load
+    thread = threading.Thread(target=_warm, name=f"ollama-warm-{model}", daemon=True)
+    thread.start()
+    return thread
+
+def _stream_ollama(message, model):
+    """Send message to Ollama and yield response tokens as they stream in.
+    
+    Returns True once Ollama reports the response done, False otherwise.
+    """
     try:
         url = "http://localhost:11434/api/generate"
         data = {
             "model": model,
             "prompt": message,
-            "stream": False
+            "stream": True,
+            "keep_alive": OLLAMA_KEEP_ALIVE
         }
         
-        response = requests.post(url, json=data, timeout=30)
-        if response.status_code == 200:
-            return response.json()["response"]
-        else:
-            return f"Error: {response.status_code} - {response.text}"
+        with ollama_session().post(url, json=data, stream=True, timeout=OLLAMA_STREAM_TIMEOUT) as response:
+            if response.status_code != 200:
+                yield f"Error: {response.status_code} - {response.text}"
+                return False
+            
+            for line in response.iter_lines(chunk_size=None):
+                if not line:
+                    continue
+                chunk = json_loads(line)
+                yield chunk.get("response", "")
+                if chunk.get("done"):
+                    return True
     except Exception as e:
-        return f"Error connecting to Ollama: {str(e)}"
+        yield f"Error connecting to Ollama: {str(e)}"
+    return False
+
+def _record(stream, parts):
+    """Re-yield a token stream, appending each token to parts; returns the stream's result."""
+    while True:
+        try:
+            token = next(stream)
+        except StopIteration as stop:
+            return stop.value
+        parts.append(token)
+        yield token
+
+# Identical prompts submitted concurrently (e.g. several sessions in a demo)
+# share one generation: the first caller streams it, the rest wait for the
+# finished text. Completed responses are kept briefly for repeat prompts.
+# (A plain dict rather than st.cache_data, which can't be filled from a stream.)
+_inflight = {}
+_inflight_lock = threading.Lock()
+_responses = OrderedDict()
+RESPONSE_CACHE_TTL = 300
+RESPONSE_CACHE_MAX = 256
+# How long a follower waits on the leader before requesting its own answer
+COALESCE_WAIT_TIMEOUT = 120
+
+def chat_with_ollama(message, model="llama3"):
+    """Stream an Ollama response, coalescing identical in-flight prompts."""
+    key = (model, message)
+    with _inflight_lock:
+        cached = _responses.get(key)
+        if cached is not None and time.monotonic() - cached[0] >= RESPONSE_CACHE_TTL:
+            del _responses[key]
+            cached = None
+        if cached is None:
+            future = _inflight.get(key)
+            is_leader = future is None
+            if is_leader:
+                future = _inflight[key] = Future()
+        else:
+            _responses.move_to_end(key)
+    
+    if cached is not None:
+        yield cached[1]
+        return
+    
+    if not is_leader:
+        try:
+            yield future.result(timeout=COALESCE_WAIT_TIMEOUT)
+        except Exception:
+            # The leader gave up, failed or is too slow: generate our own answer
+            yield from _stream_ollama(message, model)
+        return
+    
+    parts = []
+    completed = False
+    try:
+        completed = yield from _record(_stream_ollama(message, model), parts)
+    finally:
+        text = "".join(parts)
+        with _inflight_lock:
+            _inflight.pop(key, None)
+            if completed:
+                _responses[key] = (time.monotonic(), text)
+                if len(_responses) > RESPONSE_CACHE_MAX:
+                    _responses.popitem(last=False)
+        if completed:
+            future.set_result(text)
+        else:
+            # Stopped early (rerun or error): followers must not take a partial answer
+            future.set_exception(RuntimeError("Ollama stream did not complete"))
 
 class VoiceProcessor:
     """Voice input/output processor with file upload fallback."""
@@ -78,48 +219,101 @@ class VoiceProcessor:
     def __init__(self):
         self.recognizer = None
         self.tts_engine = None
+        self.whisper_model = None
         self.is_speaking = False
         self._speaking_lock = threading.Lock()
+        # One processor is shared by every session, so transcriptions take turns
+        self._transcribe_lock = threading.Lock()
+        self._sr = None
+        self._pyttsx3 = None
+        self._tts_queue = queue.Queue()
+        self._tts_ready = threading.Event()
+        # Set by stop_speaking; the worker stops its engine at the next word
+        self._tts_interrupt = threading.Event()
         
         if VOICE_AVAILABLE:
+            import speech_recognition as sr
+            import pyttsx3
+            self._sr = sr
+            self._pyttsx3 = pyttsx3
+            
             # Initialize local Whisper model silently in background
-            if not hasattr(st.session_state, 'whisper_model'):
+            if FASTER_WHISPER_AVAILABLE:
+                faster_whisper_model()
+            else:
                 import whisper
-                st.session_state.whisper_model = whisper.load_model("base")
+                self.whisper_model = whisper.load_model("base")
             
             try:
                 self.recognizer = sr.Recognizer()
-                
-                # Initialize TTS with better voice settings
-                self.tts_engine = pyttsx3.init()
-                
-                # Configure TTS for clear male voice
-                voices = self.tts_engine.getProperty('voices')
-                if voices and len(voices) > 0:
-                    # Try to find a good male voice
-                    male_voice = None
-                    for voice in voices:
-                        # Check for male voices or specific good voices on macOS
-                        voice_name = voice.name.lower()
-                        if any(name in voice_name for name in ['alex', 'daniel', 'thomas', 'male']):
-                            male_voice = voice
-                            break
-                    
-                    # Use male voice if found, otherwise use default
-                    if male_voice:
-                        self.tts_engine.setProperty('voice', male_voice.id)
-                        print(f"Using voice: {male_voice.name}")
-                    else:
-                        self.tts_engine.setProperty('voice', voices[0].id)
-                        print(f"Using default voice: {voices[0].name}")
-                
-                # Set optimal speech parameters for clarity
-                self.tts_engine.setProperty('rate', 175)  # Good speaking pace
-                self.tts_engine.setProperty('volume', 1.0)  # Full volume
-                
             except Exception as e:
                 st.error(f"Voice initialization error: {e}")
                 self.recognizer = None
+            
+            # pyttsx3 engines are not thread-safe, so a single long-lived
+            # worker owns the engine (and is_speaking) and speaks queued
+            # utterances in order.
+            self._tts_worker = threading.Thread(target=self._tts_loop, daemon=True)
+            self._tts_worker.start()
+            self._tts_ready.wait(timeout=5)
+    
+    def _configure_tts_engine(self, engine):
+        """Apply the preferred voice and speech parameters to a TTS engine."""
+        # Configure TTS for clear male voice
+        voices = engine.getProperty('voices')
+        if voices and len(voices) > 0:
+            # Try to find a good male voice
+            male_voice = None
+            for voice in voices:
+                # Check for male voices or specific good voices on macOS
+                voice_name = voice.name.lower()
+                if any(name in voice_name for name in ['alex', 'daniel', 'thomas', 'male']):
+                    male_voice = voice
+                    break
+            
+            # Use male voice if found, otherwise use default
+            if male_voice:
+                engine.setProperty('voice', male_voice.id)
+                print(f"Using voice: {male_voice.name}")
+            else:
+                engine.setProperty('voice', voices[0].id)
+                print(f"Using default voice: {voices[0].name}")
+        
+        # Set optimal speech parameters for clarity
+        engine.setProperty('rate', 175)  # Good speaking pace
+        engine.setProperty('volume', 1.0)  # Full volume
+    
+    def _tts_loop(self):
+        """Own the TTS engine and speak queued text one utterance at a time."""
+        try:
+            # Initialize TTS with better voice settings on this thread
+            engine = self._pyttsx3.init()
+            self._configure_tts_engine(engine)
+            self.tts_engine = engine
+        except Exception as e:
+            print(f"TTS initialization error: {e}")
+            return
+        finally:
+            self._tts_ready.set()
+        
+        def _on_word(name, location, length):
+            # Driver callbacks run on this thread, so stop() stays here too
+            if self._tts_interrupt.is_set():
+                engine.stop()
+        engine.connect('started-word', _on_word)
+        
+        while True:
+            text = self._tts_queue.get()
+            self._tts_interrupt.clear()
+            self.is_speaking = True
+            try:
+                engine.say(text)
+                engine.runAndWait()
+            except Exception as e:
+                print(f"TTS Error: {e}")
+            finally:
+                self.is_speaking = False
+                self._tts_queue.task_done()
     
     def convert_audio_for_recognition(self, audio_data):
         """Convert audio data to a format compatible with speech recognition, avoiding FLAC issues."""
@@ -156,6 +350,11 @@ class VoiceProcessor:
                 print("⚠️ Audio too short")
                 return None, "Audio too short - please record a longer message"
             
+            if FASTER_WHISPER_AVAILABLE:
+                # faster-whisper decodes the recording from memory; no temp file
+                print("🎯 Running faster-whisper transcription...")
+                return self._transcribe_faster_whisper(io.BytesIO(audio_bytes))
+            
             # Create temporary file for local Whisper processing
             with tempfile.NamedTemporaryFile(delete=False, suffix='.wav') as tmp_file:
                 tmp_file.write(audio_bytes)
@@ -164,11 +363,12 @@ class VoiceProcessor:
             try:
                 # Use local Whisper model - completely offline!
                 print("🧠 Checking Whisper model availability...")
-                if hasattr(st.session_state, 'whisper_model'):
+                if self.whisper_model is not None:
                     try:
                         print("🎯 Running Whisper transcription...")
                         # Try direct Whisper transcription
-                        result = st.session_state.whisper_model.transcribe(tmp_path)
+                        with self._transcribe_lock:
+                            result = self.whisper_model.transcribe(tmp_path)
                         transcribed_text = result["text"].strip()
                         print(f"📝 Raw transcription: '{transcribed_text}'")
                         
@@ -187,7 +387,7 @@ class VoiceProcessor:
                         else:
                             return None, f"Whisper processing error: {str(whisper_error)[:100]}"
                 else:
-                    print("❌ Whisper model not found in session state")
+                    print("❌ Whisper model not loaded")
                     return None, "Local Whisper model not loaded. Please refresh the page."
                         
             finally:
@@ -242,22 +442,36 @@ class VoiceProcessor:
         except Exception as e:
             return None, f"System compatibility issue. Please use text input instead."
     
-    def transcribe_audio_file(self, audio_file_path):
-        """Transcribe uploaded audio file."""
-        if not self.recognizer:
-            return None, "Speech recognition not available"
+    def _transcribe_faster_whisper(self, audio):
+        """Transcribe a file path or binary file object with the shared faster-whisper model."""
+        try:
+            segments, _ = faster_whisper_model().transcribe(audio, beam_size=1, vad_filter=True)
+            text = " ".join(segment.text.strip() for segment in segments).strip()
+        except Exception as e:
+            print(f"❌ Whisper error: {e}")
+            return None, f"Whisper processing error: {str(e)[:100]}"
         
+        print(f"📝 Raw transcription: '{text}'")
+        if not text:
+            return None, "Could not understand the audio - please speak more clearly"
+        return text, None
+    
+    def transcribe_audio_file(self, audio_file_path):
+        """Transcribe uploaded audio file with local Whisper."""
         try:
-            with sr.AudioFile(audio_file_path) as source:
-                audio = self.recognizer.record(source)
+            if FASTER_WHISPER_AVAILABLE:
+                return self._transcribe_faster_whisper(audio_file_path)
+            elif self.whisper_model is not None:
+                with self._transcribe_lock:
+                    result = self.whisper_model.transcribe(audio_file_path)
+                text = result["text"]
+            else:
+                return None, "Speech recognition not available"
             
-            try:
-                text = self.recognizer.recognize_google(audio)
-                return text, None
-            except sr.UnknownValueError:
+            text = text.strip()
+            if not text:
                 return None, "Could not understand audio"
-            except sr.RequestError as e:
-                return None, f"Speech recognition error: {e}"
+            return text, None
                 
         except Exception as e:
             return None, f"Error processing audio file: {e}"
@@ -267,54 +481,18 @@ class VoiceProcessor:
         if not self.tts_engine or not text.strip():
             return False
         
-        # Prevent multiple simultaneous speech operations
-        if self.is_speaking:
-            return False
-            
         try:
+            # Prevent multiple simultaneous speech operations; is_speaking is
+            # only written by the TTS worker
             with self._speaking_lock:
-                if self.is_speaking:  # Double-check after acquiring lock
+                if self.is_speaking or not self._tts_queue.empty():
                     return False
                 
-                self.is_speaking = True
-                
-                def speak_safely():
-                    try:
-                        # Use a fresh engine instance to avoid run loop conflicts
-                        temp_engine = pyttsx3.init()
-                        
-                        # Copy settings from main engine
-                        voices = temp_engine.getProperty('voices')
-                        if voices:
-                            for voice in voices:
-                                voice_name = voice.name.lower()
-                                if any(name in voice_name for name in ['alex', 'daniel', 'thomas', 'male']):
-                                    temp_engine.setProperty('voice', voice.id)
-                                    break
-                        
-                        temp_engine.setProperty('rate', 175)
-                        temp_engine.setProperty('volume', 1.0)
-                        
-                        # Speak the text
-                        temp_engine.say(text)
-                        temp_engine.runAndWait()
-                        
-                        # Clean up
-                        temp_engine.stop()
-                        del temp_engine
-                        
-                    except Exception as e:
-                        print(f"TTS Error: {e}")
-                    finally:
-                        self.is_speaking = False
-                
-                # Run in background thread
-                thread = threading.Thread(target=speak_safely, daemon=True)
-                thread.start()
-                return True
+                # Hand off to the persistent TTS worker thread
+                self._tts_queue.put_nowait(text)
+            return True
                 
         except Exception as e:
-            self.is_speaking = False
             print(f"Text-to-speech error: {e}")
             return False
     
@@ -323,22 +501,34 @@ class VoiceProcessor:
         return self.speak_text(text)
     
     def stop_speaking(self):
-        """Stop any ongoing speech synthesis."""
+        """Stop any ongoing speech synthesis and drop queued text."""
         try:
+            # Drain pending utterances, then have the worker interrupt the current one
             with self._speaking_lock:
-                if self.is_speaking:
-                    self.is_speaking = False
-                    # Try to stop the main engine if it exists
-                    if self.tts_engine:
-                        try:
-                            self.tts_engine.stop()
-                        except:
-                            pass  # Ignore stop errors
-                return True
+                while True:
+                    try:
+                        self._tts_queue.get_nowait()
+                    except queue.Empty:
+                        break
+                    self._tts_queue.task_done()
+                self._tts_interrupt.set()
+            return True
         except Exception as e:
             print(f"Error stopping speech: {e}")
             return False
 
+def ensure_message_history(max_len):
+    """Keep chat history in a deque capped at the last max_len messages."""
+    messages = st.session_state.get("messages")
+    if not isinstance(messages, deque) or messages.maxlen != max_len:
+        st.session_state.messages = deque(messages or (), maxlen=max_len)
+    return st.session_state.messages
+
+@st.cache_resource
+def get_voice_processor():
+    """Create the voice processor once per server process."""
+    return VoiceProcessor() if VOICE_AVAILABLE else None
+
 def main():
     st.title("🧠 WhisperMind - Local AI Chatbot with Voice")
     
@@ -483,15 +673,19 @@ def main():
     with st.sidebar:
         st.subheader("📊 Status")
         
+        if st.button("🔄 Refresh status", key="refresh_status_btn"):
+            ollama_tags.clear()
+            get_model_choices.clear()
+            st.rerun()
+        
         ollama_available = check_ollama()
         if ollama_available:
             st.success("✅ Ollama is running")
-            models = get_ollama_models()
+            models, default_idx = get_model_choices()
             
             if models:
-                selected_model = st.selectbox("Select Model", models, 
-                                           index=0 if "llama3" not in [m.split(":")[0] for m in models] 
-                                           else [m.split(":")[0] for m in models].index("llama3"))
+                selected_model = st.selectbox("Select Model", models, index=default_idx)
+                warm_model(selected_model)
             else:
                 st.warning("No models found")
                 selected_model = "llama3"
@@ -501,6 +695,8 @@ def main():
             st.info("💡 Start Ollama with: `ollama serve`")
             selected_model = "llama3"
         
+        history_length = st.slider("History length", 10, 200, 50, key="history_length")
+        
         # Voice status
         st.divider()
         st.subheader("🎤 Voice Features")
@@ -548,12 +744,11 @@ def main():
         
         st.divider()
 
-    # Initialize voice processor silently after sidebar
-    # Force re-initialization to ensure latest TTS fixes are applied
-    if 'voice_processor' not in st.session_state or not hasattr(st.session_state.voice_processor, '_speaking_lock'):
-        st.session_state.voice_processor = VoiceProcessor() if VOICE_AVAILABLE else None    # Display chat messages cleanly
-    if "messages" not in st.session_state:
-        st.session_state.messages = []
+    # Voice processor is shared across sessions via st.cache_resource
+    st.session_state.voice_processor = get_voice_processor()
+    
+    # Display chat messages cleanly
+    ensure_message_history(history_length)
     
     # Chat messages without extra controls
     for idx, message in enumerate(st.session_state.messages):
@@ -771,7 +966,7 @@ def main():
             with button_col2:
                 # Clear button
                 if st.button("🗑️", key="clear_btn", help="Clear"):
-                    st.session_state.messages = []
+                    st.session_state.messages.clear()
                     st.session_state.voice_transcription = ""
                     st.session_state.input_value = ""
                     st.session_state.status_message = ""
@@ -833,9 +1028,7 @@ def process_user_input(prompt, selected_model, ollama_available, voice_output_en
     # Generate response
     if ollama_available:
         with st.chat_message("assistant"):
-            with st.spinner("🤔 Thinking..."):
-                response = chat_with_ollama(prompt, selected_model)
-            st.markdown(response)
+            response = st.write_stream(chat_with_ollama(prompt, selected_model))
             
             # Auto-speak response if voice output is enabled
             if VOICE_AVAILABLE and voice_output_enabled and st.session_state.voice_processor:
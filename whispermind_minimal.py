@@ -11,17 +11,57 @@ import threading
 import tempfile
 import os
 import hashlib
+import io
+import math
+import queue
+import re
 import time
+from concurrent.futures import ThreadPoolExecutor
+from functools import lru_cache
 
 # Voice processing imports
 try:
     import speech_recognition as sr
     import pyttsx3
-    import whisper
     VOICE_AVAILABLE = True
 except ImportError:
     VOICE_AVAILABLE = False
 
+# faster-whisper (CTranslate2 int8 kernels) when installed, openai-whisper otherwise
+try:
+    from faster_whisper import WhisperModel
+    FASTER_WHISPER_AVAILABLE = True
+except ImportError:
+    FASTER_WHISPER_AVAILABLE = False
+    try:
+        import whisper
+    except ImportError:
+        VOICE_AVAILABLE = False
+
+# In-memory audio decoding, so recordings reach Whisper without a temp file
+try:
+    import numpy as np
+    import soundfile as sf
+    from scipy.signal import resample_poly
+    IN_MEMORY_DECODE_AVAILABLE = True
+except ImportError:
+    IN_MEMORY_DECODE_AVAILABLE = False
+
+# Silero VAD (bundled weights, no download) to trim silence before
+# openai-whisper; faster-whisper runs the same model via vad_filter
+try:
+    import torch
+    from silero_vad import load_silero_vad, get_speech_timestamps
+    SILERO_VAD_AVAILABLE = True
+except ImportError:
+    SILERO_VAD_AVAILABLE = False
+
+# xxh3 for fingerprinting recordings; hashlib's blake2b otherwise
+try:
+    import xxhash
+except ImportError:
+    xxhash = None
+
 # Ollama imports
 try:
     import ollama
@@ -29,41 +69,276 @@ try:
 except ImportError:
     OLLAMA_AVAILABLE = False
 
+# One client (and HTTP connection pool) for every request
+_client = ollama.Client() if OLLAMA_AVAILABLE else None
+
+# Keep the chat model resident between turns instead of Ollama's short default
+OLLAMA_KEEP_ALIVE = "30m"
+
+# Reads Ollama's token stream ahead of the script thread, so the HTTP
+# stream and the UI rendering overlap
+_ollama_executor = ThreadPoolExecutor(max_workers=4, thread_name_prefix="ollama")
+_STREAM_END = object()
+
+# English-only deployments get the distilled English model (same WER as
+# base at a fraction of the compute); set False for multilingual "base"
+WHISPER_ENGLISH_ONLY = True
+WHISPER_LANGUAGE = "en" if WHISPER_ENGLISH_ONLY else None
+FASTER_WHISPER_MODEL = "distil-small.en" if WHISPER_ENGLISH_ONLY else "base"
+# openai-whisper can't load distil checkpoints; its English base is closest
+OPENAI_WHISPER_MODEL = "base.en" if WHISPER_ENGLISH_ONLY else "base"
+
+# openai-whisper installs kv-cache hooks on the shared model for each
+# decode, so concurrent transcribe/decode calls would corrupt each other
+_WHISPER_LOCK = threading.Lock()
+
+@st.cache_resource
+def get_whisper():
+    """Load the local Whisper model once per process, shared by all sessions."""
+    if FASTER_WHISPER_AVAILABLE:
+        import ctranslate2
+        if ctranslate2.get_cuda_device_count() > 0:
+            return WhisperModel(FASTER_WHISPER_MODEL, device="cuda", compute_type="float16")
+        return WhisperModel(FASTER_WHISPER_MODEL, device="cpu", compute_type="int8")
+    
+    import torch
+    model = None
+    if torch.cuda.is_available():
+        try:
+            model = whisper.load_model(OPENAI_WHISPER_MODEL, device="cuda")
+        except Exception as e:
+            print(f"⚠️ Whisper on CUDA failed, using CPU: {e}")
+    if model is None:
+        model = whisper.load_model(OPENAI_WHISPER_MODEL, device="cpu")
+    
+    # Build the feature-extraction constants on the model's device up front
+    _hann_window(model.device)
+    whisper.audio.mel_filters(model.device, model.dims.n_mels)
+    return model
+
+@lru_cache(maxsize=None)
+def _hann_window(device):
+    """STFT window, built once per device (whisper rebuilds it on every call)."""
+    import torch
+    return torch.hann_window(whisper.audio.N_FFT, device=device)
+
+def log_mel_batch(model, audios):
+    """Log-mel spectrograms for a batch of 16 kHz clips, padded to 30 s.
+    
+    Same features as whisper.log_mel_spectrogram, but with one batched STFT
+    on the model's device and the window and mel filters reused.
+    
+    Returns:
+        Tensor of shape (batch, n_mels, 3000)
+    """
+    import torch
+    
+    device = model.device
+    audio = torch.from_numpy(np.stack([whisper.pad_or_trim(a) for a in audios])).to(device)
+    stft = torch.stft(audio, whisper.audio.N_FFT, whisper.audio.HOP_LENGTH,
+                      window=_hann_window(device), return_complex=True)
+    magnitudes = stft[..., :-1].abs() ** 2
+    mel = whisper.audio.mel_filters(device, model.dims.n_mels) @ magnitudes
+    
+    log_spec = torch.clamp(mel, min=1e-10).log10()
+    # Dynamic-range clamp is per clip, as in the single-clip version
+    log_spec = torch.maximum(log_spec, log_spec.amax(dim=(-2, -1), keepdim=True) - 8.0)
+    return (log_spec + 4.0) / 4.0
+
+# openai-whisper pads every clip to one 30 s window, so clips from
+# concurrent sessions are gathered for up to 20 ms and decoded together
+BATCH_WINDOW_S = 0.02
+BATCH_MAX_SIZE = 8
+BATCH_MAX_SAMPLES = 30 * 16000
+_batch_q = queue.Queue()
+_batch_thread = None
+_batch_thread_lock = threading.Lock()
+
+# transcribe()'s default quality checks; batched (temperature 0) results that
+# fail them are re-run through transcribe() and its temperature fallback
+COMPRESSION_RATIO_THRESHOLD = 2.4
+LOGPROB_THRESHOLD = -1.0
+NO_SPEECH_THRESHOLD = 0.6
+
+class _BatchRequest:
+    """One clip waiting on the batch worker."""
+    __slots__ = ("audio", "done", "text", "error")
+    
+    def __init__(self, audio):
+        self.audio = audio
+        self.done = threading.Event()
+        self.text = None
+        self.error = None
+
+def _collect_batch():
+    """Block for one request, then take whatever else arrives within the window."""
+    batch = [_batch_q.get()]
+    deadline = time.monotonic() + BATCH_WINDOW_S
+    while len(batch) < BATCH_MAX_SIZE:
+        remaining = deadline - time.monotonic()
+        if remaining <= 0:
+            break
+        try:
+            batch.append(_batch_q.get(timeout=remaining))
+        except queue.Empty:
+            break
+    return batch
+
+def _batch_text(model, audio, result, fp16):
+    """Text for one batched result, held to transcribe()'s checks: likely
+    silence is empty, repetitive or low-confidence decodes are redone by
+    transcribe() with its temperature fallback."""
+    if result.no_speech_prob > NO_SPEECH_THRESHOLD and result.avg_logprob < LOGPROB_THRESHOLD:
+        return ""
+    if result.compression_ratio > COMPRESSION_RATIO_THRESHOLD or result.avg_logprob < LOGPROB_THRESHOLD:
+        return model.transcribe(audio, language=WHISPER_LANGUAGE, fp16=fp16)["text"].strip()
+    return result.text.strip()
+
+def _batch_loop(model):
+    """Decode queued clips together: one mel batch, one whisper.decode call."""
+    options = whisper.DecodingOptions(language=WHISPER_LANGUAGE, fp16=model.device.type == "cuda")
+    while True:
+        batch = _collect_batch()
+        try:
+            mels = log_mel_batch(model, [request.audio for request in batch])
+            with _WHISPER_LOCK:
+                results = whisper.decode(model, mels, options)
+                for request, result in zip(batch, results):
+                    request.text = _batch_text(model, request.audio, result, options.fp16)
+        except Exception as e:
+            for request in batch:
+                request.error = e
+        finally:
+            for request in batch:
+                request.done.set()
+
+def _transcribe_batched(model, audio):
+    """Queue a clip for the shared batch worker and wait for its text."""
+    global _batch_thread
+    with _batch_thread_lock:
+        if _batch_thread is None:
+            _batch_thread = threading.Thread(target=_batch_loop, args=(model,), name="whisper-batch", daemon=True)
+            _batch_thread.start()
+    
+    request = _BatchRequest(audio)
+    _batch_q.put(request)
+    request.done.wait()
+    if request.error is not None:
+        raise request.error
+    return request.text
+
+def transcribe_with_whisper(model, audio):
+    """Transcribe audio with whichever Whisper backend is loaded."""
+    if FASTER_WHISPER_AVAILABLE:
+        # Greedy decoding; VAD drops silent stretches before the encoder
+        segments, _ = model.transcribe(audio, language=WHISPER_LANGUAGE, beam_size=1, vad_filter=True)
+        return " ".join(segment.text.strip() for segment in segments).strip()
+    if IN_MEMORY_DECODE_AVAILABLE and isinstance(audio, np.ndarray) and len(audio) <= BATCH_MAX_SAMPLES:
+        return _transcribe_batched(model, audio)
+    # Half precision on the GPU; fp32 on CPU, where fp16 isn't supported
+    with _WHISPER_LOCK:
+        return model.transcribe(audio, language=WHISPER_LANGUAGE, fp16=model.device.type == "cuda")["text"].strip()
+
+def decode_audio(audio, target_rate=16000):
+    """Decode WAV/FLAC/OGG audio to 16 kHz mono float32, or None if unsupported.
+    
+    Args:
+        audio: Encoded bytes, or a seekable file-like object read in place
+    """
+    if not IN_MEMORY_DECODE_AVAILABLE:
+        return None
+    try:
+        if hasattr(audio, 'read'):
+            audio.seek(0)
+        else:
+            audio = io.BytesIO(audio)
+        data, sample_rate = sf.read(audio, dtype='float32', always_2d=False)
+    except Exception:
+        return None
+    
+    if data.ndim > 1:
+        data = data.mean(axis=1)
+    if sample_rate != target_rate:
+        divisor = math.gcd(sample_rate, target_rate)
+        data = resample_poly(data, target_rate // divisor, sample_rate // divisor)
+    return np.ascontiguousarray(data, dtype=np.float32)
+
+# RMS below this (full scale = 1.0) is an empty room, not speech
+SILENCE_RMS = 0.005
+
+def is_silent(data):
+    """Cheap energy gate: one dot-product reduction, no temporary array."""
+    return data.size == 0 or math.sqrt(float(np.dot(data, data)) / data.size) < SILENCE_RMS
+
+@st.cache_resource
+def get_vad():
+    """Load the Silero VAD model once per process."""
+    return load_silero_vad()
+
+def trim_to_speech(data, sample_rate=16000):
+    """Keep only the speech in a 16 kHz float32 clip.
+    
+    Returns:
+        The concatenated speech windows (empty if there is no speech), or the
+        clip unchanged when Silero VAD isn't used for this backend
+    """
+    if FASTER_WHISPER_AVAILABLE or not SILERO_VAD_AVAILABLE:
+        return data
+    timestamps = get_speech_timestamps(torch.from_numpy(data), get_vad(), sampling_rate=sample_rate)
+    if not timestamps:
+        return data[:0]
+    return np.concatenate([data[ts['start']:ts['end']] for ts in timestamps])
+
+def audio_fingerprint(buf):
+    """64-bit non-cryptographic fingerprint of a recording, for dedup."""
+    if xxhash is not None:
+        return xxhash.xxh3_64_intdigest(buf)
+    return int.from_bytes(hashlib.blake2b(buf, digest_size=8).digest(), "little")
+
+# Substrings of preferred system voice names, matched once at startup
+PREFERRED_VOICE_NAMES = frozenset({'daniel', 'alex', 'thomas'})
+
 class VoiceProcessor:
     """Simple voice processor with local Whisper and TTS."""
     
     def __init__(self):
         self.tts_engine = None
-        self.is_speaking = False
-        self._speaking_lock = threading.Lock()
+        # All speech goes through one long-lived consumer thread, which creates
+        # the engine (pyttsx3 drivers are bound to their creating thread) and
+        # is the only caller of say()/runAndWait()
+        self._speech_q = queue.Queue()
+        self._tts_ready = threading.Event()
         
         if VOICE_AVAILABLE:
-            # Initialize local Whisper model
-            if not hasattr(st.session_state, 'whisper_model'):
-                st.session_state.whisper_model = whisper.load_model("base")
+            # Initialize local Whisper model (cached across sessions)
+            get_whisper()
             
-            # Initialize TTS
-            try:
-                self.tts_engine = pyttsx3.init()
-                voices = self.tts_engine.getProperty('voices')
-                if voices:
-                    for voice in voices:
-                        if any(name in voice.name.lower() for name in ['daniel', 'alex', 'thomas']):
-                            self.tts_engine.setProperty('voice', voice.id)
-                            print(f"Using voice: {voice.name}")
-                            break
-                self.tts_engine.setProperty('rate', 175)
-                self.tts_engine.setProperty('volume', 1.0)
-            except Exception as e:
-                print(f"TTS initialization error: {e}")
+            # Initialize TTS on its own thread, then wait until it is usable
+            threading.Thread(target=self._speech_loop, name="tts", daemon=True).start()
+            self._tts_ready.wait()
+    
+    def _init_tts_engine(self):
+        """Create and configure the pyttsx3 engine on the calling (TTS) thread."""
+        engine = pyttsx3.init()
+        voices = engine.getProperty('voices')
+        if voices:
+            for voice in voices:
+                voice_name = voice.name.lower()
+                if any(name in voice_name for name in PREFERRED_VOICE_NAMES):
+                    engine.setProperty('voice', voice.id)
+                    print(f"Using voice: {voice.name}")
+                    break
+        engine.setProperty('rate', 175)
+        engine.setProperty('volume', 1.0)
+        return engine
     
     def transcribe_audio(self, audio_data):
         """Transcribe audio using local Whisper."""
         print("🔍 Whisper: Starting audio processing...")
         try:
-            # Get audio bytes
-            if hasattr(audio_data, 'getvalue'):
-                audio_bytes = audio_data.getvalue()
+            # Zero-copy view of the upload; only its length is needed here
+            if hasattr(audio_data, 'getbuffer'):
+                audio_bytes = audio_data.getbuffer()
             else:
                 audio_bytes = audio_data
             
@@ -73,17 +348,33 @@ class VoiceProcessor:
                 print("⚠️ Audio too short")
                 return None, "Audio too short - please record a longer message"
             
-            # Create temporary file
-            with tempfile.NamedTemporaryFile(delete=False, suffix='.wav') as tmp_file:
-                tmp_file.write(audio_bytes)
-                tmp_path = tmp_file.name
+            # Decode in memory; only audio soundfile can't read goes
+            # through a temporary file for Whisper's ffmpeg loader
+            tmp_path = None
+            # soundfile reads the upload itself rather than a copy of its bytes
+            audio_input = decode_audio(audio_data if hasattr(audio_data, 'read') else audio_bytes)
+            if audio_input is None:
+                with tempfile.NamedTemporaryFile(delete=False, suffix='.wav') as tmp_file:
+                    tmp_file.write(audio_bytes)
+                    tmp_path = tmp_file.name
+                audio_input = tmp_path
+            else:
+                if is_silent(audio_input):
+                    print("⚠️ Recording is silent")
+                    return None, "No speech detected - please try again"
+                
+                # The encoder pays for silence too; hand it only the speech
+                audio_input = trim_to_speech(audio_input)
+                if not len(audio_input):
+                    print("⚠️ No speech detected")
+                    return None, "No speech detected - please try again"
             
             try:
                 print("🧠 Checking Whisper model...")
-                if hasattr(st.session_state, 'whisper_model'):
+                model = get_whisper()
+                if model is not None:
                     print("🎯 Running Whisper transcription...")
-                    result = st.session_state.whisper_model.transcribe(tmp_path)
-                    transcribed_text = result["text"].strip()
+                    transcribed_text = transcribe_with_whisper(model, audio_input)
                     print(f"📝 Raw transcription: '{transcribed_text}'")
                     
                     if transcribed_text:
@@ -97,89 +388,76 @@ class VoiceProcessor:
                     return None, "Whisper model not loaded"
                     
             finally:
-                try:
-                    os.unlink(tmp_path)
-                except:
-                    pass
+                if tmp_path:
+                    try:
+                        os.unlink(tmp_path)
+                    except:
+                        pass
                     
         except Exception as e:
             print(f"❌ Transcription error: {str(e)}")
             return None, f"Transcription error: {str(e)[:100]}"
     
-    def speak_text(self, text):
-        """Convert text to speech safely."""
+    def queue_speech(self, text):
+        """Queue one sentence; it is spoken after those already queued."""
         if not self.tts_engine or not text.strip():
-            print("❌ TTS: No engine or empty text")
             return False
-        
-        # Allow multiple concurrent TTS by checking and stopping previous
-        if self.is_speaking:
-            print("⏸️ TTS: Stopping previous speech...")
-            self.stop_speaking()
-            time.sleep(0.5)  # Brief pause
-            
+        self._speech_q.put(text)
+        return True
+    
+    def _speech_loop(self):
+        """Own the TTS engine and speak queued text forever on the TTS thread."""
         try:
-            with self._speaking_lock:
-                self.is_speaking = True
-                print(f"🎤 TTS: Starting speech for text length {len(text)}")
-                
-                def speak_safely():
-                    try:
-                        temp_engine = pyttsx3.init()
-                        voices = temp_engine.getProperty('voices')
-                        if voices:
-                            for voice in voices:
-                                if any(name in voice.name.lower() for name in ['daniel', 'alex', 'thomas']):
-                                    temp_engine.setProperty('voice', voice.id)
-                                    print(f"🗣️ TTS: Using voice {voice.name}")
-                                    break
-                        temp_engine.setProperty('rate', 175)
-                        temp_engine.setProperty('volume', 1.0)
-                        print(f"📢 TTS: Speaking text...")
-                        temp_engine.say(text)
-                        temp_engine.runAndWait()
-                        temp_engine.stop()
-                        del temp_engine
-                        print(f"✅ TTS: Speech completed")
-                    except Exception as e:
-                        print(f"❌ TTS Error: {e}")
-                    finally:
-                        self.is_speaking = False
-                        print(f"🔄 TTS: Speech flag cleared")
-                
-                thread = threading.Thread(target=speak_safely, daemon=True)
-                thread.start()
-                return True
-                
+            engine = self._init_tts_engine()
+            self.tts_engine = engine
         except Exception as e:
-            self.is_speaking = False
-            print(f"❌ TTS Setup Error: {e}")
-            return False
-            print(f"Text-to-speech error: {e}")
-            return False
+            print(f"TTS initialization error: {e}")
+            return
+        finally:
+            self._tts_ready.set()
+        
+        while True:
+            text = self._speech_q.get()
+            try:
+                engine.say(text)
+                engine.runAndWait()
+            except Exception as e:
+                print(f"❌ TTS Error: {e}")
+            finally:
+                self._speech_q.task_done()
     
     def stop_speaking(self):
-        """Stop ongoing speech."""
+        """Stop ongoing speech and drop queued text."""
         try:
-            with self._speaking_lock:
-                self.is_speaking = False
-                if self.tts_engine:
-                    try:
-                        self.tts_engine.stop()
-                    except:
-                        pass
-                return True
+            while True:
+                try:
+                    self._speech_q.get_nowait()
+                except queue.Empty:
+                    break
+                self._speech_q.task_done()
+            
+            if self.tts_engine:
+                try:
+                    self.tts_engine.stop()
+                except:
+                    pass
+            return True
         except Exception as e:
             print(f"Error stopping speech: {e}")
             return False
 
+@st.cache_resource
+def get_voice_processor():
+    """One voice processor (TTS engine, speech queue, Whisper) for all sessions."""
+    return VoiceProcessor()
+
+@st.cache_data(ttl=30, show_spinner=False)
 def check_ollama():
-    """Check if Ollama is available."""
+    """Check if Ollama is available (reused for 30 s across reruns)."""
     if not OLLAMA_AVAILABLE:
         return False, []
     try:
-        client = ollama.Client()
-        models_response = client.list()
+        models_response = _client.list()
         if hasattr(models_response, 'models') and models_response.models:
             model_names = [model.model for model in models_response.models]
             print(f"🔍 Found Ollama models: {model_names}")
@@ -192,15 +470,60 @@ def check_ollama():
         return False, []
 
 def chat_with_ollama(prompt, model="phi"):
-    """Chat with Ollama model."""
+    """Chat with Ollama model, yielding reply text as it streams in."""
     try:
-        client = ollama.Client()
-        response = client.chat(model=model, messages=[
+        stream = _client.chat(model=model, messages=[
             {"role": "user", "content": prompt}
-        ])
-        return response['message']['content']
+        ], keep_alive=OLLAMA_KEEP_ALIVE, stream=True)
+        for chunk in stream:
+            content = chunk['message']['content']
+            if content:
+                yield content
     except Exception as e:
-        return f"Error: {str(e)}"
+        yield f"Error: {str(e)}"
+
+def prefetch_stream(tokens):
+    """Drain a token generator on the Ollama executor.
+    
+    Returns:
+        Generator over the same tokens for the script thread; exceptions from
+        the source generator are re-raised when it is exhausted
+    """
+    buffer = queue.Queue()
+    
+    def _pump():
+        try:
+            for token in tokens:
+                buffer.put(token)
+        finally:
+            buffer.put(_STREAM_END)
+    
+    def _drain(future):
+        while True:
+            token = buffer.get()
+            if token is _STREAM_END:
+                break
+            yield token
+        future.result()
+    
+    # Submitted here, not on first iteration, so the request starts at once
+    return _drain(_ollama_executor.submit(_pump))
+
+# Whitespace following sentence-ending punctuation
+SENTENCE_END = re.compile(r'(?<=[.!?])\s+')
+
+def speak_sentences(tokens, voice_processor):
+    """Pass tokens through unchanged, queueing each sentence for speech as soon
+    as it is complete so TTS overlaps with generation."""
+    buffer = ""
+    for token in tokens:
+        yield token
+        buffer += token
+        *sentences, buffer = SENTENCE_END.split(buffer)
+        for sentence in sentences:
+            voice_processor.queue_speech(sentence)
+    if buffer.strip():
+        voice_processor.queue_speech(buffer)
 
 def main():
     st.set_page_config(page_title="WhisperMind", page_icon="🧠", layout="centered")
@@ -220,16 +543,11 @@ def main():
         print(f"⚠️ No models detected, defaulting to: {selected_model}")
 
     # Initialize voice processor
-    if 'voice_processor' not in st.session_state:
-        st.session_state.voice_processor = VoiceProcessor() if VOICE_AVAILABLE else None
+    voice_processor = get_voice_processor() if VOICE_AVAILABLE else None
 
     # Initialize session states
-    if "messages" not in st.session_state:
-        st.session_state.messages = []
-    if 'input_value' not in st.session_state:
-        st.session_state.input_value = ""
-    if 'input_counter' not in st.session_state:
-        st.session_state.input_counter = 0
+    for key, default in (("messages", []), ("input_value", ""), ("input_counter", 0)):
+        st.session_state.setdefault(key, default)
 
     # Display chat history
     for message in st.session_state.messages:
@@ -336,18 +654,20 @@ def main():
             
             if audio_bytes:
                 # Process voice input
-                audio_hash = hashlib.md5(audio_bytes.getvalue()).hexdigest()
+                # Each recording is a new upload with its own file_id, so
+                # replays are spotted without touching the audio; hash the
+                # buffer in place only if the widget doesn't expose one
+                audio_key = getattr(audio_bytes, 'file_id', None) or audio_fingerprint(audio_bytes.getbuffer())
                 
-                if 'last_audio_hash' not in st.session_state or st.session_state.last_audio_hash != audio_hash:
-                    print(f"🎤 Processing new audio: {audio_hash[:8]}...")
-                    st.session_state.last_audio_hash = audio_hash
+                if st.session_state.get('last_audio_key') != audio_key:
+                    print(f"🎤 Processing new audio: {audio_key}...")
+                    st.session_state.last_audio_key = audio_key
                     
                     # Clear any previous transcription status
-                    if 'transcription_status' in st.session_state:
-                        del st.session_state.transcription_status
+                    st.session_state.pop('transcription_status', None)
                     
                     with st.spinner("🎧 Transcribing..."):
-                        text, error = st.session_state.voice_processor.transcribe_audio(audio_bytes)
+                        text, error = voice_processor.transcribe_audio(audio_bytes)
                         
                         if text and text.strip():
                             print(f"✅ Transcription: '{text.strip()}'")
@@ -383,8 +703,7 @@ def main():
         print(f"🚀 Sending: '{user_input.strip()}'")
         
         # Clear transcription status when sending
-        if 'transcription_status' in st.session_state:
-            del st.session_state.transcription_status
+        st.session_state.pop('transcription_status', None)
         
         # Add user message
         st.session_state.messages.append({"role": "user", "content": user_input.strip()})
@@ -399,22 +718,24 @@ def main():
         # Generate response
         if ollama_available:
             with st.chat_message("assistant"):
-                with st.spinner("🤖 Thinking..."):
-                    response = chat_with_ollama(user_input.strip(), selected_model)
-                st.markdown(response)
+                speak_reply = VOICE_AVAILABLE and voice_processor and audio_response
+                # The request starts now; tokens queue up while the page renders
+                tokens = prefetch_stream(chat_with_ollama(user_input.strip(), selected_model))
+                if speak_reply:
+                    # Speak each sentence as soon as it has streamed in
+                    tokens = speak_sentences(tokens, voice_processor)
+                response = st.write_stream(tokens)
                 
                 # Voice response with stop button (only if audio response is enabled)
-                if VOICE_AVAILABLE and st.session_state.voice_processor and audio_response:
+                if speak_reply:
                     response_id = len(st.session_state.messages)
                     col_speak, col_stop = st.columns([3, 1])
                     with col_speak:
-                        print(f"🔊 Starting TTS for response {response_id}...")
-                        st.session_state.voice_processor.speak_text(response)
                         st.caption("🔊 Speaking response...")
                     with col_stop:
                         if st.button("🔇 Stop", key=f"stop_speech_{response_id}"):
                             print(f"🔇 Stopping speech for response {response_id}")
-                            st.session_state.voice_processor.stop_speaking()
+                            voice_processor.stop_speaking()
                             st.success("🔇 Speech stopped")
             
             # Add assistant response